@@ -10,6 +10,8 @@ from csp import apply_csp_middleware  # Import the CSP middleware
 from utils.version import get_version  # Import version management
 from utils.latency_monitor import init_latency_monitoring  # Import latency monitoring
 from utils.traffic_logger import init_traffic_logging  # Import traffic logging
+from utils.metrics import instrument_database_metrics  # Import database metrics
+from utils.profiler import init_profiler  # Import the request profiler
 
 from blueprints.auth import auth_bp
 from blueprints.dashboard import dashboard_bp
@@ -26,6 +28,8 @@ from blueprints.chartink import chartink_bp  # Import the chartink blueprint
 from blueprints.traffic import traffic_bp  # Import the traffic blueprint
 from blueprints.latency import latency_bp  # Import the latency blueprint
 from blueprints.strategy import strategy_bp  # Import the strategy blueprint
+from blueprints.metrics import metrics_bp  # Import the metrics blueprint
+from blueprints.profiler import profiler_bp  # Import the profiler blueprint
 
 from restx_api import api_v1_bp, api
 
@@ -39,10 +43,15 @@ from database.chartink_db import init_db as ensure_chartink_tables_exists
 from database.traffic_db import init_logs_db as ensure_traffic_logs_exists
 from database.latency_db import init_latency_db as ensure_latency_tables_exists
 from database.strategy_db import init_db as ensure_strategy_tables_exists
+from database.order_queue_db import init_order_queue_db as ensure_order_queue_tables_exists
+from database.log_retention import start_log_retention
+from database.symbol_search import load_symbol_indexes
+from services.order_queue_service import replay_queued_orders
 
-from utils.plugin_loader import load_broker_auth_functions
+from utils.plugin_loader import load_broker_auth_functions, load_broker_registry
 
 import os
+import threading
 
 def create_app():
     # Initialize Flask application
@@ -71,6 +80,9 @@ def create_app():
     # Initialize traffic logging middleware after RESTx but before other blueprints
     init_traffic_logging(app)
 
+    # Profile armed API requests, including the traffic logging around them
+    init_profiler(app)
+
     # Register other blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -87,6 +99,11 @@ def create_app():
     app.register_blueprint(traffic_bp)
     app.register_blueprint(latency_bp)
     app.register_blueprint(strategy_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profiler_bp)
+
+    # Time database statements for the metrics endpoint
+    instrument_database_metrics()
 
     # Initialize latency monitoring (after registering API blueprint)
     with app.app_context():
@@ -115,6 +132,7 @@ def setup_environment(app):
     with app.app_context():
         #load broker plugins
         app.broker_auth_functions = load_broker_auth_functions()
+        app.broker_registry = load_broker_registry()
         # Ensure all the tables exist
         ensure_auth_tables_exists()
         ensure_user_tables_exists()
@@ -126,6 +144,16 @@ def setup_environment(app):
         ensure_traffic_logs_exists()
         ensure_latency_tables_exists()
         ensure_strategy_tables_exists()
+        ensure_order_queue_tables_exists()
+
+    # Prune raw traffic and latency logs once they are rolled up
+    start_log_retention()
+
+    # Build the symbol indexes from the stored master contract before the first search
+    threading.Thread(target=load_symbol_indexes, name='symbol-index-build', daemon=True).start()
+
+    # Place webhook orders accepted before the last shutdown but not placed
+    replay_queued_orders()
 
     # Conditionally setup ngrok in development environment
     if os.getenv('NGROK_ALLOW') == 'TRUE':
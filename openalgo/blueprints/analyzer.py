@@ -1,15 +1,15 @@
-from flask import Blueprint, render_template, jsonify, request, session, flash, redirect, url_for, Response
+from flask import Blueprint, render_template, jsonify, request, session, flash, redirect, url_for
 from database.analyzer_db import AnalyzerLog, db_session
+from database.log_index import apply_date_range, fetch_page
+from utils.csv_export import iter_csv, csv_response, stream_query
 from utils.session import check_session_validity
-from sqlalchemy import func, desc
+from sqlalchemy import desc
 from utils.api_analyzer import get_analyzer_stats
 import json
 from datetime import datetime, timedelta
 import pytz
 import logging
 import traceback
-import io
-import csv
 
 logger = logging.getLogger(__name__)
 
@@ -75,73 +75,67 @@ def get_recent_requests():
         logger.error(f"Error getting recent requests: {str(e)}")
         return []
 
-def get_filtered_requests(start_date=None, end_date=None):
-    """Get analyzer requests with date filtering"""
+# Requests shown per analyzer page
+ANALYZER_PAGE_SIZE = 100
+
+def build_requests_query(start_date=None, end_date=None):
+    """AnalyzerLog query for a date range, defaulting to today, using the created_at index"""
+    ist = pytz.timezone('Asia/Kolkata')
+    if not start_date and not end_date:
+        start_date = end_date = datetime.now(ist).date()
+    return apply_date_range(AnalyzerLog.query, AnalyzerLog.created_at, start_date, end_date)
+
+def get_all_filtered_requests(start_date=None, end_date=None):
+    """Iterate every analyzer request in the date range, newest first, for export; rows are fetched in batches"""
+    ist = pytz.timezone('Asia/Kolkata')
+    query = build_requests_query(start_date, end_date).order_by(AnalyzerLog.id.desc())
+    return (formatted for formatted in (format_request(req, ist) for req in stream_query(query)) if formatted)
+
+def get_requests_page(start_date=None, end_date=None, before=None, after=None, per_page=ANALYZER_PAGE_SIZE):
+    """
+    Get one page of analyzer requests, newest first, using keyset pagination.
+    Returns the formatted requests and the cursors for the older and newer pages.
+    """
     try:
         ist = pytz.timezone('Asia/Kolkata')
-        query = AnalyzerLog.query
+        rows, older_cursor, newer_cursor = fetch_page(
+            build_requests_query(start_date, end_date), AnalyzerLog.id, per_page, before=before, after=after
+        )
+        requests = [formatted for formatted in (format_request(req, ist) for req in rows) if formatted]
+        return requests, older_cursor, newer_cursor
+    except Exception as e:
+        logger.error(f"Error getting analyzer requests page: {str(e)}\n{traceback.format_exc()}")
+        return [], None, None
 
-        # Apply date filters if provided
-        if start_date:
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(AnalyzerLog.created_at) >= start_date)
-        if end_date:
-            if isinstance(end_date, str):
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(AnalyzerLog.created_at) <= end_date)
-        
-        # If no dates provided, default to today
-        if not start_date and not end_date:
-            today_ist = datetime.now(ist).date()
-            query = query.filter(func.date(AnalyzerLog.created_at) == today_ist)
+def parse_cursor(value):
+    """Keyset cursor from the query string, None when absent or malformed"""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
 
-        # Get results ordered by created_at
-        results = query.order_by(AnalyzerLog.created_at.desc()).all()
-        requests = []
-        
-        for req in results:
-            formatted = format_request(req, ist)
-            if formatted:
-                requests.append(formatted)
-                
-        return requests
-    except Exception as e:
-        logger.error(f"Error getting filtered requests: {str(e)}\n{traceback.format_exc()}")
-        return []
+def csv_rows(requests):
+    """CSV rows for formatted analyzer requests"""
+    for req in requests:
+        yield [
+            req['timestamp'],
+            req['api_type'],
+            req['source'],
+            req.get('symbol', ''),
+            req.get('exchange', ''),
+            req.get('action', ''),
+            req.get('quantity', ''),
+            req.get('price_type', ''),
+            req.get('product_type', ''),
+            'Error' if req['analysis']['issues'] else 'Success',
+            req['analysis'].get('error', '')
+        ]
 
 def generate_csv(requests):
-    """Generate CSV from analyzer requests"""
-    try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        headers = ['Timestamp', 'API Type', 'Source', 'Symbol', 'Exchange', 'Action', 
-                  'Quantity', 'Price Type', 'Product Type', 'Status', 'Error Message']
-        writer.writerow(headers)
-        
-        # Write data
-        for req in requests:
-            row = [
-                req['timestamp'],
-                req['api_type'],
-                req['source'],
-                req.get('symbol', ''),
-                req.get('exchange', ''),
-                req.get('action', ''),
-                req.get('quantity', ''),
-                req.get('price_type', ''),
-                req.get('product_type', ''),
-                'Error' if req['analysis']['issues'] else 'Success',
-                req['analysis'].get('error', '')
-            ]
-            writer.writerow(row)
-        
-        return output.getvalue()
-    except Exception as e:
-        logger.error(f"Error generating CSV: {str(e)}\n{traceback.format_exc()}")
-        return ""
+    """Stream CSV chunks from analyzer requests"""
+    headers = ['Timestamp', 'API Type', 'Source', 'Symbol', 'Exchange', 'Action', 
+              'Quantity', 'Price Type', 'Product Type', 'Status', 'Error Message']
+    return iter_csv(headers, csv_rows(requests))
 
 @analyzer_bp.route('/')
 @check_session_validity
@@ -171,14 +165,21 @@ def analyzer():
                 }
             }
 
-        # Get filtered requests
-        requests = get_filtered_requests(start_date, end_date)
+        # Get one page of filtered requests
+        requests, older_cursor, newer_cursor = get_requests_page(
+            start_date,
+            end_date,
+            before=parse_cursor(request.args.get('before')),
+            after=parse_cursor(request.args.get('after'))
+        )
         
         return render_template('analyzer.html', 
                              requests=requests, 
                              stats=stats,
                              start_date=start_date,
-                             end_date=end_date)
+                             end_date=end_date,
+                             older_cursor=older_cursor,
+                             newer_cursor=newer_cursor)
     except Exception as e:
         logger.error(f"Error rendering analyzer: {str(e)}\n{traceback.format_exc()}")
         flash('Error loading analyzer dashboard', 'error')
@@ -244,16 +245,10 @@ def export_requests():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # Get filtered requests
-        requests = get_filtered_requests(start_date, end_date)
-        
-        # Generate CSV
-        csv_data = generate_csv(requests)
-        
-        # Create the response
-        output = Response(csv_data, mimetype='text/csv')
-        output.headers["Content-Disposition"] = f"attachment; filename=analyzer_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        return output
+        # Every filtered request, read as the CSV is streamed
+        requests = get_all_filtered_requests(start_date, end_date)
+        filename = f"analyzer_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return csv_response(generate_csv(requests), filename)
     except Exception as e:
         logger.error(f"Error exporting requests: {str(e)}\n{traceback.format_exc()}")
         flash('Error exporting requests', 'error')
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for, abort
 from database.chartink_db import (
     ChartinkStrategy, ChartinkSymbolMapping, db_session,
-    create_strategy, add_symbol_mapping, get_strategy_by_webhook_id,
+    create_strategy, add_symbol_mapping, get_webhook_route,
     get_symbol_mappings, get_all_strategies, delete_strategy,
     update_strategy_times, delete_symbol_mapping, bulk_add_symbol_mappings,
     toggle_strategy, get_strategy, get_user_strategies
@@ -9,19 +9,13 @@ from database.chartink_db import (
 from database.symbol import enhanced_search_symbols
 from database.auth_db import get_api_key_for_tradingview
 from utils.session import check_session_validity
+from services.order_queue_service import queue_order as queue_webhook_order
 import json
-from datetime import datetime, time
+from datetime import datetime
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 import logging
-import requests
-import os
 import uuid
-import time as time_module
-import queue
-import threading
-from collections import deque
-from time import time
 
 logger = logging.getLogger(__name__)
 
@@ -31,106 +25,12 @@ chartink_bp = Blueprint('chartink_bp', __name__, url_prefix='/chartink')
 scheduler = BackgroundScheduler(timezone=pytz.timezone('Asia/Kolkata'))
 scheduler.start()
 
-# Get base URL from environment or default to localhost
-BASE_URL = os.getenv('HOST_SERVER', 'http://127.0.0.1:5000')
-
 # Valid exchanges
 VALID_EXCHANGES = ['NSE', 'BSE']
 
-# Separate queues for different order types
-regular_order_queue = queue.Queue()  # For placeorder (up to 10/sec)
-smart_order_queue = queue.Queue()    # For placesmartorder (1/sec)
-
-# Order processor state
-order_processor_running = False
-order_processor_lock = threading.Lock()
-
-# Rate limiting state for regular orders
-last_regular_orders = deque(maxlen=10)  # Track last 10 regular order timestamps
-
-def process_orders():
-    """Background task to process orders from both queues with rate limiting"""
-    global order_processor_running
-    
-    while True:
-        try:
-            # Process smart orders first (1 per second)
-            try:
-                smart_order = smart_order_queue.get_nowait()
-                if smart_order is None:  # Poison pill
-                    break
-                
-                try:
-                    response = requests.post(f'{BASE_URL}/api/v1/placesmartorder', json=smart_order['payload'])
-                    if response.ok:
-                        logger.info(f'Smart order placed for {smart_order["payload"]["symbol"]} in strategy {smart_order["payload"]["strategy"]}')
-                    else:
-                        logger.error(f'Error placing smart order for {smart_order["payload"]["symbol"]}: {response.text}')
-                except Exception as e:
-                    logger.error(f'Error placing smart order: {str(e)}')
-                
-                # Always wait 1 second after smart order
-                time_module.sleep(1)
-                continue  # Start next iteration
-                
-            except queue.Empty:
-                pass  # No smart orders, continue to regular orders
-            
-            # Process regular orders (up to 10 per second)
-            now = time()
-            
-            # Clean up old timestamps
-            while last_regular_orders and now - last_regular_orders[0] > 1:
-                last_regular_orders.popleft()
-            
-            # Process regular orders if under rate limit
-            if len(last_regular_orders) < 10:
-                try:
-                    regular_order = regular_order_queue.get_nowait()
-                    if regular_order is None:  # Poison pill
-                        break
-                    
-                    try:
-                        response = requests.post(f'{BASE_URL}/api/v1/placeorder', json=regular_order['payload'])
-                        if response.ok:
-                            logger.info(f'Regular order placed for {regular_order["payload"]["symbol"]} in strategy {regular_order["payload"]["strategy"]}')
-                            last_regular_orders.append(now)
-                        else:
-                            logger.error(f'Error placing regular order for {regular_order["payload"]["symbol"]}: {response.text}')
-                    except Exception as e:
-                        logger.error(f'Error placing regular order: {str(e)}')
-                        
-                except queue.Empty:
-                    time_module.sleep(0.1)  # No orders to process
-            else:
-                # Rate limit hit, wait until next second
-                time_module.sleep(0.1)
-                
-        except Exception as e:
-            logger.error(f'Error in order processor: {str(e)}')
-            time_module.sleep(0.1)  # Prevent tight loop on error
-    
-    with order_processor_lock:
-        order_processor_running = False
-
-def ensure_order_processor():
-    """Ensure order processor is running"""
-    global order_processor_running
-    
-    with order_processor_lock:
-        if not order_processor_running:
-            order_processor_running = True
-            thread = threading.Thread(target=process_orders, daemon=True)
-            thread.start()
-
-def queue_order(endpoint, payload):
+def queue_order(endpoint, payload, idempotency_key=None):
     """Add order to appropriate processing queue"""
-    ensure_order_processor()
-    
-    if endpoint == 'placesmartorder':
-        smart_order_queue.put({'endpoint': endpoint, 'payload': payload})
-    else:  # placeorder
-        regular_order_queue.put({'endpoint': endpoint, 'payload': payload})
+    return queue_webhook_order('chartink', endpoint, payload, idempotency_key)
 
 def validate_strategy_times(start_time, end_time, squareoff_time):
     """Validate strategy time settings"""
@@ -206,6 +106,7 @@ def squareoff_positions(strategy_id):
             
         # Get all symbol mappings
         mappings = get_symbol_mappings(strategy_id)
+        squareoff_date = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d')
         
         for mapping in mappings:
             # Use placesmartorder with quantity=0 and position_size=0 for squareoff
@@ -224,8 +125,9 @@ def squareoff_positions(strategy_id):
                 'disclosed_quantity': '0'
             }
             
-            # Queue the order instead of executing directly
-            queue_order('placesmartorder', payload)
+            # Queue the order instead of executing directly; once per symbol and day
+            queue_order('placesmartorder', payload,
+                        f'chartink-squareoff:{strategy_id}:{squareoff_date}:{mapping.exchange}:{payload["symbol"]}')
             
     except Exception as e:
         logger.error(f'Error in squareoff_positions for strategy {strategy_id}: {str(e)}')
@@ -537,10 +439,12 @@ def webhook(webhook_id):
     """Handle webhook from Chartink"""
     try:
         # Get strategy by webhook ID
-        strategy = get_strategy_by_webhook_id(webhook_id)
-        if not strategy:
+        # Cached strategy and mappings; no database access on the alert path
+        route = get_webhook_route(webhook_id)
+        if not route:
             logger.error(f'Strategy not found for webhook ID: {webhook_id}')
             return jsonify({'status': 'error', 'error': 'Invalid webhook ID'}), 404
+        strategy = route.strategy
         
         if not strategy.is_active:
             logger.info(f'Strategy {strategy.id} is inactive, ignoring webhook')
@@ -619,21 +523,28 @@ def webhook(webhook_id):
             return jsonify({'status': 'error', 'error': 'No symbols received'}), 400
         
         # Get symbol mappings
-        mappings = get_symbol_mappings(strategy.id)
-        if not mappings:
+        mapping_dict = route.mappings
+        if not mapping_dict:
             logger.error(f'No symbol mappings found for strategy {strategy.id}')
             return jsonify({'status': 'error', 'error': 'No symbol mappings configured'}), 400
         
-        mapping_dict = {m.chartink_symbol: m for m in mappings}
-        
         # Get API key from database
         api_key = get_api_key_for_tradingview(strategy.user_id)
         if not api_key:
             logger.error(f'No API key found for user {strategy.user_id}')
             return jsonify({'status': 'error', 'error': 'No API key found'}), 401
         
+        # A resent alert is queued once
+        alert_key = None
+        if data.get('triggered_at'):
+            alert_date = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d')
+            alert_key = f'chartink:{webhook_id}:{alert_date}:{data["triggered_at"]}:{scan_name}'
+
         # Process each symbol
-        processed_symbols = []
+        queued_symbols = []
+        duplicate_symbols = []  # Already queued by an earlier copy of this alert
+        entry_orders = []  # Regular orders, placed together as one basket
+        entry_symbols = []
         for symbol in symbols:
             symbol = symbol.strip()
             if not symbol:
@@ -666,23 +577,47 @@ def webhook(webhook_id):
                     'disclosed_quantity': '0'
                 })
                 endpoint = 'placesmartorder'
+                
+                logger.info(f'Queueing {endpoint} with payload: {payload}')
+                
+                # Queue the order instead of executing directly
+                if queue_order(endpoint, payload, f'{alert_key}:{symbol}' if alert_key else None):
+                    queued_symbols.append(symbol)
+                else:
+                    duplicate_symbols.append(symbol)
             else:
                 # For BUY and SHORT, use regular order with configured quantity
                 payload.update({
                     'quantity': str(mapping.quantity)
                 })
-                endpoint = 'placeorder'
-            
-            logger.info(f'Queueing {endpoint} with payload: {payload}')
-            
-            # Queue the order instead of executing directly
-            queue_order(endpoint, payload)
-            processed_symbols.append(symbol)
+                entry_orders.append(payload)
+                entry_symbols.append(symbol)
+        
+        entries_queued = True
+        if len(entry_orders) > 1:
+            # One basket for the whole scan, placed in parallel instead of order by order
+            basket = {
+                'apikey': api_key,
+                'strategy': strategy.name,
+                'orders': [{key: value for key, value in order.items() if key not in ('apikey', 'strategy')}
+                           for order in entry_orders]
+            }
+            logger.info(f'Queueing basketorder for symbols: {", ".join(order["symbol"] for order in entry_orders)}')
+            entries_queued = queue_order('basketorder', basket, alert_key)
+        elif entry_orders:
+            logger.info(f'Queueing placeorder with payload: {entry_orders[0]}')
+            entries_queued = queue_order('placeorder', entry_orders[0], f'{alert_key}:{entry_orders[0]["symbol"]}' if alert_key else None)
+        (queued_symbols if entries_queued else duplicate_symbols).extend(entry_symbols)
         
-        if processed_symbols:
+        if queued_symbols or duplicate_symbols:
+            messages = []
+            if queued_symbols:
+                messages.append(f'Orders queued for symbols: {", ".join(queued_symbols)}')
+            if duplicate_symbols:
+                messages.append(f'Duplicate alert ignored for symbols: {", ".join(duplicate_symbols)}')
             return jsonify({
                 'status': 'success',
-                'message': f'Orders queued for symbols: {", ".join(processed_symbols)}'
+                'message': '; '.join(messages)
             })
         else:
             return jsonify({
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, session, redirect, url_for, g, jsonify, request
 from database.auth_db import get_auth_token
-from importlib import import_module
+from utils.broker_registry import get_broker_module
 from utils.session import check_session_validity
 import multiprocessing
 import sys
@@ -10,8 +10,9 @@ logger = logging.getLogger(__name__)
 
 def dynamic_import(broker):
     try:
-        module_path = f'broker.{broker}.api.funds'
-        module = import_module(module_path)
+        module = get_broker_module(broker, 'funds')
+        if module is None:
+            raise ImportError(f"Module broker.{broker}.api.funds is not available")
         get_margin_data = getattr(module, 'get_margin_data')
         return get_margin_data
     except ImportError as e:
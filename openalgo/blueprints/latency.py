@@ -1,15 +1,13 @@
-from flask import Blueprint, jsonify, render_template, request, session, Response
-from database.latency_db import OrderLatency, latency_session
+from flask import Blueprint, jsonify, render_template, request, session
+from database.latency_db import OrderLatency, latency_session, latency_log_writer
 from utils.session import check_session_validity
+from utils.csv_export import iter_csv, csv_response, stream_query
 from limiter import limiter
 import logging
 from sqlalchemy import func
 from collections import defaultdict
-import numpy as np
 from datetime import datetime
 import pytz
-import csv
-import io
 
 logger = logging.getLogger(__name__)
 
@@ -33,52 +31,7 @@ def format_ist_time(timestamp):
 def get_histogram_data(broker=None):
     """Get histogram data for RTT distribution"""
     try:
-        query = OrderLatency.query
-        if broker:
-            query = query.filter_by(broker=broker)
-        
-        # Get all RTT values
-        rtts = [r[0] for r in query.with_entities(OrderLatency.rtt_ms).all()]
-        
-        if not rtts:
-            return {
-                'bins': [],
-                'counts': [],
-                'avg_rtt': 0,
-                'min_rtt': 0,
-                'max_rtt': 0
-            }
-        
-        # Calculate statistics
-        avg_rtt = sum(rtts) / len(rtts)
-        min_rtt = min(rtts)
-        max_rtt = max(rtts)
-        
-        # Create histogram bins
-        bin_count = 30  # Number of bins
-        bin_width = (max_rtt - min_rtt) / bin_count if max_rtt > min_rtt else 1
-        
-        # Create histogram using numpy
-        counts, bins = np.histogram(rtts, bins=bin_count, range=(min_rtt, max_rtt))
-        
-        # Convert to list for JSON serialization
-        counts = counts.tolist()
-        bins = bins.tolist()
-        
-        # Create bin labels (use the start of each bin)
-        bin_labels = [f"{bins[i]:.1f}" for i in range(len(bins)-1)]
-        
-        data = {
-            'bins': bin_labels,
-            'counts': counts,
-            'avg_rtt': float(avg_rtt),
-            'min_rtt': float(min_rtt),
-            'max_rtt': float(max_rtt)
-        }
-        
-        # logger.info(f"Histogram data for broker {broker}: {data}")  # Commented out to reduce log verbosity
-        return data
-        
+        return OrderLatency.get_rtt_histogram(broker)
     except Exception as e:
         logger.error(f"Error getting histogram data: {e}")
         return {
@@ -90,16 +43,10 @@ def get_histogram_data(broker=None):
         }
 
 def generate_csv(logs):
-    """Generate CSV file from latency logs"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Timestamp', 'Broker', 'Order ID', 'Symbol', 'Order Type', 'RTT (ms)', 'Overhead (ms)', 'Total Latency (ms)', 'Status'])
-    
-    # Write data
-    for log in logs:
-        writer.writerow([
+    """Stream CSV chunks from latency logs"""
+    headers = ['Timestamp', 'Broker', 'Order ID', 'Symbol', 'Order Type', 'RTT (ms)', 'Overhead (ms)', 'Total Latency (ms)', 'Status']
+    rows = (
+        [
             format_ist_time(log.timestamp),
             log.broker,
             log.order_id,
@@ -109,9 +56,10 @@ def generate_csv(logs):
             round(log.overhead_ms, 2),
             round(log.total_latency_ms, 2),
             log.status
-        ])
-    
-    return output.getvalue()
+        ]
+        for log in logs
+    )
+    return iter_csv(headers, rows)
 
 @latency_bp.route('/', methods=['GET'])
 @check_session_validity
@@ -123,10 +71,8 @@ def latency_dashboard():
     
     # Get histogram data for each broker
     broker_histograms = {}
-    brokers = [b[0] for b in OrderLatency.query.with_entities(OrderLatency.broker).distinct().all()]
-    for broker in brokers:
-        if broker:  # Skip None values
-            broker_histograms[broker] = get_histogram_data(broker)
+    for broker in stats.get('broker_stats', {}):
+        broker_histograms[broker] = get_histogram_data(broker)
     
     # logger.info(f"Broker histograms data: {broker_histograms}")  # Commented out to reduce log verbosity
     
@@ -159,6 +105,7 @@ def get_logs():
             'response_latency_ms': log.response_latency_ms,
             'overhead_ms': log.overhead_ms,
             'total_latency_ms': log.total_latency_ms,
+            'stage_breakdown': log.stage_breakdown or {},
             'status': log.status,
             'error': log.error
         } for log in logs])
@@ -180,6 +127,7 @@ def get_stats():
             broker_histograms[broker] = get_histogram_data(broker)
         
         stats['broker_histograms'] = broker_histograms
+        stats['writer'] = latency_log_writer.stats()
         return jsonify(stats)
     except Exception as e:
         logger.error(f"Error fetching latency stats: {e}")
@@ -209,20 +157,9 @@ def get_broker_stats(broker):
 def export_logs():
     """Export latency logs to CSV"""
     try:
-        # Get all logs for the current day
-        logs = OrderLatency.get_recent_logs(limit=None)  # None to get all logs
-        
-        # Generate CSV
-        csv_data = generate_csv(logs)
-        
-        # Create the response
-        response = Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=latency_logs.csv'}
-        )
-        
-        return response
+        # Every log, newest first, fetched in batches as the CSV is streamed
+        logs = stream_query(OrderLatency.query.order_by(OrderLatency.timestamp.desc()))
+        return csv_response(generate_csv(logs), 'latency_logs.csv')
         
     except Exception as e:
         logger.error(f"Error exporting latency logs: {e}")
@@ -1,15 +1,14 @@
 # blueprints/log.py
 
-from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, Response
-from database.apilog_db import OrderLog
+from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
+from database.apilog_db import OrderLog, db_session
+from database.log_index import apply_date_range, apply_search, fetch_page
 from utils.session import check_session_validity
-from sqlalchemy import func
+from utils.csv_export import iter_csv, csv_response, stream_query
 import pytz
 from datetime import datetime
 import logging
 import json
-import csv
-import io
 import traceback
 
 logger = logging.getLogger(__name__)
@@ -48,8 +47,8 @@ def format_log_entry(log, ist):
             logger.error(f"Error processing response data for log {log.id}: {str(e)}")
             response_data = {}
         
-        # Extract strategy from request data
-        strategy = request_data.get('strategy', 'Unknown') if isinstance(request_data, dict) else 'Unknown'
+        # Strategy is stored in its own column; older rows only have it in the request data
+        strategy = log.strategy or (request_data.get('strategy', 'Unknown') if isinstance(request_data, dict) else 'Unknown')
         
         return {
             'id': log.id,
@@ -70,131 +69,122 @@ def format_log_entry(log, ist):
             'created_at': log.created_at.astimezone(ist).strftime('%Y-%m-%d %I:%M:%S %p')
         }
 
-def get_filtered_logs(start_date=None, end_date=None, search_query=None, page=None, per_page=None):
-    """Get filtered logs with pagination"""
+# Indexed columns that can be filtered on exactly
+LOG_FILTER_FIELDS = ('symbol', 'strategy', 'action', 'orderid', 'status')
+
+def build_log_query(start_date=None, end_date=None, search_query=None, filters=None):
+    """Filtered OrderLog query, using the created_at range index and the full-text index"""
     ist = pytz.timezone('Asia/Kolkata')
     query = OrderLog.query
 
-    try:
-        # Apply date filters if provided
-        if start_date:
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(OrderLog.created_at) >= start_date)
-        if end_date:
-            if isinstance(end_date, str):
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(func.date(OrderLog.created_at) <= end_date)
-        
-        # If no dates provided, default to today
-        if not start_date and not end_date:
-            today_ist = datetime.now(ist).date()
-            query = query.filter(func.date(OrderLog.created_at) == today_ist)
+    # If no dates provided, default to today
+    if not start_date and not end_date:
+        start_date = end_date = datetime.now(ist).date()
+    query = apply_date_range(query, OrderLog.created_at, start_date, end_date)
 
-        # Apply search filter if provided
-        if search_query:
-            search = f"%{search_query}%"
-            query = query.filter(
-                (OrderLog.api_type.ilike(search)) |
-                (OrderLog.request_data.ilike(search)) |
-                (OrderLog.response_data.ilike(search))
-            )
+    for field, value in (filters or {}).items():
+        if field in LOG_FILTER_FIELDS and value:
+            query = query.filter(getattr(OrderLog, field) == value)
 
-        # Get total count
-        total_logs = query.count()
+    # Apply search filter if provided
+    if search_query:
+        query = apply_search(query, db_session, OrderLog, search_query)
+    return query
 
-        # Calculate total pages only if pagination is enabled
-        if page is not None and per_page is not None:
-            total_pages = (total_logs + per_page - 1) // per_page
-            # Apply pagination
-            query = query.order_by(OrderLog.created_at.desc())\
-                       .offset((page - 1) * per_page)\
-                       .limit(per_page)
-        else:
-            total_pages = 1
-            query = query.order_by(OrderLog.created_at.desc())
+def get_filtered_logs(start_date=None, end_date=None, search_query=None, before=None, after=None,
+                      per_page=20, filters=None):
+    """
+    Get one page of filtered logs, newest first, using keyset pagination.
+    Returns the formatted logs and the cursors for the older and newer pages.
+    """
+    ist = pytz.timezone('Asia/Kolkata')
+    try:
+        query = build_log_query(start_date, end_date, search_query, filters)
+        rows, older_cursor, newer_cursor = fetch_page(query, OrderLog.id, per_page, before=before, after=after)
 
         # Format logs
-        logs = [format_log_entry(log, ist) for log in query.all()]
+        logs = [format_log_entry(log, ist) for log in rows]
         logger.info(f"Retrieved {len(logs)} logs")
 
-        return logs, total_pages, total_logs
+        return logs, older_cursor, newer_cursor
 
     except Exception as e:
         logger.error(f"Error in get_filtered_logs: {str(e)}\n{traceback.format_exc()}")
-        return [], 1, 0
+        return [], None, None
 
-def generate_csv(logs):
-    """Generate CSV file from logs"""
+def get_all_filtered_logs(start_date=None, end_date=None, search_query=None, filters=None):
+    """Iterate every filtered log, newest first, for export; rows are fetched in batches"""
+    ist = pytz.timezone('Asia/Kolkata')
+    query = build_log_query(start_date, end_date, search_query, filters).order_by(OrderLog.id.desc())
+    return (format_log_entry(log, ist) for log in stream_query(query))
+
+def parse_cursor(value):
+    """Keyset cursor from the query string, None when absent or malformed"""
     try:
-        si = io.StringIO()
-        writer = csv.writer(si)
-        
-        # Write headers - include all possible fields from all request types
-        headers = [
-            'ID', 
-            'Timestamp', 
-            'API Type', 
-            'Strategy',
-            'Exchange',
-            'Symbol',
-            'Action',
-            'Product',
-            'Price Type',
-            'Quantity',
-            'Position Size',  # For placesmartorder
-            'Price',
-            'Trigger Price',
-            'Disclosed Quantity',
-            'Order ID',  # For modifyorder, cancelorder
-            'Response'
-        ]
-        writer.writerow(headers)
-        
-        # Write data
-        for log in logs:
-            try:
-                request_data = log['request_data']
-                if not isinstance(request_data, dict):
-                    request_data = {}
-                
-                # Format response data for CSV
-                response_data = log['response_data']
-                if isinstance(response_data, dict):
-                    response_str = json.dumps(response_data)
-                else:
-                    response_str = str(response_data)
-                
-                # Build row with all possible fields
-                row = [
-                    log['id'],
-                    log['created_at'],
-                    log['api_type'],
-                    log['strategy'],
-                    request_data.get('exchange', ''),
-                    request_data.get('symbol', ''),
-                    request_data.get('action', ''),
-                    request_data.get('product', ''),
-                    request_data.get('pricetype', ''),
-                    request_data.get('quantity', ''),
-                    request_data.get('position_size', ''),  # Only for placesmartorder
-                    request_data.get('price', ''),
-                    request_data.get('trigger_price', ''),
-                    request_data.get('disclosed_quantity', ''),
-                    request_data.get('orderid', ''),  # For modifyorder, cancelorder
-                    response_str
-                ]
-                writer.writerow(row)
-                logger.debug(f"Wrote row: {row}")
-            except Exception as e:
-                logger.error(f"Error writing row for log {log.get('id')}: {str(e)}")
-                continue
-        
-        return si.getvalue()
+        return int(value) if value else None
+    except ValueError:
+        return None
 
-    except Exception as e:
-        logger.error(f"Error generating CSV: {str(e)}\n{traceback.format_exc()}")
-        raise
+def csv_rows(logs):
+    """CSV rows for formatted logs, skipping any log that cannot be written"""
+    for log in logs:
+        try:
+            request_data = log['request_data']
+            if not isinstance(request_data, dict):
+                request_data = {}
+
+            # Format response data for CSV
+            response_data = log['response_data']
+            if isinstance(response_data, dict):
+                response_str = json.dumps(response_data)
+            else:
+                response_str = str(response_data)
+
+            # Build row with all possible fields
+            yield [
+                log['id'],
+                log['created_at'],
+                log['api_type'],
+                log['strategy'],
+                request_data.get('exchange', ''),
+                request_data.get('symbol', ''),
+                request_data.get('action', ''),
+                request_data.get('product', ''),
+                request_data.get('pricetype', ''),
+                request_data.get('quantity', ''),
+                request_data.get('position_size', ''),  # Only for placesmartorder
+                request_data.get('price', ''),
+                request_data.get('trigger_price', ''),
+                request_data.get('disclosed_quantity', ''),
+                request_data.get('orderid', ''),  # For modifyorder, cancelorder
+                response_str
+            ]
+        except Exception as e:
+            logger.error(f"Error writing row for log {log.get('id')}: {str(e)}")
+            continue
+
+def generate_csv(logs):
+    """Stream CSV chunks from logs"""
+    # Headers include all possible fields from all request types
+    headers = [
+        'ID', 
+        'Timestamp', 
+        'API Type', 
+        'Strategy',
+        'Exchange',
+        'Symbol',
+        'Action',
+        'Product',
+        'Price Type',
+        'Quantity',
+        'Position Size',  # For placesmartorder
+        'Price',
+        'Trigger Price',
+        'Disclosed Quantity',
+        'Order ID',  # For modifyorder, cancelorder
+        'Response'
+    ]
+    return iter_csv(headers, csv_rows(logs))
 
 @log_bp.route('/')
 @check_session_validity
@@ -204,31 +194,35 @@ def view_logs():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         search_query = request.args.get('search', '').strip()
-        page = int(request.args.get('page', 1))
+        before = parse_cursor(request.args.get('before'))
+        after = parse_cursor(request.args.get('after'))
+        filters = {field: request.args.get(field) for field in LOG_FILTER_FIELDS}
         per_page = 20
 
         # Get filtered logs
-        logs, total_pages, _ = get_filtered_logs(
+        logs, older_cursor, newer_cursor = get_filtered_logs(
             start_date=start_date,
             end_date=end_date,
             search_query=search_query,
-            page=page,
-            per_page=per_page
+            before=before,
+            after=after,
+            per_page=per_page,
+            filters=filters
         )
 
         # If AJAX request, return JSON
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({
                 'logs': logs,
-                'total_pages': total_pages,
-                'current_page': page
+                'older_cursor': older_cursor,
+                'newer_cursor': newer_cursor
             })
 
         logger.info(f"Found {len(logs)} log entries")
         return render_template('logs.html', 
                              logs=logs,
-                             total_pages=total_pages, 
-                             current_page=page,
+                             older_cursor=older_cursor,
+                             newer_cursor=newer_cursor,
                              search_query=search_query,
                              start_date=start_date,
                              end_date=end_date)
@@ -237,8 +231,8 @@ def view_logs():
         logger.error(f"Error in view_logs: {str(e)}\n{traceback.format_exc()}")
         return render_template('logs.html', 
                              logs=[],
-                             total_pages=1,
-                             current_page=1,
+                             older_cursor=None,
+                             newer_cursor=None,
                              search_query='',
                              start_date=None,
                              end_date=None)
@@ -256,17 +250,14 @@ def export_logs():
 
         logger.info(f"Export parameters - start_date: {start_date}, end_date: {end_date}, search: {search_query}")
 
-        # Get all logs without pagination
-        logs, _, total = get_filtered_logs(
+        # Get all logs without pagination, read as the CSV is streamed
+        logs = get_all_filtered_logs(
             start_date=start_date,
             end_date=end_date,
             search_query=search_query,
-            page=None,
-            per_page=None
+            filters={field: request.args.get(field) for field in LOG_FILTER_FIELDS}
         )
 
-        logger.info(f"Retrieved {total} logs for export")
-
         # Generate CSV content
         csv_output = generate_csv(logs)
         
@@ -274,16 +265,9 @@ def export_logs():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'openalgo_logs_{timestamp}.csv'
 
-        logger.info(f"Generated CSV file: {filename}")
+        logger.info(f"Streaming CSV file: {filename}")
 
-        return Response(
-            csv_output,
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename={filename}',
-                'Content-Type': 'text/csv'
-            }
-        )
+        return csv_response(csv_output, filename)
 
     except Exception as e:
         error_msg = f"Error exporting logs: {str(e)}\n{traceback.format_exc()}"
@@ -0,0 +1,28 @@
+# blueprints/metrics.py
+
+from flask import Blueprint, Response, request, abort
+from utils.metrics import render_metrics
+import hmac
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Scrape token; the endpoint is disabled unless it is set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint, authenticated with 'Authorization: Bearer <METRICS_TOKEN>'"""
+    if not METRICS_TOKEN:
+        abort(404)
+
+    authorization = request.headers.get('Authorization', '')
+    token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else ''
+    if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        logger.warning(f"Rejected metrics scrape from {request.remote_addr}")
+        abort(401)
+
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
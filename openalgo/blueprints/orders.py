@@ -1,12 +1,11 @@
-from flask import Blueprint, jsonify, request, render_template, session, redirect, url_for, Response
-from importlib import import_module
+from flask import Blueprint, jsonify, request, render_template, session, redirect, url_for
+from utils.broker_registry import get_broker_module, BROKER_MODULE_KINDS
 from database.auth_db import get_auth_token
 from utils.session import check_session_validity
+from utils.csv_export import iter_csv, csv_response
 from services.place_smart_order_service import place_smart_order
 from services.close_position_service import close_position
 import logging
-import csv
-import io
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +15,10 @@ orders_bp = Blueprint('orders_bp', __name__, url_prefix='/')
 def dynamic_import(broker, module_name, function_names):
     module_functions = {}
     try:
-        # Import the module based on the broker name
-        module = import_module(f'broker.{broker}.{module_name}')
+        # Modules are imported once per broker by the broker registry
+        module = get_broker_module(broker, BROKER_MODULE_KINDS[module_name])
+        if module is None:
+            raise ImportError(f"Module broker.{broker}.{module_name} is not available")
         for name in function_names:
             module_functions[name] = getattr(module, name)
         return module_functions
@@ -26,18 +27,13 @@ def dynamic_import(broker, module_name, function_names):
 
         return None
 def generate_orderbook_csv(order_data):
-    """Generate CSV file from orderbook data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers matching the terminal display
+    """Stream CSV chunks from orderbook data"""
+    # Headers matching the terminal display
     headers = ['Trading Symbol', 'Exchange', 'Transaction Type', 'Quantity', 'Price', 
               'Trigger Price', 'Order Type', 'Product Type', 'Order ID', 'Status', 'Time']
-    writer.writerow(headers)
-    
-    # Write data in the same order as the headers
-    for order in order_data:
-        row = [
+    # Rows are produced as the CSV is streamed
+    rows = (
+        [
             order.get('symbol', ''),
             order.get('exchange', ''),
             order.get('action', ''),
@@ -50,23 +46,17 @@ def generate_orderbook_csv(order_data):
             order.get('order_status', ''),
             order.get('timestamp', '')
         ]
-        writer.writerow(row)
-    
-    return output.getvalue()
+        for order in order_data
+    )
+    return iter_csv(headers, rows)
 
 def generate_tradebook_csv(trade_data):
-    """Generate CSV file from tradebook data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers
+    """Stream CSV chunks from tradebook data"""
     headers = ['Trading Symbol', 'Exchange', 'Product Type', 'Transaction Type', 'Fill Size', 
               'Fill Price', 'Trade Value', 'Order ID', 'Fill Time']
-    writer.writerow(headers)
-    
-    # Write data
-    for trade in trade_data:
-        row = [
+    # Rows are produced as the CSV is streamed
+    rows = (
+        [
             trade.get('symbol', ''),
             trade.get('exchange', ''),
             trade.get('product', ''),
@@ -77,22 +67,17 @@ def generate_tradebook_csv(trade_data):
             trade.get('orderid', ''),
             trade.get('timestamp', '')
         ]
-        writer.writerow(row)
-    
-    return output.getvalue()
+        for trade in trade_data
+    )
+    return iter_csv(headers, rows)
 
 def generate_positions_csv(positions_data):
-    """Generate CSV file from positions data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers - updated to match terminal output exactly
+    """Stream CSV chunks from positions data"""
+    # Headers match the terminal output exactly
     headers = ['Symbol', 'Exchange', 'Product Type', 'Net Qty', 'Avg Price', 'LTP', 'P&L']
-    writer.writerow(headers)
-    
-    # Write data
-    for position in positions_data:
-        row = [
+    # Rows are produced as the CSV is streamed
+    rows = (
+        [
             position.get('symbol', ''),
             position.get('exchange', ''),
             position.get('product', ''),
@@ -101,9 +86,9 @@ def generate_positions_csv(positions_data):
             position.get('ltp', ''),
             position.get('pnl', '')
         ]
-        writer.writerow(row)
-    
-    return output.getvalue()
+        for position in positions_data
+    )
+    return iter_csv(headers, rows)
 
 @orders_bp.route('/orderbook')
 @check_session_validity
@@ -308,12 +293,7 @@ def export_orderbook():
         order_data = mapping_funcs['map_order_data'](order_data=order_data)
         order_data = mapping_funcs['transform_order_data'](order_data)
 
-        csv_data = generate_orderbook_csv(order_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=orderbook.csv'}
-        )
+        return csv_response(generate_orderbook_csv(order_data), 'orderbook.csv')
     except Exception as e:
         logger.error(f"Error exporting orderbook: {str(e)}")
         return "Error exporting orderbook", 500
@@ -349,12 +329,7 @@ def export_tradebook():
         tradebook_data = mapping_funcs['map_trade_data'](tradebook_data)
         tradebook_data = mapping_funcs['transform_tradebook_data'](tradebook_data)
 
-        csv_data = generate_tradebook_csv(tradebook_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=tradebook.csv'}
-        )
+        return csv_response(generate_tradebook_csv(tradebook_data), 'tradebook.csv')
     except Exception as e:
         logger.error(f"Error exporting tradebook: {str(e)}")
         return "Error exporting tradebook", 500
@@ -392,12 +367,7 @@ def export_positions():
         positions_data = mapping_funcs['map_position_data'](positions_data)
         positions_data = mapping_funcs['transform_positions_data'](positions_data)
 
-        csv_data = generate_positions_csv(positions_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=positions.csv'}
-        )
+        return csv_response(generate_positions_csv(positions_data), 'positions.csv')
     except Exception as e:
         logger.error(f"Error exporting positions: {str(e)}")
         return "Error exporting positions", 500
@@ -0,0 +1,72 @@
+from flask import Blueprint, jsonify, render_template, request, current_app, send_from_directory, abort
+from utils.session import check_session_validity
+from utils.profiler import profiler, list_profiles, PROFILE_DIR, PROFILED_PATH_PREFIX, PROFILER_MAX_REQUESTS, PROFILER_DEFAULT_INTERVAL_MS
+from limiter import limiter
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+profiler_bp = Blueprint('profiler_bp', __name__, url_prefix='/profiler')
+
+def get_api_endpoints():
+    """Paths of the API endpoints that can be profiled"""
+    paths = {rule.rule.rstrip('/') for rule in current_app.url_map.iter_rules()
+             if rule.rule.startswith(PROFILED_PATH_PREFIX) and '<' not in rule.rule}
+    return sorted(path for path in paths if path + '/' != PROFILED_PATH_PREFIX)
+
+@profiler_bp.route('/', methods=['GET'])
+@check_session_validity
+def profiler_dashboard():
+    """Arm the profiler and download the profiles it wrote"""
+    return render_template('profiler/dashboard.html',
+                         endpoints=get_api_endpoints(),
+                         status=profiler.status(),
+                         profiles=list_profiles(),
+                         max_requests=PROFILER_MAX_REQUESTS,
+                         default_interval=PROFILER_DEFAULT_INTERVAL_MS)
+
+@profiler_bp.route('/api/status', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_status():
+    """Current or last profile and the stored profiles"""
+    return jsonify({
+        'status': profiler.status(),
+        'running': profiler.session is not None,
+        'profiles': list_profiles()
+    })
+
+@profiler_bp.route('/api/start', methods=['POST'])
+@check_session_validity
+@limiter.limit("10/minute")
+def start_profile():
+    """Profile the next N requests to one API endpoint"""
+    data = request.get_json(silent=True) or {}
+    try:
+        session = profiler.start(
+            data.get('endpoint', ''),
+            int(data.get('requests', 10)),
+            float(data['interval_ms']) if data.get('interval_ms') else None
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify({'status': 'success', 'profile': session.status()})
+
+@profiler_bp.route('/api/stop', methods=['POST'])
+@check_session_validity
+def stop_profile():
+    """Finish the running profile with the samples taken so far"""
+    session = profiler.stop()
+    if session is None:
+        return jsonify({'status': 'error', 'message': 'No profile is running'}), 400
+    return jsonify({'status': 'success', 'profile': session.status()})
+
+@profiler_bp.route('/download/<name>', methods=['GET'])
+@check_session_validity
+def download_profile(name):
+    """Download a profile in collapsed stack format"""
+    if not re.fullmatch(r'[\w.-]+\.folded', name):
+        abort(404)
+    return send_from_directory(os.path.abspath(PROFILE_DIR), name, as_attachment=True, mimetype='text/plain')
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for, abort
 from database.strategy_db import (
     Strategy, StrategySymbolMapping, db_session,
-    create_strategy, add_symbol_mapping, get_strategy_by_webhook_id,
+    create_strategy, add_symbol_mapping, get_webhook_route,
     get_symbol_mappings, get_all_strategies, delete_strategy,
     update_strategy_times, delete_symbol_mapping, bulk_add_symbol_mappings,
     toggle_strategy, get_strategy, get_user_strategies
@@ -9,20 +9,16 @@ from database.strategy_db import (
 from database.symbol import enhanced_search_symbols
 from database.auth_db import get_api_key_for_tradingview
 from utils.session import check_session_validity, is_session_valid
+from services.order_queue_service import queue_order as queue_webhook_order
 import json
-from datetime import datetime, time
+from datetime import datetime
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 import logging
-import requests
-import os
 import uuid
-import time as time_module
-import queue
-import threading
-from collections import deque
-from time import time
 import re
+import os
+import hashlib
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +35,6 @@ scheduler = BackgroundScheduler(
 )
 scheduler.start()
 
-# Get base URL from environment or default to localhost
-BASE_URL = os.getenv('HOST_SERVER', 'http://127.0.0.1:5000')
-
 # Valid exchanges
 VALID_EXCHANGES = ['NSE', 'BSE', 'NFO', 'CDS', 'BFO', 'BCD', 'MCX', 'NCDEX']
 
@@ -61,94 +54,23 @@ EXCHANGE_PRODUCTS = {
 DEFAULT_EXCHANGE = 'NSE'
 DEFAULT_PRODUCT = 'MIS'
 
-# Separate queues for different order types
-regular_order_queue = queue.Queue()  # For placeorder (up to 10/sec)
-smart_order_queue = queue.Queue()    # For placesmartorder (1/sec)
-
-# Order processor state
-order_processor_running = False
-order_processor_lock = threading.Lock()
-
-# Rate limiting state for regular orders
-last_regular_orders = deque(maxlen=10)  # Track last 10 regular order timestamps
-
-def process_orders():
-    """Background task to process orders from both queues with rate limiting"""
-    global order_processor_running
-    
-    while True:
-        try:
-            # Process smart orders first (1 per second)
-            try:
-                smart_order = smart_order_queue.get_nowait()
-                if smart_order is None:  # Poison pill
-                    break
-                
-                try:
-                    response = requests.post(f'{BASE_URL}/api/v1/placesmartorder', json=smart_order['payload'])
-                    if response.ok:
-                        logger.info(f'Smart order placed for {smart_order["payload"]["symbol"]} in strategy {smart_order["payload"]["strategy"]}')
-                    else:
-                        logger.error(f'Error placing smart order for {smart_order["payload"]["symbol"]}: {response.text}')
-                except Exception as e:
-                    logger.error(f'Error placing smart order: {str(e)}')
-                
-                # Always wait 1 second after smart order
-                time_module.sleep(1)
-                continue  # Start next iteration
-                
-            except queue.Empty:
-                pass  # No smart orders, continue to regular orders
-            
-            # Process regular orders (up to 10 per second)
-            now = time()
-            
-            # Clean up old timestamps
-            while last_regular_orders and now - last_regular_orders[0] > 1:
-                last_regular_orders.popleft()
-            
-            # Process regular orders if under rate limit
-            if len(last_regular_orders) < 10:
-                try:
-                    regular_order = regular_order_queue.get_nowait()
-                    if regular_order is None:  # Poison pill
-                        break
-                    
-                    try:
-                        response = requests.post(f'{BASE_URL}/api/v1/placeorder', json=regular_order['payload'])
-                        if response.ok:
-                            logger.info(f'Regular order placed for {regular_order["payload"]["symbol"]} in strategy {regular_order["payload"]["strategy"]}')
-                            last_regular_orders.append(now)
-                        else:
-                            logger.error(f'Error placing regular order for {regular_order["payload"]["symbol"]}: {response.text}')
-                    except Exception as e:
-                        logger.error(f'Error placing regular order: {str(e)}')
-                    
-                except queue.Empty:
-                    pass  # No regular orders
-            
-            # Small sleep to prevent CPU spinning
-            time_module.sleep(0.1)
-            
-        except Exception as e:
-            logger.error(f'Error in order processor: {str(e)}')
-            time_module.sleep(1)  # Sleep on error to prevent rapid retries
-
-def ensure_order_processor():
-    """Ensure the order processor is running"""
-    global order_processor_running
-    with order_processor_lock:
-        if not order_processor_running:
-            threading.Thread(target=process_orders, daemon=True).start()
-            order_processor_running = True
+# Identical alerts to a webhook within this many seconds are queued once (0 turns it off)
+STRATEGY_ALERT_DEDUP_SECONDS = int(os.getenv('STRATEGY_ALERT_DEDUP_SECONDS', '30'))
 
-def queue_order(endpoint, payload):
+def queue_order(endpoint, payload, idempotency_key=None):
     """Add order to appropriate queue"""
-    ensure_order_processor()
-    if endpoint == 'placesmartorder':
-        smart_order_queue.put({'payload': payload})
-    else:
-        regular_order_queue.put({'payload': payload})
+    return queue_webhook_order('strategy', endpoint, payload, idempotency_key)
+
+def alert_key(webhook_id, data):
+    """
+    Idempotency key of a TradingView alert: alerts carry no id of their own, so a
+    resent alert is recognised by its webhook, its body and the window it arrived in
+    """
+    if STRATEGY_ALERT_DEDUP_SECONDS <= 0:
+        return None
+    window = int(datetime.now().timestamp() // STRATEGY_ALERT_DEDUP_SECONDS)
+    body = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return f'strategy:{webhook_id}:{window}:{body}'
 
 def validate_strategy_times(start_time, end_time, squareoff_time):
     """Validate strategy time settings"""
@@ -241,6 +163,7 @@ def squareoff_positions(strategy_id):
             
         # Get all symbol mappings
         mappings = get_symbol_mappings(strategy_id)
+        squareoff_date = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d')
         
         for mapping in mappings:
             # Use placesmartorder with quantity=0 and position_size=0 for squareoff
@@ -259,8 +182,9 @@ def squareoff_positions(strategy_id):
                 'disclosed_quantity': '0'
             }
             
-            # Queue the order instead of executing directly
-            queue_order('placesmartorder', payload)
+            # Queue the order instead of executing directly; once per symbol and day
+            queue_order('placesmartorder', payload,
+                        f'strategy-squareoff:{strategy_id}:{squareoff_date}:{mapping.exchange}:{payload["symbol"]}')
             
     except Exception as e:
         logger.error(f'Error in squareoff_positions for strategy {strategy_id}: {str(e)}')
@@ -584,9 +508,11 @@ def search_symbols():
 def webhook(webhook_id):
     """Handle webhook from trading platform"""
     try:
-        strategy = get_strategy_by_webhook_id(webhook_id)
-        if not strategy:
+        # Cached strategy and mappings; no database access on the alert path
+        route = get_webhook_route(webhook_id)
+        if not route:
             return jsonify({'error': 'Invalid webhook ID'}), 404
+        strategy = route.strategy
         
         if not strategy.is_active:
             return jsonify({'error': 'Strategy is inactive'}), 400
@@ -670,7 +596,7 @@ def webhook(webhook_id):
             use_smart_order = position_size == 0
             
         # Get symbol mapping
-        mapping = next((m for m in get_symbol_mappings(strategy.id) if m.symbol == data['symbol']), None)
+        mapping = route.mappings.get(data['symbol'])
         if not mapping:
             return jsonify({'error': f'No mapping found for symbol {data["symbol"]}'}), 400
             
@@ -724,7 +650,8 @@ def webhook(webhook_id):
                 endpoint = 'placeorder'
             
         # Queue the order
-        queue_order(endpoint, payload)
+        if not queue_order(endpoint, payload, alert_key(webhook_id, data)):
+            return jsonify({'message': f'Duplicate alert ignored for {data["symbol"]}'}), 200
         return jsonify({'message': f'Order queued successfully for {data["symbol"]}'}), 200
             
     except Exception as e:
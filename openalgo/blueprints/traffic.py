@@ -1,13 +1,11 @@
-from flask import Blueprint, jsonify, render_template, request, session, Response
-from database.traffic_db import TrafficLog, logs_session
+from flask import Blueprint, jsonify, render_template, request, session
+from database.traffic_db import TrafficLog, TrafficRollup, logs_session, traffic_log_writer
 from utils.session import check_session_validity
+from utils.csv_export import iter_csv, csv_response, stream_query
 from limiter import limiter
-from sqlalchemy import func
 import logging
 from datetime import datetime
 import pytz
-import csv
-import io
 
 logger = logging.getLogger(__name__)
 
@@ -29,16 +27,10 @@ def format_ist_time(timestamp):
     return ist_time.strftime('%d-%m-%Y %I:%M:%S %p')
 
 def generate_csv(logs):
-    """Generate CSV file from traffic logs"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Timestamp', 'Client IP', 'Method', 'Path', 'Status Code', 'Duration (ms)', 'Host', 'Error'])
-    
-    # Write data
-    for log in logs:
-        writer.writerow([
+    """Stream CSV chunks from traffic logs"""
+    headers = ['Timestamp', 'Client IP', 'Method', 'Path', 'Status Code', 'Duration (ms)', 'Host', 'Error']
+    rows = (
+        [
             format_ist_time(log.timestamp),
             log.client_ip,
             log.method,
@@ -47,9 +39,10 @@ def generate_csv(logs):
             round(log.duration_ms, 2),
             log.host,
             log.error
-        ])
-    
-    return output.getvalue()
+        ]
+        for log in logs
+    )
+    return iter_csv(headers, rows)
 
 @traffic_bp.route('/', methods=['GET'])
 @check_session_validity
@@ -101,21 +94,11 @@ def get_logs():
 def get_stats():
     """API endpoint to get traffic statistics"""
     try:
-        # Get overall stats
-        all_logs = TrafficLog.query
-        overall_stats = {
-            'total_requests': all_logs.count(),
-            'error_requests': all_logs.filter(TrafficLog.status_code >= 400).count(),
-            'avg_duration': round(float(all_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
-        }
-        
-        # Get API-specific stats
-        api_logs = TrafficLog.query.filter(TrafficLog.path.like('/api/v1/%'))
-        api_stats = {
-            'total_requests': api_logs.count(),
-            'error_requests': api_logs.filter(TrafficLog.status_code >= 400).count(),
-            'avg_duration': round(float(api_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
-        }
+        # Answered from the daily rollups, one row per path
+        path_totals = TrafficRollup.get_path_totals()
+        overall_stats = TrafficRollup.summarize(path_totals)
+        api_stats = TrafficRollup.summarize(path_totals, '/api/v1/')
+        api_stats.update(TrafficRollup.get_duration_percentiles('/api/v1/'))
         
         # Get endpoint usage stats
         endpoint_stats = {}
@@ -125,18 +108,18 @@ def get_stats():
             'tradebook', 'positionbook', 'holdings', 'basketorder', 'splitorder',
             'orderstatus', 'openposition'
         ]:
-            path = f'/api/v1/{endpoint}'
-            endpoint_logs = TrafficLog.query.filter(TrafficLog.path.like(f'{path}%'))
+            totals = TrafficRollup.summarize(path_totals, f'/api/v1/{endpoint}')
             endpoint_stats[endpoint] = {
-                'total': endpoint_logs.count(),
-                'errors': endpoint_logs.filter(TrafficLog.status_code >= 400).count(),
-                'avg_duration': round(float(endpoint_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
+                'total': totals['total_requests'],
+                'errors': totals['error_requests'],
+                'avg_duration': totals['avg_duration']
             }
         
         return jsonify({
             'overall': overall_stats,
             'api': api_stats,
-            'endpoints': endpoint_stats
+            'endpoints': endpoint_stats,
+            'writer': traffic_log_writer.stats()
         })
     except Exception as e:
         logger.error(f"Error fetching traffic stats: {e}")
@@ -148,20 +131,9 @@ def get_stats():
 def export_logs():
     """Export traffic logs to CSV"""
     try:
-        # Get all logs for the current day
-        logs = TrafficLog.get_recent_logs(limit=None)  # None to get all logs
-        
-        # Generate CSV
-        csv_data = generate_csv(logs)
-        
-        # Create the response
-        response = Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=traffic_logs.csv'}
-        )
-        
-        return response
+        # Every log, newest first, fetched in batches as the CSV is streamed
+        logs = stream_query(TrafficLog.query.order_by(TrafficLog.timestamp.desc()))
+        return csv_response(generate_csv(logs), 'traffic_logs.csv')
         
     except Exception as e:
         logger.error(f"Error exporting traffic logs: {e}")
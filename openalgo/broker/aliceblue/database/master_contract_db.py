@@ -17,6 +17,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 
 
@@ -540,25 +541,26 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_aliceblue_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_aliceblue_nse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_bse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_nfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_cds_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_mcx_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_bfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_bcd_csv(output_path) 
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_aliceblue_indices_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         delete_aliceblue_temp_data(output_path)
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
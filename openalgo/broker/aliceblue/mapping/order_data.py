@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol , get_oa_symbol
+from database.token_db import get_symbol, get_oa_symbols
 
 def map_order_data(order_data):
     """
@@ -24,6 +24,8 @@ def map_order_data(order_data):
     # print(order_data)
 
     if order_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((order['Trsym'], order['Exchange']) for order in order_data)
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             exchange = order['Exchange']
@@ -32,7 +34,7 @@ def map_order_data(order_data):
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                order['Trsym'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                order['Trsym'] = oa_symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
                 
@@ -159,6 +161,8 @@ def map_trade_data(trade_data):
     # print(trade_data)
 
     if trade_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((trade['Tsym'], trade['Exchange']) for trade in trade_data)
         for trade in trade_data:
             # Extract the instrument_token and exchange for the current trade
             exchange = trade['Exchange']
@@ -166,7 +170,7 @@ def map_trade_data(trade_data):
             
             # Check if a symbol was found; if so, update the trading_symbol in the current trade
             if symbol:
-                trade['Tsym'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                trade['Tsym'] = oa_symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
                 
@@ -223,6 +227,8 @@ def map_position_data(position_data):
     # print(order_data)
 
     if position_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((position['Tsym'], position['Exchange']) for position in position_data)
         for position in position_data:
             # Extract the instrument_token and exchange for the current order
             exchange = position['Exchange']
@@ -231,7 +237,7 @@ def map_position_data(position_data):
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                position['Tsym'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                position['Tsym'] = oa_symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
                 
@@ -11,6 +11,8 @@ from sqlalchemy import create_engine, Column, Integer, String, Float , Sequence,
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_ingest import READ_CHUNK_SIZE, save_chunks, iter_json_array_chunks, transform_chunks
 
 DATABASE_URL = os.getenv('DATABASE_URL')  # Replace with your database path
 
@@ -74,13 +76,12 @@ def download_json_angel_data(url, output_path):
     Downloads a JSON file from the specified URL and saves it to the specified path.
     """
     print("Downloading JSON data")
-    response = requests.get(url, timeout=10)  # timeout after 10 seconds
-    if response.status_code == 200:  # Successful download
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        print("Download complete")
-    else:
-        print(f"Failed to download data. Status code: {response.status_code}")
+    with requests.get(url, timeout=10, stream=True) as response:  # timeout after 10 seconds
+        if response.status_code == 200:  # Successful download
+            save_chunks(response.iter_content(chunk_size=READ_CHUNK_SIZE), output_path)
+            print("Download complete")
+        else:
+            print(f"Failed to download data. Status code: {response.status_code}")
 
 
 def reformat_symbol(row):
@@ -113,16 +114,19 @@ def convert_date(date_str):
 
 def process_angel_json(path):
     """
-    Processes the Angel JSON file to fit the existing database schema.
+    Processes the Angel JSON file in chunks to fit the existing database schema.
     Args:
     path (str): The file path of the downloaded JSON data.
 
     Returns:
-    DataFrame: The processed DataFrame ready to be inserted into the database.
+    Iterator[DataFrame]: Processed chunks ready to be staged into the database.
+    """
+    return transform_chunks(iter_json_array_chunks(path), process_angel_chunk)
+
+def process_angel_chunk(df):
+    """
+    Maps one chunk of Angel scrip master records to the database schema.
     """
-    # Read JSON data into a DataFrame
-    df = pd.read_json(path)
-    
     # Rename the columns based on the database schema
     # Assuming that the JSON structure matches the sample response provided
     df = df.rename(columns={
@@ -153,8 +157,9 @@ def process_angel_json(path):
     df['symbol'] = df['symbol'].str.replace('-EQ|-BE|-MF|-SG', '', regex=True)
     
     
-    # Assuming the 'expiry' field in the JSON is in the format '19MAR2024'
-    df['expiry'] = df['expiry'].apply(lambda x: convert_date(x) if pd.notnull(x) else x)
+    # Assuming the 'expiry' field in the JSON is in the format '19MAR2024'; other values are kept as is
+    expiry = pd.to_datetime(df['expiry'], format='%d%b%Y', errors='coerce')
+    df['expiry'] = expiry.dt.strftime('%d-%b-%y').where(expiry.notna(), df['expiry'])
     df['expiry'] = df['expiry'].str.upper()
 
     
@@ -216,15 +221,12 @@ def master_contract_download():
     output_path = 'tmp/angel.json'
     try:
         download_json_angel_data(url,output_path)
-        token_df = process_angel_json(output_path)
+
+        refresh = SymTokenRefresh()
+        refresh.stage_chunks(process_angel_json(output_path))
         delete_angel_temp_data(output_path)
-        #token_df['token'] = pd.to_numeric(token_df['token'], errors='coerce').fillna(-1).astype(int)
-        
-        #token_df = token_df.drop_duplicates(subset='symbol', keep='first')
 
-        delete_symtoken_table()  # Consider the implications of this action
-        copy_from_dataframe(token_df)
-                
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol, get_oa_symbol 
+from database.token_db import get_symbols, get_oa_symbols
 
 def map_order_data(order_data):
     """
@@ -24,13 +24,15 @@ def map_order_data(order_data):
 
 
     if order_data:
+        # Resolve all symbol tokens in one batch
+        symbols = get_symbols((order['symboltoken'], order['exchange']) for order in order_data)
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             symboltoken = order['symboltoken']
             exchange = order['exchange']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            # Look up the symbol resolved for this token
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -153,13 +155,15 @@ def map_trade_data(trade_data):
 
 
     if trade_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((order['tradingsymbol'], order['exchange']) for order in trade_data)
         for order in trade_data:
             # Extract the instrument_token and exchange for the current order
             symbol = order['tradingsymbol']
             exchange = order['exchange']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_oa_symbol(symbol, exchange)
+            # Look up the symbol resolved for this trading symbol
+            symbol_from_db = oa_symbols.get((symbol, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -254,10 +258,11 @@ def map_portfolio_data(portfolio_data):
 
     # Modify 'product' field for each holding if applicable
     if data.get('holdings'):
+        oa_symbols = get_oa_symbols((portfolio['tradingsymbol'], portfolio['exchange']) for portfolio in data['holdings'])
         for portfolio in data['holdings']:
             symbol = portfolio['tradingsymbol']
             exchange = portfolio['exchange']
-            symbol_from_db = get_oa_symbol(symbol, exchange)
+            symbol_from_db = oa_symbols.get((symbol, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol 
+from database.token_db import get_symbols
 from broker.dhan.mapping.transform_data import map_exchange
 
 def map_order_data(order_data):
@@ -25,14 +25,16 @@ def map_order_data(order_data):
 
 
     if order_data:
-        for order in order_data:
+        # Resolve all security ids in one batch
+        exchanges = [map_exchange(order['exchangeSegment']) for order in order_data]
+        symbols = get_symbols(zip((order['securityId'] for order in order_data), exchanges))
+        for order, exchange in zip(order_data, exchanges):
             # Extract the instrument_token and exchange for the current order
             instrument_token = order['securityId']
-            exchange = map_exchange(order['exchangeSegment'])
             order['exchangeSegment'] = exchange
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(instrument_token, exchange)
+            # Look up the symbol resolved for this security id
+            symbol_from_db = symbols.get((instrument_token, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -18,6 +18,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 
 
@@ -245,14 +246,15 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_dhan_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_dhan_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         delete_dhan_temp_data(output_path)
         #token_df['token'] = pd.to_numeric(token_df['token'], errors='coerce').fillna(-1).astype(int)
         
         #token_df = token_df.drop_duplicates(subset='symbol', keep='first')
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
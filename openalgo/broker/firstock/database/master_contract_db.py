@@ -1,11 +1,13 @@
 import os
 import requests
 import pandas as pd
-from datetime import datetime
+import numpy as np
 from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_format import format_expiry, format_strike, strike_values, fo_symbols, equity_symbols
 
 # Database setup
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -131,32 +133,18 @@ def process_firstock_nse_data(output_path):
     # Initialize symbol with brsymbol
     df['symbol'] = df['brsymbol']
 
-    # Apply transformation for OpenAlgo symbols
-    def get_openalgo_symbol(broker_symbol):
-        if '-EQ' in broker_symbol:
-            return broker_symbol.replace('-EQ', '')
-        elif '-BE' in broker_symbol:
-            return broker_symbol.replace('-BE', '')
-        else:
-            return broker_symbol
-
-    # Update the symbol column
-    df['symbol'] = df['brsymbol'].apply(get_openalgo_symbol)
+    # Strip the -EQ / -BE series suffix for OpenAlgo symbols
+    df['symbol'] = equity_symbols(df['brsymbol'])
 
     # Set instrument type based on is_index flag and trading symbol
-    def get_instrument_type(row):
-        if row['is_index']:
-            return 'INDEX'
-        elif '-BE' in row['brsymbol']:
-            return 'BE'
-        else:
-            return 'EQ'
-
-    # Set instrument type
-    df['instrumenttype'] = df.apply(get_instrument_type, axis=1)
+    df['instrumenttype'] = np.select(
+        [df['is_index'], df['brsymbol'].str.contains('-BE', regex=False, na=False)],
+        ['INDEX', 'BE'],
+        default='EQ'
+    )
 
     # Define Exchange: 'NSE' for EQ and BE, 'NSE_INDEX' for indexes
-    df['exchange'] = df.apply(lambda row: 'NSE_INDEX' if row['instrumenttype'] == 'INDEX' else 'NSE', axis=1)
+    df['exchange'] = np.where(df['instrumenttype'] == 'INDEX', 'NSE_INDEX', 'NSE')
     df['brexchange'] = df['exchange']
 
     # Set empty columns for expiry and strike
@@ -204,46 +192,21 @@ def process_firstock_nfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')
     df['strike'] = df['strike'].fillna(-1)
 
-    # Format expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Set instrument type based on option type
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
-
-    # Format symbol based on instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(row['strike']) if float(row['strike']).is_integer() else row['strike']
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Set exchange
     df['exchange'] = 'NFO'
     df['brexchange'] = df['exchange']
 
-    # Handle strike prices
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))
-            else:
-                return float(strike)
-        except (ValueError, TypeError):
-            return -1
-
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle numeric values
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)
@@ -339,46 +302,21 @@ def process_firstock_bfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')
     df['strike'] = df['strike'].fillna(-1)
 
-    # Format expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Set instrument type based on option type
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    # Format symbol based on instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(row['strike']) if float(row['strike']).is_integer() else row['strike']
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Set exchange
     df['exchange'] = 'BFO'
     df['brexchange'] = df['exchange']
 
-    # Handle strike prices
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))
-            else:
-                return float(strike)
-        except (ValueError, TypeError):
-            return -1
-
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle numeric values
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)
@@ -408,7 +346,7 @@ def master_contract_download():
         
         # Initialize database
         init_db()
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         
         # Download data
         downloaded_files = download_firstock_data(output_path)
@@ -417,23 +355,24 @@ def master_contract_download():
             # Process each exchange
             if 'NSE_symbols.csv' in downloaded_files:
                 token_df = process_firstock_nse_data(output_path)
-                copy_from_dataframe(token_df)
+                refresh.stage(token_df)
             
             if 'BSE_symbols.csv' in downloaded_files:
                 token_df = process_firstock_bse_data(output_path)
-                copy_from_dataframe(token_df)
+                refresh.stage(token_df)
             
             if 'NFO_symbols.csv' in downloaded_files:
                 token_df = process_firstock_nfo_data(output_path)
-                copy_from_dataframe(token_df)
+                refresh.stage(token_df)
             
             if 'BFO_symbols.csv' in downloaded_files:
                 token_df = process_firstock_bfo_data(output_path)
-                copy_from_dataframe(token_df)
+                refresh.stage(token_df)
             
             # Clean up temporary files
             delete_firstock_temp_data(output_path)
             
+            refresh.apply()
             print("Master contract download completed successfully")
             socketio.emit('download_progress', 'Download completed')
         else:
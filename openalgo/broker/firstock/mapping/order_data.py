@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol, get_oa_symbol 
+from database.token_db import get_symbol, get_oa_symbol, get_symbols
 
 def map_order_data(order_data):
     """
@@ -26,11 +26,14 @@ def map_order_data(order_data):
         print("Invalid order data format")
         return []
 
+    # Resolve all tokens in one batch
+    symbols = get_symbols((order.get('token'), order.get('exchange')) for order in orders)
+
     mapped_orders = []
     for order in orders:
         mapped_order = {}
         # Get OpenAlgo symbol from token
-        symbol_from_db = get_symbol(order.get('token'), order.get('exchange'))
+        symbol_from_db = symbols.get((order.get('token'), order.get('exchange')))
         if symbol_from_db:
             mapped_order['tsym'] = symbol_from_db
         else:
@@ -187,11 +190,14 @@ def map_trade_data(trade_data):
         print("Invalid trade data format")
         return []
 
+    # Resolve all tokens in one batch
+    symbols = get_symbols((trade.get('token'), trade.get('exchange')) for trade in trades)
+
     mapped_trades = []
     for trade in trades:
         mapped_trade = {}
         # Get OpenAlgo symbol from token
-        symbol_from_db = get_symbol(trade.get('token'), trade.get('exchange'))
+        symbol_from_db = symbols.get((trade.get('token'), trade.get('exchange')))
         if symbol_from_db:
             mapped_trade['tsym'] = symbol_from_db
         else:
@@ -496,13 +502,16 @@ def map_position_data(position_data):
         print(f"DEBUG: Invalid position data format. Type received: {type(position_data)}")
         return []
 
+    # Resolve all tokens in one batch
+    symbols = get_symbols((position.get('token'), position.get('exchange')) for position in positions)
+
     mapped_positions = []
     for position in positions:
         print("\nDEBUG: Processing position:")
         print(f"DEBUG: Raw position data: {json.dumps(position, indent=2)}")
         mapped_position = {}
         # Get OpenAlgo symbol from token
-        symbol_from_db = get_symbol(position.get('token'), position.get('exchange'))
+        symbol_from_db = symbols.get((position.get('token'), position.get('exchange')))
         print(f"DEBUG: Looking up symbol - Token: {position.get('token')}, Exchange: {position.get('exchange')}")
         if symbol_from_db:
             mapped_position['tsym'] = symbol_from_db
@@ -14,6 +14,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float , Sequence,
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 DATABASE_URL = os.getenv('DATABASE_URL')  # Replace with your database path
 
@@ -282,11 +283,12 @@ def master_contract_download():
         # Clean up temporary files
         delete_5paisa_temp_data(output_path)
         
-        # Clear existing data and insert new data
+        # Reconcile the stored master contract with the new data
         print("Updating database with new symbols...")
-        delete_symtoken_table()  # Clear existing table
-        copy_from_dataframe(token_df)
+        refresh = SymTokenRefresh()
+        refresh.stage(token_df)
         
+        refresh.apply()
         print("Master contract download completed successfully")
         # Notify UI through Socket.IO
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded Master Contract'})
@@ -1,7 +1,7 @@
 import json
 import re
 from datetime import datetime, timedelta
-from database.token_db import get_symbol, get_oa_symbol 
+from database.token_db import get_oa_symbol, get_symbols
 from broker.fivepaisa.mapping.transform_data import reverse_map_exchange
 
 def convert_date_string(date_str):
@@ -43,6 +43,10 @@ def map_order_data(order_data):
         order_data = order_data['body']['OrderBookDetail']
 
     if order_data:
+        # Resolve all scrip codes in one batch
+        symbols = get_symbols(
+            (order['ScripCode'], reverse_map_exchange(order['Exch'], order['ExchType'])) for order in order_data
+        )
         for order in order_data:
             # CRITICAL FIX: Ensure BrokerOrderId is always stored as a string to maintain consistent comparison
             if 'BrokerOrderId' in order:
@@ -56,7 +60,7 @@ def map_order_data(order_data):
             exchange = reverse_map_exchange(Exch, ExchType)
             
             # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -215,6 +219,10 @@ def map_trade_data(trade_data):
 
 
     if trade_data:
+        # Resolve all scrip codes in one batch
+        symbols = get_symbols(
+            (order['ScripCode'], reverse_map_exchange(order['Exch'], order['ExchType'])) for order in trade_data
+        )
         for order in trade_data:
             # Extract the instrument_token and exchange for the current order
             symboltoken = order['ScripCode']
@@ -225,7 +233,7 @@ def map_trade_data(trade_data):
             
             
             # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
@@ -303,6 +311,10 @@ def map_position_data(position_data):
     print(position_data)
 
     if position_data:
+        # Resolve all scrip codes in one batch
+        symbols = get_symbols(
+            (position['ScripCode'], reverse_map_exchange(position['Exch'], position['ExchType'])) for position in position_data
+        )
         for position in position_data:
             # Extract the instrument_token and exchange for the current order
             symboltoken = position['ScripCode']
@@ -313,7 +325,7 @@ def map_position_data(position_data):
             
             
             # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
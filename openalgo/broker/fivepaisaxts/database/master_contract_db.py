@@ -16,6 +16,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 from utils.httpx_client import get_httpx_client
 from broker.fivepaisaxts.baseurl import MARKET_DATA_URL
 
@@ -467,28 +468,29 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_compositedge_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_compositedge_nse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_compositedge_bse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_compositedge_nfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_compositedge_cds_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_compositedge_mcx_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_compositedge_bfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
 
         # Fetch and Process Index Data
         index_data = fetch_index_list()
         if index_data:
             index_df = process_index_data(index_data)
-            copy_from_dataframe(index_df)
+            refresh.stage(index_df)
         
         delete_compositedge_temp_data(output_path)
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
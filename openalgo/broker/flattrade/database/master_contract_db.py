@@ -1,10 +1,12 @@
 import os
 import requests
 import pandas as pd
-from datetime import datetime
+import numpy as np
 from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_format import format_expiry, format_strike, strike_values, fo_symbols, equity_symbols
 try:
     from extensions import socketio  # Import SocketIO
 except ImportError:
@@ -172,26 +174,12 @@ def process_flattrade_nse_data(output_path):
         df['symbol'] = df['brsymbol'].copy()  # Initialize 'symbol' with 'brsymbol'
         df['tick_size'] = 0.05  # Default tick size for NSE
 
-        # Apply transformation for OpenAlgo symbols
-        def get_openalgo_symbol(broker_symbol):
-            if pd.isna(broker_symbol) or not broker_symbol:  # Handle NaN and empty values
-                return broker_symbol  # Return as is, will be filtered out later
-            broker_symbol = str(broker_symbol)  # Convert to string to ensure string operations work
-            # Separate by hyphen and apply logic for EQ and BE
-            if '-EQ' in broker_symbol:
-                return broker_symbol.replace('-EQ', '')
-            elif '-BE' in broker_symbol:
-                return broker_symbol.replace('-BE', '')
-            else:
-                # For other symbols (including index), OpenAlgo symbol remains the same as broker symbol
-                return broker_symbol
-
-        # Update the 'symbol' column
-        df['symbol'] = df['brsymbol'].apply(get_openalgo_symbol)
+        # Strip the -EQ / -BE series suffix for OpenAlgo symbols
+        df['symbol'] = equity_symbols(df['brsymbol'])
 
         # Define Exchange: 'NSE' for EQ and BE, 'NSE_INDEX' for indexes
         df['instrumenttype'] = df['instrumenttype'].fillna('EQ')  # Fill NaN values with 'EQ'
-        df['exchange'] = df.apply(lambda row: 'NSE_INDEX' if row['instrumenttype'] == 'INDEX' else 'NSE', axis=1)
+        df['exchange'] = np.where(df['instrumenttype'] == 'INDEX', 'NSE_INDEX', 'NSE')
         df['brexchange'] = df['exchange']  # Broker exchange is the same as exchange
 
         # Set empty columns for 'expiry' and fill -1 for 'strike' where the data is missing
@@ -199,7 +187,7 @@ def process_flattrade_nse_data(output_path):
         df['strike'] = pd.to_numeric(df.get('strike', pd.Series([-1] * len(df))), errors='coerce').fillna(-1)
 
         # Ensure the instrument type is consistent
-        df['instrumenttype'] = df['instrumenttype'].apply(lambda x: 'EQ' if x in ['EQ', 'BE'] else x)
+        df['instrumenttype'] = df['instrumenttype'].where(~df['instrumenttype'].isin(['EQ', 'BE']), 'EQ')
 
         # Handle missing or invalid numeric values in 'lotsize'
         df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(1).astype(int)  # Default lotsize to 1
@@ -268,47 +256,21 @@ def process_flattrade_nfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(float(row['strike'])) if float(row['strike']).is_integer() else float(row['strike'])
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange
     df['exchange'] = 'NFO'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle missing or invalid numeric values in 'lotsize'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -353,47 +315,21 @@ def process_flattrade_cds_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(float(row['strike'])) if float(row['strike']).is_integer() else float(row['strike'])
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange
     df['exchange'] = 'CDS'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle missing or invalid numeric values in 'lotsize'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -438,47 +374,21 @@ def process_flattrade_mcx_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
-
-    # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(float(row['strike'])) if float(row['strike']).is_integer() else float(row['strike'])
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange
     df['exchange'] = 'MCX'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle missing or invalid numeric values in 'lotsize'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -587,47 +497,21 @@ def process_flattrade_bfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
-
-    # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(float(row['strike'])) if float(row['strike']).is_integer() else float(row['strike'])
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange
     df['exchange'] = 'BFO'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Handle missing or invalid numeric values in 'lotsize'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -674,24 +558,25 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         
         # Placeholders for processing different exchanges
         token_df = process_flattrade_nse_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_flattrade_bse_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_flattrade_nfo_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_flattrade_cds_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_flattrade_mcx_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_flattrade_bfo_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         
         delete_flattrade_temp_data(output_path)
         
+        refresh.apply()
         if socketio:
             return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
         else:
@@ -18,6 +18,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 
 # Define the headers as provided
@@ -461,24 +462,25 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_fyers_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_fyers_nse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_fyers_bse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_fyers_bfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_fyers_nfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_fyers_cds_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_fyers_mcx_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         delete_fyers_temp_data(output_path)
         #token_df['token'] = pd.to_numeric(token_df['token'], errors='coerce').fillna(-1).astype(int)
         
         #token_df = token_df.drop_duplicates(subset='symbol', keep='first')
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol , get_oa_symbol
+from database.token_db import get_symbol, get_oa_symbols
 
     # Mapping of (Exchange Code, Segment Code) to Exchange
 exchange_map = {
@@ -44,17 +44,15 @@ def map_order_data(order_data):
 
 
     if order_data:
-        for order in order_data:
-            # Extract the instrument_token and exchange for the current order
-            exchange_code = order['exchange']
-            segment_code = order['segment']
-            exchange = get_exchange(exchange_code, segment_code)
+        # Resolve all trading symbols in one batch
+        exchanges = [get_exchange(order['exchange'], order['segment']) for order in order_data]
+        oa_symbols = get_oa_symbols(zip((order['symbol'] for order in order_data), exchanges))
+        for order, exchange in zip(order_data, exchanges):
             symbol = order['symbol']
-       
-            
+
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                order['symbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                order['symbol'] = oa_symbols.get((symbol, exchange))
                 order['exchange'] = exchange
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
@@ -196,18 +194,15 @@ def map_trade_data(trade_data):
 
 
     if trade_data:
-        for trade in trade_data:
-            # Extract the instrument_token and exchange for the current order
-            exchange_code = trade['exchange']
-            segment_code = trade['segment']
-            exchange = get_exchange(exchange_code, segment_code)
+        # Resolve all trading symbols in one batch
+        exchanges = [get_exchange(trade['exchange'], trade['segment']) for trade in trade_data]
+        oa_symbols = get_oa_symbols(zip((trade['symbol'] for trade in trade_data), exchanges))
+        for trade, exchange in zip(trade_data, exchanges):
             symbol = trade['symbol']
-            
-       
-            
+
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                trade['symbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                trade['symbol'] = oa_symbols.get((symbol, exchange))
                 trade['exchange'] = exchange
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
@@ -276,17 +271,15 @@ def map_position_data(position_data):
     print(position_data)
 
     if position_data:
-        for position in position_data:
-            # Extract the instrument_token and exchange for the current order
-            exchange_code = position['exchange']
-            segment_code = position['segment']
-            exchange = get_exchange(exchange_code, segment_code)
+        # Resolve all trading symbols in one batch
+        exchanges = [get_exchange(position['exchange'], position['segment']) for position in position_data]
+        oa_symbols = get_oa_symbols(zip((position['symbol'] for position in position_data), exchanges))
+        for position, exchange in zip(position_data, exchanges):
             symbol = position['symbol']
-       
-            
+
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                position['symbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                position['symbol'] = oa_symbols.get((symbol, exchange))
                 position['exchange'] = exchange
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
@@ -349,21 +342,21 @@ def map_portfolio_data(portfolio_data):
     print(portfolio_data)
 
     if portfolio_data:
-        for portfolio in portfolio_data:
+        # Resolve all trading symbols in one batch
+        exchanges = [get_exchange(portfolio['exchange'], portfolio['segment']) for portfolio in portfolio_data]
+        oa_symbols = get_oa_symbols(zip((portfolio['symbol'] for portfolio in portfolio_data), exchanges))
+        for portfolio, exchange in zip(portfolio_data, exchanges):
             if portfolio['holdingType'] == 'HLD' or portfolio['holdingType'] == 'T1':
                 portfolio['holdingType'] = 'CNC'
 
             else:
                 print(f"Fyers Portfolio - Product Value for Delivery Not Found or Changed.")
             
-            exchange_code = portfolio['exchange']
-            segment_code = portfolio['segment']
-            exchange = get_exchange(exchange_code, segment_code)
             symbol = portfolio['symbol']
 
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                portfolio['symbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                portfolio['symbol'] = oa_symbols.get((symbol, exchange))
                 portfolio['exchange'] = exchange
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
@@ -11,6 +11,8 @@ from sqlalchemy import create_engine, Column, Integer, String, Float , Sequence,
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_format import format_expiry, format_strike, futures_symbols, options_symbols
 
 
 
@@ -646,46 +648,21 @@ def process_groww_data(path):
         df_mapped.loc[index_mask, 'instrumenttype'] = 'INDEX'
         
         # Format the symbol for F&O (NFO) instruments to match OpenAlgo format
-        def format_fo_symbol(row):
-            # Skip non-FNO instruments or those with missing expiry
-            if row['brexchange'] != 'NSE' or pd.isna(row['expiry']) or row['expiry'] == '':
-                return row['symbol']
-                
-            # For segment='FNO', format according to OpenAlgo standard
-            if 'segment' in df.columns and df.loc[row.name, 'segment'] == 'FNO':
-                try:
-                    # Format expiry date (assuming yyyy-mm-dd format in input)
-                    expiry_date = pd.to_datetime(row['expiry'])
-                    expiry_str = expiry_date.strftime('%d%b%y').upper()
-                    
-                    # Get underlying symbol
-                    symbol = row['underlying'] if 'underlying' in row and not pd.isna(row['underlying']) else row['symbol'].split('-')[0] if '-' in row['symbol'] else row['symbol']
-                    
-                    # For futures
-                    if row['instrumenttype'] == 'FUT':
-                        return f"{symbol}{expiry_str}FUT"
-                    
-                    # For options
-                    elif row['instrumenttype'] == 'PE' or 'CE':
-                        # Determine strike price
-                        strike = str(int(row['strike'])) if not pd.isna(row['strike']) else '0'
-                        
-                        # Determine option type (CE/PE)
-                        option_type = ''
-                        if 'instrument_type' in df.columns:
-                            instrument_type = df.loc[row.name, 'instrument_type']
-                            option_type = 'CE' if instrument_type == 'CE' else 'PE' if instrument_type == 'PE' else ''
-                        
-                        if option_type:
-                            return f"{symbol}{expiry_str}{strike}{option_type}"
-                except Exception as e:
-                    print(f"Error formatting F&O symbol: {e}")
-                    
-            # Return original symbol if formatting fails
-            return row['symbol']
-        
-        # Apply F&O symbol formatting
-        df_mapped['symbol'] = df_mapped.apply(format_fo_symbol, axis=1)
+        # Expiry as DDMMMYY (input is yyyy-mm-dd); rows without a usable expiry keep their symbol
+        expiry_str = format_expiry(df_mapped['expiry'])
+        fo_mask = (df_mapped['brexchange'] == 'NSE') & (df['segment'] == 'FNO') & expiry_str.notna()
+
+        # Underlying symbol, falling back to the trading symbol up to the first '-'
+        underlying = df_mapped['symbol'].str.split('-').str[0]
+        if 'underlying' in df_mapped.columns:
+            underlying = df_mapped['underlying'].fillna(underlying)
+
+        futures_mask = fo_mask & (df_mapped['instrumenttype'] == 'FUT')
+        options_mask = fo_mask & ~futures_mask & df['instrument_type'].isin(['CE', 'PE'])
+        strike_str = format_strike(df_mapped['strike'], truncate=True).fillna('0')
+
+        df_mapped.loc[futures_mask, 'symbol'] = futures_symbols(underlying, expiry_str)[futures_mask]
+        df_mapped.loc[options_mask, 'symbol'] = options_symbols(underlying, expiry_str, strike_str, df['instrument_type'])[options_mask]
         
         print(f"Processed {len(df_mapped)} instruments")
         return df_mapped
@@ -818,8 +795,8 @@ def master_contract_download():
         # Step 1: Download the instrument data
         download_groww_instrument_data(output_path)
         
-        # Step 2: Clear existing data
-        delete_symtoken_table()
+        # Step 2: Start staging the new master contract
+        refresh = SymTokenRefresh()
         
         # Step 3: Process the downloaded data
         token_df = process_groww_data(output_path)
@@ -858,7 +835,8 @@ def master_contract_download():
         
         # Step 6: Insert into database
         print(f"Inserting {len(token_df)} records into database")
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
+        refresh.apply()
         
         # Step 7: Cleanup
         delete_groww_temp_data(output_path)
@@ -1,6 +1,6 @@
 import json
 from turtle import position
-from database.token_db import get_symbol, get_oa_symbol 
+from database.token_db import get_oa_symbol, get_symbols
 
 def map_order_data(order_data):
     """
@@ -32,14 +32,19 @@ def map_order_data(order_data):
     order_data = order_data['result']
 
     if order_data:
+        # Resolve all instrument ids in one batch
+        symbols = get_symbols(
+            (order['ExchangeInstrumentID'], exchange_mapping.get(order.get("ExchangeSegment", ""), order.get("ExchangeSegment", "")))
+            for order in order_data
+        )
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             symboltoken = order['ExchangeInstrumentID']
             exch = order.get("ExchangeSegment", "")
             exchange = exchange_mapping.get(exch, exch)
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            # Look up the symbol resolved for this instrument id
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -188,6 +193,11 @@ def map_trade_data(trade_data):
     trade_data = trade_data['result']
 
     if trade_data:
+        # Resolve all instrument ids in one batch
+        symbols = get_symbols(
+            (trade['ExchangeInstrumentID'], exchange_mapping.get(trade.get("ExchangeSegment", ""), trade.get("ExchangeSegment", "")))
+            for trade in trade_data
+        )
 
         for trade in trade_data:
             # Extract the instrument_token and exchange for the current order
@@ -195,8 +205,8 @@ def map_trade_data(trade_data):
             exch = trade.get("ExchangeSegment", "")
             exchange = exchange_mapping.get(exch, exch)
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            # Look up the symbol resolved for this instrument id
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -289,6 +299,12 @@ def transform_positions_data(positions_data):
         print(f"Error: positions_data is not a list. Received: {type(positions_data)} - {positions_data}")
         return transformed_data
 
+    # Resolve all instrument ids in one batch
+    symbols = get_symbols(
+        (row.get('ExchangeInstrumentId'), exchange_mapping.get(row.get("ExchangeSegment", ""), row.get("ExchangeSegment", "")))
+        for row in positions_data if isinstance(row, dict)
+    )
+
     for position in positions_data:
 
         if not isinstance(position, dict):  # Ensure it's a dictionary
@@ -299,7 +315,7 @@ def transform_positions_data(positions_data):
         exchange = position.get("ExchangeSegment", "")
         mapped_exchange = exchange_mapping.get(exchange, exchange)
 
-        symbol_from_db = get_symbol(symboltoken, mapped_exchange)
+        symbol_from_db = symbols.get((symboltoken, mapped_exchange))
         
         if symbol_from_db:
             position['TradingSymbol'] = symbol_from_db
@@ -387,6 +403,9 @@ def map_portfolio_data(portfolio_data):
     total_inv_value = 0
     total_pnl = 0
     
+    # Resolve all NSE instrument ids in one batch
+    symbols = get_symbols((holding.get('ExchangeNSEInstrumentId'), 'NSE') for holding in holdings_data.values())
+
     # Process each holding
     for isin, holding in holdings_data.items():
         # Extract NSE instrument ID for symbol lookup
@@ -394,7 +413,7 @@ def map_portfolio_data(portfolio_data):
         exchange = 'NSE'  # Default to NSE for equity holdings
         
         # Get trading symbol from database using instrument ID and exchange
-        trading_symbol = get_symbol(nse_instrument_id, exchange) or isin
+        trading_symbol = symbols.get((nse_instrument_id, exchange)) or isin
         
         # Get quantity and buy price
         quantity = holding.get('HoldingQuantity', 0)
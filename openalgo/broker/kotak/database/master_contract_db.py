@@ -19,6 +19,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from database.user_db import find_user_by_username
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 
 
@@ -413,24 +414,25 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_kotak_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_kotak_nse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_kotak_nfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_kotak_bse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_kotak_cds_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_kotak_mcx_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_kotak_bfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         delete_kotak_temp_data(output_path)
         #token_df['token'] = pd.to_numeric(token_df['token'], errors='coerce').fillna(-1).astype(int)
         
         #token_df = token_df.drop_duplicates(subset='symbol', keep='first')
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol, get_oa_symbol
+from database.token_db import get_oa_symbol, get_symbols
 from broker.kotak.mapping.transform_data import map_exchange 
 
 def map_order_data(order_data):
@@ -33,15 +33,17 @@ def map_order_data(order_data):
 
 
     if order_data:
-        for order in order_data:
+        # Resolve all tokens in one batch
+        exchanges = [map_exchange(order['exSeg']) for order in order_data]
+        symbols = get_symbols(zip((order['tok'] for order in order_data), exchanges))
+        for order, exchange in zip(order_data, exchanges):
             # Extract the instrument_token and exchange for the current order
             symboltoken = order['tok']
-            exchange = map_exchange(order['exSeg'])
             order['exSeg'] = exchange
             
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            # Look up the symbol resolved for this token
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -165,15 +167,17 @@ def map_trade_data(trade_data):
 
 
     if trade_data:
-        for order in trade_data:
+        # Resolve all tokens in one batch
+        exchanges = [map_exchange(order['exSeg']) for order in trade_data]
+        symbols = get_symbols(zip((order['tok'] for order in trade_data), exchanges))
+        for order, exchange in zip(trade_data, exchanges):
             # Extract the instrument_token and exchange for the current order
             symbol = order['tok']
-            exchange = map_exchange(order['exSeg'])
             order['exSeg'] = exchange
             print(symbol)
             print(exchange)
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symbol, exchange)
+            # Look up the symbol resolved for this token
+            symbol_from_db = symbols.get((symbol, exchange))
             print(symbol_from_db)
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -280,12 +284,15 @@ def map_portfolio_data(portfolio_data):
 
     # Modify 'product' field for each holding if applicable
     
-    for portfolio in holdings:
+    # Resolve all instrument tokens in one batch
+    exchanges = [map_exchange(portfolio['exchangeSegment']) for portfolio in holdings]
+    symbols = get_symbols(zip((portfolio['instrumentToken'] for portfolio in holdings), exchanges))
+
+    for portfolio, exchange in zip(holdings, exchanges):
         token = portfolio['instrumentToken']
         
-        exchange = map_exchange(portfolio['exchangeSegment'])
         portfolio['exchangeSegment'] = exchange
-        symbol_from_db = get_symbol(token, exchange)
+        symbol_from_db = symbols.get((token, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
         if symbol_from_db:
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol
+from database.token_db import get_symbol, get_symbols
 from broker.paytm.mapping.transform_data import map_product_type
 
 def map_order_data(order_data):
@@ -25,19 +25,25 @@ def map_order_data(order_data):
     #print(order_data)
 
     if order_data:
+        # Work out each order's exchange first so all security ids resolve in one batch
+        exchanges = []
         for order in order_data:
-            # Extract the instrument_token and exchange for the current order
             exchange = order['exchange']
             if exchange == "NSE" and ("OPT" in order['instrument'] or "FUT" in order['instrument']):
                 exchange = "NFO"
             if exchange == "BSE" and ("OPT" in order['instrument'] or "FUT" in order['instrument']):
                 exchange = "BFO"
+            exchanges.append(exchange)
+        symbols = get_symbols(zip((order['security_id'] for order in order_data), exchanges))
+
+        for order, exchange in zip(order_data, exchanges):
+            # Extract the instrument_token for the current order
             symbol = order['security_id']
        
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                order['symbol'] = get_symbol(token=symbol,exchange=exchange)
+                order['symbol'] = symbols.get((symbol, exchange))
                 if (order['exchange'] == 'NSE' or order['exchange'] == 'BSE') and order['product'] == 'C':
                     order['product'] = 'CNC'
                                
@@ -211,21 +217,26 @@ def map_position_data(position_data):
     #print(order_data)
 
     if position_data:
+        # Work out each position's exchange first so all security ids resolve in one batch
+        exchanges = []
         for position in position_data:
-            # Extract the instrument_token and exchange for the current order
-            print(position)
             exchange = position['exchange']
-            symbol = position['security_id']
-            
             if exchange == "NSE" and ("OPT" in position['instrument'] or "FUT" in position['instrument']):
                 exchange = "NFO"
 
             if exchange == "BSE" and ("OPT" in position['instrument'] or "FUT" in position['instrument']):
                 exchange = "BFO"
+            exchanges.append(exchange)
+        symbols = get_symbols(zip((position['security_id'] for position in position_data), exchanges))
+
+        for position, exchange in zip(position_data, exchanges):
+            # Extract the instrument_token for the current order
+            print(position)
+            symbol = position['security_id']
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                position['security_id'] = get_symbol(token=symbol,exchange=exchange)
+                position['security_id'] = symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
         
@@ -18,6 +18,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
 
 
 
@@ -496,23 +497,24 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_csv_pocketful_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         token_df = process_pocketful_nse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_pocketful_bse_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_pocketful_nfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         
         token_df = process_pocketful_mcx_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_pocketful_bfo_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         
         token_df = process_pocketful_indices_csv(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         delete_pocketful_temp_data(output_path)
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol , get_oa_symbol
+from database.token_db import get_symbol , get_oa_symbol, get_oa_symbols
 
 def map_order_data(order_data):
     """
@@ -27,6 +27,12 @@ def map_order_data(order_data):
         print("No orders found in data.")
         return orders
     
+    # Resolve all trading symbols in one batch
+    oa_symbols = get_oa_symbols(
+        (order.get('trading_symbol', order.get('tradingsymbol')), order.get('exchange'))
+        for order in orders
+    )
+
     # Process each order
     for order in orders:
         # Safely extract exchange
@@ -51,7 +57,7 @@ def map_order_data(order_data):
         # Check if symbol was found; if so, update with OpenAlgo format
         if symbol:
             # Convert to OpenAlgo symbol format
-            oa_symbol = get_oa_symbol(symbol=symbol, exchange=exchange)
+            oa_symbol = oa_symbols.get((symbol, exchange))
             order['tradingsymbol'] = oa_symbol
             # Also update trading_symbol if it exists to maintain consistency
             if 'trading_symbol' in order:
@@ -265,6 +271,9 @@ def map_trade_data(trade_data):
     
     print(f"Processing {len(trades)} trades")
     
+    # Resolve all trading symbols in one batch
+    oa_symbols = get_oa_symbols((trade.get('trading_symbol', ''), trade.get('exchange', '')) for trade in trades)
+
     # Process each trade
     processed_trades = []
     for trade in trades:
@@ -282,7 +291,7 @@ def map_trade_data(trade_data):
             
             # Convert to OpenAlgo symbol format if exchange is available
             if exchange:
-                oa_symbol = get_oa_symbol(symbol=symbol, exchange=exchange)
+                oa_symbol = oa_symbols.get((symbol, exchange))
                 processed_trade['tradingsymbol'] = oa_symbol
         
         # Map transaction_type/order_side to a standard format
@@ -400,6 +409,12 @@ def map_position_data(position_data):
     
     print(f"Processing {len(positions)} positions")
     
+    # Resolve all trading symbols in one batch
+    oa_symbols = get_oa_symbols(
+        (position.get('trading_symbol', position.get('tradingsymbol', '')), position.get('exchange', ''))
+        for position in positions
+    )
+
     # Process each position
     processed_positions = []
     for position in positions:
@@ -417,7 +432,7 @@ def map_position_data(position_data):
             
             # Convert to OpenAlgo symbol format if exchange is available
             if exchange:
-                oa_symbol = get_oa_symbol(symbol=symbol, exchange=exchange)
+                oa_symbol = oa_symbols.get((symbol, exchange))
                 if oa_symbol:
                     processed_position['tradingsymbol'] = oa_symbol
                 else:
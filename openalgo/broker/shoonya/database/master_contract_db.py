@@ -3,11 +3,13 @@ import requests
 import zipfile
 import io
 import pandas as pd
-from datetime import datetime
+import numpy as np
 from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_format import format_expiry, format_strike, strike_values, fo_symbols, equity_symbols, fo_instrument_types
 
 
 
@@ -130,22 +132,11 @@ def process_shoonya_nse_data(output_path):
     # Add missing columns to ensure DataFrame matches the database structure
     df['symbol'] = df['brsymbol']  # Initialize 'symbol' with 'brsymbol'
 
-    # Apply transformation for OpenAlgo symbols
-    def get_openalgo_symbol(broker_symbol):
-        # Separate by hyphen and apply logic for EQ and BE
-        if '-EQ' in broker_symbol:
-            return broker_symbol.replace('-EQ', '')
-        elif '-BE' in broker_symbol:
-            return broker_symbol.replace('-BE', '')
-        else:
-            # For other symbols (including index), OpenAlgo symbol remains the same as broker symbol
-            return broker_symbol
-
-    # Update the 'symbol' column
-    df['symbol'] = df['brsymbol'].apply(get_openalgo_symbol)
+    # Strip the -EQ / -BE series suffix for OpenAlgo symbols
+    df['symbol'] = equity_symbols(df['brsymbol'])
 
     # Define Exchange: 'NSE' for EQ and BE, 'NSE_INDEX' for indexes
-    df['exchange'] = df.apply(lambda row: 'NSE_INDEX' if row['instrumenttype'] == 'INDEX' else 'NSE', axis=1)
+    df['exchange'] = np.where(df['instrumenttype'] == 'INDEX', 'NSE_INDEX', 'NSE')
     df['brexchange'] = df['exchange']  # Broker exchange is the same as exchange
 
     # Set empty columns for 'expiry' and fill -1 for 'strike' where the data is missing
@@ -153,7 +144,7 @@ def process_shoonya_nse_data(output_path):
     df['strike'] = -1  # Set default value -1 for strike price where missing
 
     # Ensure the instrument type is consistent
-    df['instrumenttype'] = df['instrumenttype'].apply(lambda x: 'EQ' if x in ['EQ', 'BE'] else x)
+    df['instrumenttype'] = df['instrumenttype'].where(~df['instrumenttype'].isin(['EQ', 'BE']), 'EQ')
 
     # Handle missing or invalid numeric values in 'lotsize' and 'tick_size'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -193,47 +184,21 @@ def process_shoonya_nfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
-
-    # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(row['strike']) if float(row['strike']).is_integer() else row['strike']
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
+    df['instrumenttype'] = df['optiontype'].where(df['optiontype'] != 'XX', 'FUT')
 
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange
     df['exchange'] = 'NFO'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
@@ -262,48 +227,24 @@ def process_shoonya_cds_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].where(df['optiontype'] != 'XX', 'FUT')
 
     # Update instrumenttype to 'CE' or 'PE' based on the option type
-    df['instrumenttype'] = df.apply(lambda row: row['optiontype'] if row['instrumenttype'] == 'OPTCUR' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].where(df['instrumenttype'] != 'OPTCUR', df['optiontype'])
 
     # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            return f"{row['name']}{row['expiry']}{row['strike']}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike'].astype(str))
 
     # Define Exchange
     df['exchange'] = 'CDS'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
@@ -330,48 +271,24 @@ def process_shoonya_mcx_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].where(df['optiontype'] != 'XX', 'FUT')
 
     # Update instrumenttype to 'CE' or 'PE' based on the option type
-    df['instrumenttype'] = df.apply(lambda row: row['optiontype'] if row['instrumenttype'] == 'OPTFUT' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].where(df['instrumenttype'] != 'OPTFUT', df['optiontype'])
 
     # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            return f"{row['name']}{row['expiry']}{row['strike']}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike'].astype(str))
 
     # Define Exchange
     df['exchange'] = 'MCX'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
@@ -448,63 +365,20 @@ def process_shoonya_bfo_data(output_path):
     df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
     df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
 
-    # Define a function to format the expiry date as DDMMMYY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d%b%y').upper()
-        except ValueError:
-            print(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
-
-    # Extract the 'name' from the 'TradingSymbol'
-    def extract_name(tradingsymbol):
-        import re
-        match = re.match(r'([A-Za-z]+)', tradingsymbol)
-        return match.group(1) if match else tradingsymbol
+    # Format the expiry date as DDMMMYY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y', '%d%b%y')
 
-    # Apply name extraction
-    df['name'] = df['brsymbol'].apply(extract_name)
+    # Extract the 'name' (leading letters) from the 'TradingSymbol'
+    df['name'] = df['brsymbol'].str.extract(r'^([A-Za-z]+)', expand=False).fillna(df['brsymbol'])
 
     # Extract the instrument type (CE, PE, FUT) from TradingSymbol
-    def extract_instrument_type(tradingsymbol):
-        if tradingsymbol.endswith('FUT'):
-            return 'FUT'
-        elif tradingsymbol.endswith('CE'):
-            return 'CE'
-        elif tradingsymbol.endswith('PE'):
-            return 'PE'
-        else:
-            return 'UNKNOWN'  # Handle cases where the suffix is not FUT, CE, or PE
+    df['instrumenttype'] = fo_instrument_types(df['brsymbol'])
 
-    # Apply instrument type extraction
-    df['instrumenttype'] = df['brsymbol'].apply(extract_instrument_type)
-
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    df['strike'] = df['strike'].apply(handle_strike_price)
-
-    # Format the symbol column based on the instrument type and correctly handle the strike price
-    def format_symbol(row):
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{row['expiry']}FUT"
-        else:
-            # Correctly format the strike price based on whether it's an integer or a float
-            formatted_strike = f"{int(row['strike'])}" if isinstance(row['strike'], int) else f"{row['strike']:.2f}".rstrip('0').rstrip('.')
-            return f"{row['name']}{row['expiry']}{formatted_strike}{row['instrumenttype']}"
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = strike_values(df['strike'])
 
-    # Apply the symbol format
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    # Format the symbol column based on the instrument type (integral strikes without decimals)
+    df['symbol'] = fo_symbols(df['name'], df['expiry'], df['instrumenttype'], format_strike(df['strike']))
 
     # Define Exchange and Broker Exchange
     df['exchange'] = 'BFO'
@@ -536,24 +410,25 @@ def master_contract_download():
     output_path = 'tmp'
     try:
         download_and_unzip_shoonya_data(output_path)
-        delete_symtoken_table()
+        refresh = SymTokenRefresh()
         
         # Placeholders for processing different exchanges
         token_df = process_shoonya_nse_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_shoonya_bse_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_shoonya_nfo_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_shoonya_cds_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_shoonya_mcx_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         token_df = process_shoonya_bfo_data(output_path)
-        copy_from_dataframe(token_df)
+        refresh.stage(token_df)
         
         delete_shoonya_temp_data(output_path)
         
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
     except Exception as e:
         print(str(e))
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol, get_oa_symbol 
+from database.token_db import get_symbols, get_oa_symbols
 
 def map_order_data(order_data):
     """
@@ -24,13 +24,15 @@ def map_order_data(order_data):
 
 
     if order_data:
+        # Resolve all symbol tokens in one batch
+        symbols = get_symbols((order['token'], order['exch']) for order in order_data)
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             symboltoken = order['token']
             exchange = order['exch']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(symboltoken, exchange)
+            # Look up the symbol resolved for this token
+            symbol_from_db = symbols.get((symboltoken, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -156,13 +158,15 @@ def map_trade_data(trade_data):
 
 
     if trade_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((order['tsym'], order['exch']) for order in trade_data)
         for order in trade_data:
             # Extract the instrument_token and exchange for the current order
             symbol = order['tsym']
             exchange = order['exch']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_oa_symbol(symbol, exchange)
+            # Look up the symbol resolved for this trading symbol
+            symbol_from_db = oa_symbols.get((symbol, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -222,13 +226,15 @@ def map_position_data(position_data):
 
 
     if position_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((order['tsym'], order['exch']) for order in position_data)
         for order in position_data:
             # Extract the instrument_token and exchange for the current order
             symbol = order['tsym']
             exchange = order['exch']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_oa_symbol(symbol, exchange)
+            # Look up the symbol resolved for this trading symbol
+            symbol_from_db = oa_symbols.get((symbol, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -280,6 +286,13 @@ def map_portfolio_data(portfolio_data):
         print("No data available or incorrect data format.")
         return []
 
+    # Resolve every holding symbol in one batch
+    oa_symbols = get_oa_symbols(
+        (exch_tsym.get('tsym', ''), exch_tsym.get('exch', ''))
+        for portfolio in portfolio_data if portfolio.get('stat') == 'Ok'
+        for exch_tsym in portfolio.get('exch_tsym', [])
+    )
+
     # Iterate over the portfolio_data list and process each entry
     for portfolio in portfolio_data:
         # Ensure 'stat' is 'Ok' before proceeding
@@ -292,8 +305,8 @@ def map_portfolio_data(portfolio_data):
             symbol = exch_tsym.get('tsym', '')
             exchange = exch_tsym.get('exch', '')
 
-            # Replace 'get_oa_symbol' function with your actual symbol fetching logic
-            symbol_from_db = get_oa_symbol(symbol, exchange)
+            # Look up the symbol resolved for this holding
+            symbol_from_db = oa_symbols.get((symbol, exchange))
             
             if symbol_from_db:
                 exch_tsym['tsym'] = symbol_from_db
@@ -5,6 +5,7 @@ from datetime import datetime
 from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from database.master_contract_refresh import SymTokenRefresh
 try:
     from extensions import socketio  # Import SocketIO
 except ImportError:
@@ -454,8 +455,8 @@ def master_contract_download():
     print("Starting Tradejini Master Contract Download")
     
     try:
-        # Delete existing data
-        delete_symtoken_table()
+        # Stage the new master contract alongside the existing one
+        refresh = SymTokenRefresh()
         
         # Get scrip groups
         scrip_groups = get_scrip_groups()
@@ -485,7 +486,7 @@ def master_contract_download():
                     
                     # Insert into database
                     if not df.empty:
-                        copy_from_dataframe(df)
+                        refresh.stage(df)
                         print(f"Processed {len(df)} symbols for {group_name}")
                     else:
                         print(f"No valid records found for {group_name}")
@@ -496,6 +497,7 @@ def master_contract_download():
                 print(f"Error processing group {group_name}: {group_error}")
                 continue
         
+        refresh.apply()
         if socketio:
             socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully downloaded all contracts'})
         return True
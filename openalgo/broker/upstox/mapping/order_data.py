@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol 
+from database.token_db import get_symbols
 
 def map_order_data(order_data):
     """
@@ -24,13 +24,15 @@ def map_order_data(order_data):
 
 
     if order_data:
+        # Resolve all instrument tokens in one batch
+        symbols = get_symbols((order['instrument_token'], order['exchange']) for order in order_data)
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             instrument_token = order['instrument_token']
             exchange = order['exchange']
             
-            # Use the get_symbol function to fetch the symbol from the database
-            symbol_from_db = get_symbol(instrument_token, exchange)
+            # Look up the symbol resolved for this instrument token
+            symbol_from_db = symbols.get((instrument_token, exchange))
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol_from_db:
@@ -4,6 +4,7 @@ import os
 import urllib.parse
 from database.auth_db import get_auth_token
 from database.token_db import get_br_symbol, get_oa_symbol
+from utils.spans import span, PAYLOAD_TRANSFORM, HTTP_SEND, HTTP_RECEIVE, RESPONSE_MAP
 from broker.zerodha.mapping.transform_data import transform_data , map_product_type, reverse_map_product_type, transform_modify_order_data
 
 
@@ -60,35 +61,40 @@ def place_order_api(data,auth):
     BROKER_API_KEY = os.getenv('BROKER_API_KEY')
     data['apikey'] = BROKER_API_KEY
     #token = get_token(data['symbol'], data['exchange'])
-    newdata = transform_data(data)  
-    headers = {
-        'X-Kite-Version': '3',
-        'Authorization': f'token {AUTH_TOKEN}',
-        'Content-Type': 'application/x-www-form-urlencoded' 
-    }
-
-    payload = {
-        'tradingsymbol': newdata['tradingsymbol'],
-        'exchange': newdata['exchange'],
-        'transaction_type': newdata['transaction_type'],
-        'order_type': newdata['order_type'],
-        'quantity': newdata['quantity'],
-        'product': newdata['product'],
-        'price': newdata['price'],
-        'trigger_price': newdata['trigger_price'],
-        'disclosed_quantity': newdata['disclosed_quantity'],
-        'validity': newdata['validity'],
-        'tag' : newdata['tag']
-    }
-
-    print(payload)
-
-    payload =  urllib.parse.urlencode(payload)
-
-    conn = http.client.HTTPSConnection("api.kite.trade")
-    conn.request("POST", "/orders/regular", payload, headers)
-    res = conn.getresponse()
-    response_data = json.loads(res.read().decode("utf-8"))
+    with span(PAYLOAD_TRANSFORM):
+        newdata = transform_data(data)  
+        headers = {
+            'X-Kite-Version': '3',
+            'Authorization': f'token {AUTH_TOKEN}',
+            'Content-Type': 'application/x-www-form-urlencoded' 
+        }
+
+        payload = {
+            'tradingsymbol': newdata['tradingsymbol'],
+            'exchange': newdata['exchange'],
+            'transaction_type': newdata['transaction_type'],
+            'order_type': newdata['order_type'],
+            'quantity': newdata['quantity'],
+            'product': newdata['product'],
+            'price': newdata['price'],
+            'trigger_price': newdata['trigger_price'],
+            'disclosed_quantity': newdata['disclosed_quantity'],
+            'validity': newdata['validity'],
+            'tag' : newdata['tag']
+        }
+
+        print(payload)
+
+        payload =  urllib.parse.urlencode(payload)
+
+    with span(HTTP_SEND):
+        conn = http.client.HTTPSConnection("api.kite.trade")
+        conn.request("POST", "/orders/regular", payload, headers)
+        res = conn.getresponse()
+    with span(HTTP_RECEIVE):
+        body = res.read()
+    with span(RESPONSE_MAP):
+        response_data = json.loads(body.decode("utf-8"))
 
 
     print(response_data)
@@ -10,7 +10,6 @@ import http.client
 import json
 import pandas as pd
 import gzip
-import io
 
 
 from sqlalchemy import create_engine, Column, Integer, String, Float , Sequence, Index
@@ -18,6 +17,9 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_refresh import SymTokenRefresh
+from database.master_contract_ingest import save_stream, iter_csv_chunks, transform_chunks
+from database.master_contract_format import format_strike, futures_symbols, options_symbols
 
 
 
@@ -81,8 +83,7 @@ def copy_from_dataframe(df):
 
 def download_csv_zerodha_data(output_path):
     """
-    Downloads the CSV file from Zerodha using Auth Credentials, saves it to the specified path and convert.
-    to pandas dataframe
+    Downloads the CSV file from Zerodha using Auth Credentials and saves it to the specified path.
     """
     login_username = os.getenv('LOGIN_USERNAME')
     AUTH_TOKEN = get_auth_token(login_username)
@@ -96,44 +97,30 @@ def download_csv_zerodha_data(output_path):
 
     res = conn.getresponse()
     if res.status == 200:
-        csv_data = res.read()  # Directly reading CSV data
-        csv_string = csv_data.decode('utf-8')  # Decode bytes to string
-        df = pd.read_csv(io.StringIO(csv_string))  # Convert string to pandas DataFrame
-        df.to_csv(output_path)
-
-        return df
+        # Stream the body straight to disk; it is parsed in chunks by process_zerodha_csv
+        save_stream(res, output_path)
     else:
         print(f"Failed to download. Status code: {res.status}")
 
 
-def reformat_symbol(row):
-    symbol = row['symbol']
-    instrument_type = row['instrumenttype']
-    
-    if instrument_type == 'FUT':
-        # For FUT, remove the spaces and append 'FUT' at the end
-        parts = symbol.split(' ')
-        if len(parts) == 5:  # Make sure the symbol has the correct format
-            symbol = parts[0] + parts[2] + parts[3] + parts[4] + parts[1]
-    elif instrument_type in ['CE', 'PE']:
-        # For CE/PE, rearrange the parts and remove spaces
-        parts = symbol.split(' ')
-        if len(parts) == 6:  # Make sure the symbol has the correct format
-            symbol = parts[0] + parts[3] + parts[4] + parts[5] + parts[1] + parts[2]
-    else:
-        symbol = symbol  # No change for other instrument types
-
-    return symbol
-
+# Columns of the Zerodha instrument dump used by process_zerodha_chunk
+ZERODHA_CSV_COLUMNS = ['instrument_token', 'exchange_token', 'tradingsymbol', 'name', 'expiry',
+                       'strike', 'tick_size', 'lot_size', 'instrument_type', 'segment', 'exchange']
 
 
 def process_zerodha_csv(path):
     """
-    Processes the Zerodha CSV file to fit the existing database schema and performs exchange name mapping.
+    Processes the Zerodha CSV file in chunks, yielding DataFrames that fit the existing database schema.
     """
     print("Processing Zerodha CSV Data")
-    df = pd.read_csv(path)
+    chunks = iter_csv_chunks(path, usecols=ZERODHA_CSV_COLUMNS, dtype={'expiry': str})
+    return transform_chunks(chunks, process_zerodha_chunk)
+
 
+def process_zerodha_chunk(df):
+    """
+    Maps one chunk of the Zerodha instrument dump to the database schema and performs exchange name mapping.
+    """
     # Map exchange names
     exchange_map = {
         "NSE": "NSE",
@@ -177,24 +164,20 @@ def process_zerodha_csv(path):
     })
 
     df['brsymbol'] = df['symbol']
-    df['symbol'] = df.apply(reformat_symbol, axis=1)
     df['brexchange'] = df['exchange']
 
     # Fill NaN values in the 'expiry' column with an empty string
     df['expiry'] = df['expiry'].fillna('')
     
     # Futures Symbol Update 
-    df.loc[(df['instrumenttype'] == 'FUT'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + 'FUT'
+    expiry = df['expiry'].str.replace('-', '', regex=False)
+    futures = df['instrumenttype'] == 'FUT'
+    df.loc[futures, 'symbol'] = futures_symbols(df['name'], expiry)[futures]
     
-    # Options Symbol Update 
-
-    def format_strike(strike):
-        # Convert the string to a float, then to an integer, and finally back to a string.
-        return str(int(float(strike)))
-
-
-    df.loc[(df['instrumenttype'] == 'CE'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + df['strike'].apply(format_strike) + df['instrumenttype']
-    df.loc[(df['instrumenttype'] == 'PE'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + df['strike'].apply(format_strike) + df['instrumenttype']
+    # Options Symbol Update (strike is truncated to an integer, e.g. 22500.0 -> 22500)
+    options = df['instrumenttype'].isin(['CE', 'PE'])
+    strikes = format_strike(df['strike'], truncate=True)
+    df.loc[options, 'symbol'] = options_symbols(df['name'], expiry, strikes, df['instrumenttype'])[options]
 
     df['symbol'] = df['symbol'].replace({
     'NIFTY 50': 'NIFTY',
@@ -229,15 +212,12 @@ def master_contract_download():
     output_path = 'tmp/zerodha.csv'
     try:
         download_csv_zerodha_data(output_path)
-        token_df = process_zerodha_csv(output_path)
+
+        refresh = SymTokenRefresh()
+        refresh.stage_chunks(process_zerodha_csv(output_path))
         delete_zerodha_temp_data(output_path)
-        #token_df['token'] = pd.to_numeric(token_df['token'], errors='coerce').fillna(-1).astype(int)
-        
-        #token_df = token_df.drop_duplicates(subset='symbol', keep='first')
 
-        delete_symtoken_table()  # Consider the implications of this action
-        copy_from_dataframe(token_df)
-                
+        refresh.apply()
         return socketio.emit('master_contract_download', {'status': 'success', 'message': 'Successfully Downloaded'})
 
     
@@ -1,5 +1,5 @@
 import json
-from database.token_db import get_symbol , get_oa_symbol
+from database.token_db import get_symbol, get_oa_symbols
 
 def map_order_data(order_data):
     """
@@ -24,6 +24,8 @@ def map_order_data(order_data):
     #print(order_data)
 
     if order_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((order['tradingsymbol'], order['exchange']) for order in order_data)
         for order in order_data:
             # Extract the instrument_token and exchange for the current order
             exchange = order['exchange']
@@ -32,7 +34,7 @@ def map_order_data(order_data):
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                order['tradingsymbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                order['tradingsymbol'] = oa_symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
                 
@@ -167,6 +169,8 @@ def map_position_data(position_data):
     #print(order_data)
 
     if position_data:
+        # Resolve all trading symbols in one batch
+        oa_symbols = get_oa_symbols((position['tradingsymbol'], position['exchange']) for position in position_data)
         for position in position_data:
             # Extract the instrument_token and exchange for the current order
             exchange = position['exchange']
@@ -175,7 +179,7 @@ def map_position_data(position_data):
             
             # Check if a symbol was found; if so, update the trading_symbol in the current order
             if symbol:
-                position['tradingsymbol'] = get_oa_symbol(symbol=symbol,exchange=exchange)
+                position['tradingsymbol'] = oa_symbols.get((symbol, exchange))
             else:
                 print(f"{symbol} and exchange {exchange} not found. Keeping original trading symbol.")
                 
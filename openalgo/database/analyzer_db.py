@@ -6,12 +6,15 @@ from sqlalchemy import create_engine, Column, Integer, DateTime, Text, String
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from concurrent.futures import ThreadPoolExecutor
+from database.log_sink import submit_log_row
+from database.log_index import extract_log_fields, ensure_log_index_schema
 from datetime import datetime
 import pytz
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+IST = pytz.timezone('Asia/Kolkata')
+
 engine = create_engine(
     DATABASE_URL,
     pool_size=50,
@@ -29,7 +32,13 @@ class AnalyzerLog(Base):
     api_type = Column(String(50), nullable=False)  # placeorder, cancelorder, etc.
     request_data = Column(Text, nullable=False)
     response_data = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=func.now())
+    # Copied from the request/response JSON at write time for filtering
+    symbol = Column(String(50), index=True)
+    strategy = Column(String(100), index=True)
+    action = Column(String(10), index=True)
+    orderid = Column(String(100), index=True)
+    status = Column(String(20), index=True)
+    created_at = Column(DateTime(timezone=True), default=func.now(), index=True)
 
     def to_dict(self):
         """Convert log entry to dictionary"""
@@ -52,31 +61,18 @@ def init_db():
     """Initialize the analyzer table"""
     print("Initializing Analyzer Table")
     Base.metadata.create_all(bind=engine)
-
-# Executor for asynchronous tasks
-executor = ThreadPoolExecutor(2)
+    ensure_log_index_schema(engine, AnalyzerLog.__table__)
 
 def async_log_analyzer(request_data, response_data, api_type='placeorder'):
-    """Asynchronously log analyzer request"""
+    """Queue an analyzer log row for the shared log sink, which commits it with others in one transaction"""
     try:
-        # Serialize JSON data for storage
-        request_json = json.dumps(request_data)
-        response_json = json.dumps(response_data)
-
-        # Get current time in IST
-        ist = pytz.timezone('Asia/Kolkata')
-        now_ist = datetime.now(ist)
-
-        analyzer_log = AnalyzerLog(
-            api_type=api_type,
-            request_data=request_json,
-            response_data=response_json,
-            created_at=now_ist
-        )
-        db_session.add(analyzer_log)
-        db_session.commit()
+        # Serialize now so later changes to the dicts by the caller are not logged
+        submit_log_row(engine, AnalyzerLog.__table__, {
+            'api_type': api_type,
+            'request_data': json.dumps(request_data),
+            'response_data': json.dumps(response_data),
+            'created_at': datetime.now(IST),
+            **extract_log_fields(request_data, response_data)
+        })
     except Exception as e:
         print(f"Error saving analyzer log: {e}")
-        db_session.rollback()
-    finally:
-        db_session.remove()
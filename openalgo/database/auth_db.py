@@ -2,6 +2,9 @@
 
 import os
 import base64
+import hmac
+import hashlib
+import threading
 from sqlalchemy import create_engine, UniqueConstraint
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
@@ -13,6 +16,8 @@ from argon2.exceptions import VerifyMismatchError
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from utils.metrics import password_hash_verify_duration
+from utils.spans import traced, AUTH_RESOLVE
 
 # Initialize Argon2 hasher
 ph = PasswordHasher()
@@ -41,6 +46,13 @@ auth_cache = TTLCache(maxsize=1024, ttl=30)
 feed_token_cache = TTLCache(maxsize=1024, ttl=30)
 # Define a cache for broker names with a 5-minute TTL (longer since broker rarely changes)
 broker_cache = TTLCache(maxsize=1024, ttl=3000)
+# Define a cache for credentials resolved from an API key with a 5-minute TTL,
+# keyed by the API key fingerprint and invalidated whenever the auth or API key row changes
+credential_cache = TTLCache(maxsize=1024, ttl=300)
+credential_cache_lock = threading.Lock()
+# Define a cache for the decrypted API key of each user, used by the webhooks on every alert;
+# invalidated whenever the API key changes
+api_key_cache = TTLCache(maxsize=1024, ttl=3600)
 
 engine = create_engine(
     DATABASE_URL,
@@ -69,6 +81,7 @@ class ApiKeys(Base):
     user_id = Column(String, nullable=False, unique=True)
     api_key_hash = Column(Text, nullable=False)  # For verification
     api_key_encrypted = Column(Text, nullable=False)  # For retrieval
+    api_key_fingerprint = Column(String(64), nullable=True, index=True)  # For lookup
     created_at = Column(DateTime(timezone=True), default=func.now())
 
 def init_db():
@@ -91,6 +104,10 @@ def decrypt_token(encrypted_token):
         print(f"Error decrypting token: {e}")
         return None
 
+def get_api_key_fingerprint(api_key):
+    """Keyed, non-reversible fingerprint of an API key used to find its row"""
+    return hmac.new(PEPPER.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
 def upsert_auth(name, auth_token, broker, feed_token=None, user_id=None, revoke=False):
     """Store encrypted auth token and feed token if provided"""
     encrypted_token = encrypt_token(auth_token)
@@ -107,8 +124,19 @@ def upsert_auth(name, auth_token, broker, feed_token=None, user_id=None, revoke=
         auth_obj = Auth(name=name, auth=encrypted_token, feed_token=encrypted_feed_token, broker=broker, user_id=user_id, is_revoked=revoke)
         db_session.add(auth_obj)
     db_session.commit()
+    invalidate_user_credentials(name)
     return auth_obj.id
 
+def invalidate_user_credentials(name):
+    """Drop every cached credential resolved for the given user"""
+    auth_cache.pop(f"auth-{name}", None)
+    feed_token_cache.pop(f"feed-{name}", None)
+    api_key_cache.pop(name, None)
+    with credential_cache_lock:
+        stale_keys = [key for key, credentials in credential_cache.items() if credentials['user_id'] == name]
+        for key in stale_keys:
+            credential_cache.pop(key, None)
+
 def get_auth_token(name):
     """Get decrypted auth token"""
     cache_key = f"auth-{name}"
@@ -175,19 +203,25 @@ def upsert_api_key(user_id, api_key):
     
     # Encrypt for retrieval
     encrypted_key = encrypt_token(api_key)
+
+    # Fingerprint for indexed lookup
+    fingerprint = get_api_key_fingerprint(api_key)
     
     api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
     if api_key_obj:
         api_key_obj.api_key_hash = hashed_key
         api_key_obj.api_key_encrypted = encrypted_key
+        api_key_obj.api_key_fingerprint = fingerprint
     else:
         api_key_obj = ApiKeys(
             user_id=user_id,
             api_key_hash=hashed_key,
-            api_key_encrypted=encrypted_key
+            api_key_encrypted=encrypted_key,
+            api_key_fingerprint=fingerprint
         )
         db_session.add(api_key_obj)
     db_session.commit()
+    invalidate_user_credentials(user_id)
     return api_key_obj.id
 
 def get_api_key(user_id):
@@ -201,10 +235,16 @@ def get_api_key(user_id):
 
 def get_api_key_for_tradingview(user_id):
     """Get decrypted API key for TradingView configuration"""
+    api_key = api_key_cache.get(user_id)
+    if api_key is not None:
+        return api_key
     try:
         api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
         if api_key_obj and api_key_obj.api_key_encrypted:
-            return decrypt_token(api_key_obj.api_key_encrypted)
+            api_key = decrypt_token(api_key_obj.api_key_encrypted)
+            if api_key:
+                api_key_cache[user_id] = api_key
+            return api_key
         return None
     except Exception as e:
         print("Error while querying the database for API key:", e)
@@ -213,17 +253,37 @@ def get_api_key_for_tradingview(user_id):
 def verify_api_key(provided_api_key):
     """Verify an API key using Argon2"""
     peppered_key = provided_api_key + PEPPER
+    fingerprint = get_api_key_fingerprint(provided_api_key)
     try:
-        # Query all API keys
-        api_keys = ApiKeys.query.all()
+        # Find the single candidate row through the fingerprint index
+        api_key_obj = ApiKeys.query.filter_by(api_key_fingerprint=fingerprint).first()
+        if api_key_obj:
+            try:
+                with password_hash_verify_duration.time(kind='api_key'):
+                    ph.verify(api_key_obj.api_key_hash, peppered_key)
+                return api_key_obj.user_id
+            except VerifyMismatchError:
+                return None
+
+        # Fall back to keys stored before fingerprints were introduced
+        api_keys = ApiKeys.query.filter(ApiKeys.api_key_fingerprint.is_(None)).all()
         
         # Try to verify against each stored hash
         for api_key_obj in api_keys:
             try:
-                ph.verify(api_key_obj.api_key_hash, peppered_key)
-                return api_key_obj.user_id
+                with password_hash_verify_duration.time(kind='api_key'):
+                    ph.verify(api_key_obj.api_key_hash, peppered_key)
             except VerifyMismatchError:
                 continue
+
+            # Backfill the fingerprint so the next lookup is indexed
+            try:
+                api_key_obj.api_key_fingerprint = fingerprint
+                db_session.commit()
+            except Exception as e:
+                print(f"Error backfilling API key fingerprint: {e}")
+                db_session.rollback()
+            return api_key_obj.user_id
         
         return None
     except Exception as e:
@@ -254,24 +314,57 @@ def get_broker_name(provided_api_key):
             return None
     return None
 
+def get_api_key_credentials(provided_api_key):
+    """
+    Resolve an API key to its decrypted credentials with caching.
+
+    Returns a dict with auth_token, feed_token, broker and user_id,
+    or None if the key is invalid or the auth has been revoked.
+    """
+    cache_key = get_api_key_fingerprint(provided_api_key)
+    with credential_cache_lock:
+        credentials = credential_cache.get(cache_key)
+    if credentials is not None:
+        return credentials
+
+    user_id = verify_api_key(provided_api_key)
+    if not user_id:
+        return None
+
+    try:
+        auth_obj = Auth.query.filter_by(name=user_id).first()
+        if auth_obj and not auth_obj.is_revoked:
+            credentials = {
+                'auth_token': decrypt_token(auth_obj.auth),
+                'feed_token': decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None,
+                'broker': auth_obj.broker,
+                'user_id': user_id
+            }
+            with credential_cache_lock:
+                credential_cache[cache_key] = credentials
+            return credentials
+        else:
+            print(f"No valid auth token or broker found for user_id '{user_id}'.")
+            return None
+    except Exception as e:
+        print("Error while querying the database for auth token and broker:", e)
+        return None
+
+def get_cached_api_key_credentials(provided_api_key):
+    """
+    Credentials for an API key that was already resolved by get_api_key_credentials,
+    without verifying the key again. Returns None on a cache miss.
+    """
+    with credential_cache_lock:
+        return credential_cache.get(get_api_key_fingerprint(provided_api_key))
+
+@traced(AUTH_RESOLVE)
 def get_auth_token_broker(provided_api_key, include_feed_token=False):
     """Get auth token, feed token (optional) and broker for a valid API key"""
-    user_id = verify_api_key(provided_api_key)
-    
-    if user_id:
-        try:
-            auth_obj = Auth.query.filter_by(name=user_id).first()
-            if auth_obj and not auth_obj.is_revoked:
-                decrypted_token = decrypt_token(auth_obj.auth)
-                if include_feed_token:
-                    decrypted_feed_token = decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None
-                    return decrypted_token, decrypted_feed_token, auth_obj.broker
-                return decrypted_token, auth_obj.broker
-            else:
-                print(f"No valid auth token or broker found for user_id '{user_id}'.")
-                return (None, None, None) if include_feed_token else (None, None)
-        except Exception as e:
-            print("Error while querying the database for auth token and broker:", e)
-            return (None, None, None) if include_feed_token else (None, None)
-    else:
+    credentials = get_api_key_credentials(provided_api_key)
+    if credentials is None:
         return (None, None, None) if include_feed_token else (None, None)
+
+    if include_feed_token:
+        return credentials['auth_token'], credentials['feed_token'], credentials['broker']
+    return credentials['auth_token'], credentials['broker']
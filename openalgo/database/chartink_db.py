@@ -2,6 +2,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignK
 from sqlalchemy.orm import scoped_session, sessionmaker, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from database.webhook_route_cache import WebhookRouteCache, WebhookRoute, snapshot
 import os
 import logging
 
@@ -74,6 +75,7 @@ def create_strategy(name, webhook_id, user_id, is_intraday=True, start_time=None
         )
         db_session.add(strategy)
         db_session.commit()
+        webhook_routes.invalidate()
         return strategy
     except Exception as e:
         logger.error(f"Error creating strategy: {str(e)}")
@@ -96,6 +98,26 @@ def get_strategy_by_webhook_id(webhook_id):
         logger.error(f"Error getting strategy by webhook ID {webhook_id}: {str(e)}")
         return None
 
+def load_webhook_route(webhook_id):
+    """Strategy and symbol mappings of a webhook ID, read from the database"""
+    try:
+        strategy = ChartinkStrategy.query.filter_by(webhook_id=webhook_id).first()
+        if not strategy:
+            return None
+        mappings = {mapping.chartink_symbol: snapshot(mapping)
+                    for mapping in ChartinkSymbolMapping.query.filter_by(strategy_id=strategy.id).order_by(ChartinkSymbolMapping.id)}
+        return WebhookRoute(snapshot(strategy), mappings)
+    except Exception as e:
+        logger.error(f"Error loading webhook route for {webhook_id}: {str(e)}")
+        return None
+
+# Webhook routes, cleared by every write in this module
+webhook_routes = WebhookRouteCache(load_webhook_route)
+
+def get_webhook_route(webhook_id):
+    """Cached strategy and symbol mappings of a webhook ID, or None if it is unknown"""
+    return webhook_routes.get(webhook_id)
+
 def get_all_strategies():
     """Get all strategies"""
     try:
@@ -119,6 +141,7 @@ def delete_strategy(strategy_id):
         if strategy:
             db_session.delete(strategy)
             db_session.commit()
+            webhook_routes.invalidate()
             return True
         return False
     except Exception as e:
@@ -133,6 +156,7 @@ def toggle_strategy(strategy_id):
         if strategy:
             strategy.is_active = not strategy.is_active
             db_session.commit()
+            webhook_routes.invalidate()
             return strategy
         return None
     except Exception as e:
@@ -152,6 +176,7 @@ def update_strategy_times(strategy_id, start_time=None, end_time=None, squareoff
             if squareoff_time is not None:
                 strategy.squareoff_time = squareoff_time
             db_session.commit()
+            webhook_routes.invalidate()
             return strategy
         return None
     except Exception as e:
@@ -171,6 +196,7 @@ def add_symbol_mapping(strategy_id, chartink_symbol, exchange, quantity, product
         )
         db_session.add(mapping)
         db_session.commit()
+        webhook_routes.invalidate()
         return mapping
     except Exception as e:
         logger.error(f"Error adding symbol mapping: {str(e)}")
@@ -190,6 +216,7 @@ def bulk_add_symbol_mappings(strategy_id, mappings):
             )
             db_session.add(mapping)
         db_session.commit()
+        webhook_routes.invalidate()
         return True
     except Exception as e:
         logger.error(f"Error bulk adding symbol mappings: {str(e)}")
@@ -211,6 +238,7 @@ def delete_symbol_mapping(mapping_id):
         if mapping:
             db_session.delete(mapping)
             db_session.commit()
+            webhook_routes.invalidate()
             return True
         return False
     except Exception as e:
@@ -1,13 +1,21 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, UniqueConstraint, select, inspect, text
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from utils.batch_writer import BatchWriter
+from utils.quantile_sketch import QuantileSketch
+from database.rollup import group_by_bucket, merge_rollups, prune_rollups
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Background writer settings for latency logging
+LATENCY_LOG_QUEUE_SIZE = int(os.getenv('LATENCY_LOG_QUEUE_SIZE', '10000'))
+LATENCY_LOG_BATCH_SIZE = int(os.getenv('LATENCY_LOG_BATCH_SIZE', '200'))
+LATENCY_LOG_FLUSH_INTERVAL_MS = int(os.getenv('LATENCY_LOG_FLUSH_INTERVAL_MS', '500'))
+
 # Use a separate database for latency logs
 LATENCY_DATABASE_URL = 'sqlite:///db/latency.db'
 
@@ -41,6 +49,7 @@ class OrderLatency(LatencyBase):
     validation_latency_ms = Column(Float)  # Pre-request processing
     response_latency_ms = Column(Float)  # Post-response processing
     overhead_ms = Column(Float)  # Total overhead
+    stage_breakdown = Column(JSON)  # Self time in ms per span (auth_resolve, symbol_map, http_send, ...)
     
     # Total time including overhead
     total_latency_ms = Column(Float, nullable=False)
@@ -52,33 +61,59 @@ class OrderLatency(LatencyBase):
     error = Column(String(500))  # Error message if any
     
     @staticmethod
-    def log_latency(order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error=None):
+    def build_record(order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error=None, spans=None):
+        """Column values of one latency row"""
+        return {
+            'order_id': order_id,
+            'user_id': user_id,
+            'broker': broker,
+            'symbol': symbol,
+            'order_type': order_type,
+            'rtt_ms': latencies.get('rtt', 0),
+            'validation_latency_ms': latencies.get('validation', 0),
+            'response_latency_ms': latencies.get('broker_response', 0),
+            'overhead_ms': latencies.get('overhead', 0),
+            'total_latency_ms': latencies.get('total', 0),
+            'stage_breakdown': spans,
+            'request_body': request_body,
+            'response_body': response_body,
+            'status': status,
+            'error': error
+        }
+
+    @staticmethod
+    def log_latency(order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error=None, spans=None):
         """Log order execution latency"""
         try:
-            log = OrderLatency(
-                order_id=order_id,
-                user_id=user_id,
-                broker=broker,
-                symbol=symbol,
-                order_type=order_type,
-                rtt_ms=latencies.get('rtt', 0),
-                validation_latency_ms=latencies.get('validation', 0),
-                response_latency_ms=latencies.get('broker_response', 0),
-                overhead_ms=latencies.get('overhead', 0),
-                total_latency_ms=latencies.get('total', 0),
-                request_body=request_body,
-                response_body=response_body,
-                status=status,
-                error=error
+            record = OrderLatency.build_record(
+                order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error, spans
             )
-            latency_session.add(log)
-            latency_session.commit()
+            record['timestamp'] = datetime.now(timezone.utc).replace(tzinfo=None)
+            OrderLatency.log_latencies([record])
             return True
         except Exception as e:
             logger.error(f"Error logging latency: {str(e)}")
-            latency_session.rollback()
             return False
 
+    @staticmethod
+    def log_latencies(records):
+        """Insert a batch of latency records and fold them into the aggregates in one transaction"""
+        with latency_engine.begin() as conn:
+            conn.execute(OrderLatency.__table__.insert(), records)
+            LatencyAggregate.merge_records(conn, records)
+
+    @staticmethod
+    def queue_latency(order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error=None, spans=None):
+        """
+        Hand a latency measurement to the background writer instead of committing it
+        inside the request being measured. Returns False if the record was dropped.
+        """
+        record = OrderLatency.build_record(
+            order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error, spans
+        )
+        record['timestamp'] = datetime.now(timezone.utc).replace(tzinfo=None)
+        return latency_log_writer.submit(record)
+
     @staticmethod
     def get_recent_logs(limit=100):
         """Get recent latency logs ordered by timestamp"""
@@ -90,53 +125,28 @@ class OrderLatency(LatencyBase):
 
     @staticmethod
     def get_latency_stats():
-        """Get latency statistics"""
+        """Get latency statistics, answered from the daily aggregates"""
         try:
-            from sqlalchemy import func
-            
-            # Overall stats
-            total_orders = OrderLatency.query.count()
-            failed_orders = OrderLatency.query.filter(OrderLatency.status == 'FAILED').count()
-            
-            # Get average latencies
-            avg_rtt = latency_session.query(func.avg(OrderLatency.rtt_ms)).scalar() or 0
-            avg_overhead = latency_session.query(func.avg(OrderLatency.overhead_ms)).scalar() or 0
-            avg_total = latency_session.query(func.avg(OrderLatency.total_latency_ms)).scalar() or 0
-            
-            # Get p50, p90, p99 latencies for RTT
-            rtt_latencies = [l[0] for l in OrderLatency.query.with_entities(OrderLatency.rtt_ms).all()]
-            rtt_latencies.sort()
-            
-            p50_rtt = p90_rtt = p99_rtt = 0
-            if rtt_latencies:
-                p50_rtt = rtt_latencies[int(len(rtt_latencies) * 0.5)]
-                p90_rtt = rtt_latencies[int(len(rtt_latencies) * 0.9)]
-                p99_rtt = rtt_latencies[int(len(rtt_latencies) * 0.99)]
-            
-            # Breakdown by broker
-            broker_stats = {}
-            brokers = [b[0] for b in OrderLatency.query.with_entities(OrderLatency.broker).distinct().all()]
-            for broker in brokers:
-                if broker:  # Skip None values
-                    broker_orders = OrderLatency.query.filter_by(broker=broker)
-                    broker_stats[broker] = {
-                        'total_orders': broker_orders.count(),
-                        'failed_orders': broker_orders.filter_by(status='FAILED').count(),
-                        'avg_rtt': float(broker_orders.with_entities(func.avg(OrderLatency.rtt_ms)).scalar() or 0),
-                        'avg_overhead': float(broker_orders.with_entities(func.avg(OrderLatency.overhead_ms)).scalar() or 0),
-                        'avg_total': float(broker_orders.with_entities(func.avg(OrderLatency.total_latency_ms)).scalar() or 0)
-                    }
-            
+            overall = LatencySummary()
+            brokers = {}
+            order_types = {}
+            for aggregate in LatencyAggregate.query.filter_by(resolution='day').all():
+                overall.add(aggregate)
+                if aggregate.broker:  # Skip orders without a broker
+                    brokers.setdefault(aggregate.broker, LatencySummary()).add(aggregate)
+                order_types.setdefault(aggregate.order_type, LatencySummary()).add(aggregate)
+
             return {
-                'total_orders': total_orders,
-                'failed_orders': failed_orders,
-                'avg_rtt': float(avg_rtt),
-                'avg_overhead': float(avg_overhead),
-                'avg_total': float(avg_total),
-                'p50_rtt': float(p50_rtt),
-                'p90_rtt': float(p90_rtt),
-                'p99_rtt': float(p99_rtt),
-                'broker_stats': broker_stats
+                'total_orders': overall.count,
+                'failed_orders': overall.failed_count,
+                'avg_rtt': overall.average('rtt_sum'),
+                'avg_overhead': overall.average('overhead_sum'),
+                'avg_total': overall.average('total_sum'),
+                'p50_rtt': overall.sketch.quantile(0.5),
+                'p90_rtt': overall.sketch.quantile(0.9),
+                'p99_rtt': overall.sketch.quantile(0.99),
+                'broker_stats': {broker: summary.stats() for broker, summary in brokers.items()},
+                'order_type_stats': {order_type: summary.stats() for order_type, summary in order_types.items()}
             }
         except Exception as e:
             logger.error(f"Error getting latency stats: {str(e)}")
@@ -149,13 +159,193 @@ class OrderLatency(LatencyBase):
                 'p50_rtt': 0,
                 'p90_rtt': 0,
                 'p99_rtt': 0,
-                'broker_stats': {}
+                'broker_stats': {},
+                'order_type_stats': {}
             }
 
+    @staticmethod
+    def get_rtt_histogram(broker=None, bin_count=30):
+        """
+        RTT distribution in bin_count equal-width bins between the fastest and slowest
+        order, rebuilt from the aggregate sketches instead of the raw rows
+        """
+        query = LatencyAggregate.query.filter_by(resolution='day')
+        if broker:
+            query = query.filter_by(broker=broker)
+
+        summary = LatencySummary()
+        for aggregate in query.all():
+            summary.add(aggregate)
+
+        if not summary.count:
+            return {'bins': [], 'counts': [], 'avg_rtt': 0, 'min_rtt': 0, 'max_rtt': 0}
+
+        min_rtt, max_rtt = summary.rtt_min, summary.rtt_max
+        bin_width = (max_rtt - min_rtt) / bin_count if max_rtt > min_rtt else 1
+        counts = [0] * bin_count
+        for value, count in summary.sketch.buckets():
+            position = int((min(max(value, min_rtt), max_rtt) - min_rtt) / bin_width)
+            counts[min(position, bin_count - 1)] += count
+
+        return {
+            'bins': [f"{min_rtt + i * bin_width:.1f}" for i in range(bin_count)],
+            'counts': counts,
+            'avg_rtt': summary.average('rtt_sum'),
+            'min_rtt': float(min_rtt),
+            'max_rtt': float(max_rtt)
+        }
+
+class LatencyAggregate(LatencyBase):
+    """
+    Per minute, hour and day totals of order_latency for each broker and order type,
+    maintained as rows are written so the dashboards never have to scan the raw
+    table, and kept after the raw rows are pruned
+    """
+    __tablename__ = 'latency_aggregates'
+
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String(10), nullable=False)  # minute, hour or day
+    bucket_start = Column(DateTime, nullable=False)  # UTC start of the bucket
+    broker = Column(String(50), nullable=False, default='')
+    order_type = Column(String(20), nullable=False, default='')
+    count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    rtt_sum = Column(Float, nullable=False, default=0)
+    overhead_sum = Column(Float, nullable=False, default=0)
+    total_sum = Column(Float, nullable=False, default=0)
+    rtt_min = Column(Float)
+    rtt_max = Column(Float)
+    rtt_sketch = Column(Text)  # QuantileSketch of rtt_ms as JSON
+
+    __table_args__ = (
+        UniqueConstraint('resolution', 'bucket_start', 'broker', 'order_type', name='uq_latency_aggregate_bucket'),
+    )
+
+    KEY_COLUMNS = ('resolution', 'bucket_start', 'broker', 'order_type')
+
+    @staticmethod
+    def merge_records(conn, records):
+        """Fold latency records into their aggregate rows using conn's transaction"""
+        batch = group_by_bucket(
+            records,
+            lambda record: (record.get('broker') or '', record.get('order_type') or ''),
+            LatencySummary
+        )
+        merge_rollups(conn, LatencyAggregate.__table__, LatencyAggregate.KEY_COLUMNS, batch)
+
+    @staticmethod
+    def rebuild():
+        """Recompute every aggregate from order_latency; run by upgrade/build_log_rollups.py"""
+        columns = [OrderLatency.timestamp, OrderLatency.broker, OrderLatency.order_type, OrderLatency.rtt_ms,
+                   OrderLatency.overhead_ms, OrderLatency.total_latency_ms, OrderLatency.status]
+        with latency_engine.begin() as conn:
+            conn.execute(LatencyAggregate.__table__.delete())
+            result = conn.execute(select(*columns).execution_options(yield_per=10000))
+            for rows in result.mappings().partitions():
+                LatencyAggregate.merge_records(conn, [dict(row) for row in rows])
+
+def prune_latency_logs(before, rollup_retention_days):
+    """
+    Delete raw latency rows logged before the given UTC time and aggregates past
+    their retention. Returns the number of raw and aggregate rows removed.
+    """
+    with latency_engine.begin() as conn:
+        raw = conn.execute(
+            OrderLatency.__table__.delete().where(OrderLatency.timestamp < before)
+        ).rowcount
+        aggregates = prune_rollups(conn, LatencyAggregate.__table__, rollup_retention_days)
+    return raw, aggregates
+
+class LatencySummary:
+    """Running totals and RTT sketch for a set of latency records or aggregate rows"""
+
+    def __init__(self):
+        self.count = 0
+        self.failed_count = 0
+        self.rtt_sum = 0.0
+        self.overhead_sum = 0.0
+        self.total_sum = 0.0
+        self.rtt_min = None
+        self.rtt_max = None
+        self.sketch = QuantileSketch()
+
+    def _extend_range(self, low, high):
+        if low is not None:
+            self.rtt_min = low if self.rtt_min is None else min(self.rtt_min, low)
+        if high is not None:
+            self.rtt_max = high if self.rtt_max is None else max(self.rtt_max, high)
+
+    def add_record(self, record):
+        rtt = record.get('rtt_ms') or 0
+        self.count += 1
+        self.failed_count += 1 if record.get('status') == 'FAILED' else 0
+        self.rtt_sum += rtt
+        self.overhead_sum += record.get('overhead_ms') or 0
+        self.total_sum += record.get('total_latency_ms') or 0
+        self._extend_range(rtt, rtt)
+        self.sketch.add(rtt)
+
+    def add(self, aggregate):
+        """Merge an aggregate row (model instance or result mapping)"""
+        get = aggregate.get if hasattr(aggregate, 'get') else lambda name: getattr(aggregate, name)
+        self.count += get('count')
+        self.failed_count += get('failed_count')
+        self.rtt_sum += get('rtt_sum')
+        self.overhead_sum += get('overhead_sum')
+        self.total_sum += get('total_sum')
+        self._extend_range(get('rtt_min'), get('rtt_max'))
+        self.sketch.merge(QuantileSketch.from_json(get('rtt_sketch')))
+
+    def average(self, name):
+        return float(getattr(self, name) / self.count) if self.count else 0.0
+
+    def stats(self):
+        """Totals and averages in the shape of the dashboard's per-broker stats"""
+        return {
+            'total_orders': self.count,
+            'failed_orders': self.failed_count,
+            'avg_rtt': self.average('rtt_sum'),
+            'avg_overhead': self.average('overhead_sum'),
+            'avg_total': self.average('total_sum'),
+            'p50_rtt': self.sketch.quantile(0.5),
+            'p90_rtt': self.sketch.quantile(0.9),
+            'p99_rtt': self.sketch.quantile(0.99)
+        }
+
+    def values(self):
+        return {
+            'count': self.count,
+            'failed_count': self.failed_count,
+            'rtt_sum': self.rtt_sum,
+            'overhead_sum': self.overhead_sum,
+            'total_sum': self.total_sum,
+            'rtt_min': self.rtt_min,
+            'rtt_max': self.rtt_max,
+            'rtt_sketch': self.sketch.to_json()
+        }
+
+latency_log_writer = BatchWriter(
+    'latency_log',
+    OrderLatency.log_latencies,
+    max_queue=LATENCY_LOG_QUEUE_SIZE,
+    batch_size=LATENCY_LOG_BATCH_SIZE,
+    flush_interval=LATENCY_LOG_FLUSH_INTERVAL_MS / 1000
+)
+
 def init_latency_db():
     """Initialize the latency database"""
     # Create db directory if it doesn't exist
     os.makedirs('db', exist_ok=True)
     
     print("Initializing Latency DB")
+    inspector = inspect(latency_engine)
     LatencyBase.metadata.create_all(bind=latency_engine)
+    if 'stage_breakdown' not in [column['name'] for column in inspector.get_columns('order_latency')]:
+        with latency_engine.begin() as conn:
+            conn.execute(text('ALTER TABLE order_latency ADD COLUMN stage_breakdown JSON'))
+
+    # Orders logged before the aggregates table existed are aggregated by an upgrade
+    # script, not here: rebuilding holds the write lock for the whole table
+    if LatencyAggregate.query.first() is None and OrderLatency.query.first() is not None:
+        logger.warning("Latency aggregates missing for existing logs, run upgrade/build_log_rollups.py")
+    latency_session.remove()
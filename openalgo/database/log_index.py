@@ -0,0 +1,190 @@
+# database/log_index.py
+
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text, column, select
+
+logger = logging.getLogger(__name__)
+
+# Log tables with a working full-text index, by table name
+_fts_tables = {}
+
+def _field(data, name, max_length):
+    value = data.get(name) if isinstance(data, dict) else None
+    if value is None or value == '':
+        return None
+    return str(value)[:max_length]
+
+def extract_log_fields(request_data, response_data):
+    """Indexed column values for an order or analyzer log row"""
+    return {
+        'symbol': _field(request_data, 'symbol', 50),
+        'strategy': _field(request_data, 'strategy', 100),
+        'action': _field(request_data, 'action', 10),
+        # Placed orders carry the id in the response, modify/cancel requests in the request
+        'orderid': _field(response_data, 'orderid', 100) or _field(request_data, 'orderid', 100),
+        'status': _field(response_data, 'status', 20)
+    }
+
+def fts_table_name(table):
+    return f"{table.name}_fts"
+
+def _create_fts(conn, table):
+    """
+    Create a trigram FTS5 index over api_type, request_data and response_data kept
+    in sync by triggers. Trigrams keep the substring semantics of the ILIKE search.
+    """
+    fts = fts_table_name(table)
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"), {'name': fts}
+    ).first() is not None
+
+    columns = 'api_type, request_data, response_data'
+    new_values = 'new.api_type, new.request_data, new.response_data'
+    old_values = 'old.api_type, old.request_data, old.response_data'
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+        f"content='{table.name}', content_rowid='id', tokenize='trigram')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table.name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    if not exists:
+        # Index the rows logged before the full-text index existed
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def add_log_columns(engine, table):
+    """Add the indexed columns missing from an existing order/analyzer log table"""
+    existing = {col['name'] for col in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for col in table.columns:
+            if col.name not in existing:
+                column_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {column_type}"))
+                logger.info(f"Added {col.name} column to {table.name}")
+
+def build_log_indexes(engine, table):
+    """
+    Create the indexes of a log table and, on SQLite, its full-text index, indexing
+    the rows already logged. Run by upgrade/add_log_index_columns.py on existing logs.
+    """
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    if engine.dialect.name != 'sqlite':
+        return
+    try:
+        with engine.begin() as conn:
+            _create_fts(conn, table)
+        _fts_tables[table.name] = True
+    except Exception as e:
+        # SQLite builds without FTS5 or the trigram tokenizer keep the LIKE search
+        logger.warning(f"Full-text index for {table.name} unavailable, using LIKE search: {e}")
+        _fts_tables[table.name] = False
+
+def ensure_log_index_schema(engine, table):
+    """
+    Bring a log table up to the model on start: add missing columns, and build the
+    indexes only while the table is empty. Existing logs are indexed by the upgrade
+    script instead, as building over them holds the write lock for the whole table.
+    """
+    add_log_columns(engine, table)
+
+    with engine.connect() as conn:
+        empty = conn.execute(select(table.c.id).limit(1)).first() is None
+    if empty:
+        build_log_indexes(engine, table)
+        return
+
+    existing = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+    missing = [index.name for index in table.indexes if index.name not in existing]
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            if conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                {'name': fts_table_name(table)}
+            ).first() is None:
+                missing.append(fts_table_name(table))
+    if missing:
+        logger.warning(
+            f"{table.name} is missing {', '.join(missing)}, run upgrade/add_log_index_columns.py"
+        )
+
+def has_fts(session, table):
+    """Whether the full-text index of a log table exists, checked once per process"""
+    if table.name not in _fts_tables:
+        _fts_tables[table.name] = session.get_bind().dialect.name == 'sqlite' and session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+            {'name': fts_table_name(table)}
+        ).first() is not None
+    return _fts_tables[table.name]
+
+def apply_search(query, session, model, search_query):
+    """
+    Restrict query to rows whose api_type, request or response contains search_query.
+    Uses the trigram full-text index where available; it needs at least 3 characters.
+    """
+    table = model.__table__
+    if len(search_query) >= 3 and has_fts(session, table):
+        fts = fts_table_name(table)
+        matches = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_query").columns(column('rowid'))
+        return query.filter(model.id.in_(matches)).params(
+            fts_query='"' + search_query.replace('"', '""') + '"'
+        )
+
+    search = f"%{search_query}%"
+    return query.filter(
+        (model.api_type.ilike(search)) |
+        (model.request_data.ilike(search)) |
+        (model.response_data.ilike(search))
+    )
+
+def apply_date_range(query, created_at, start_date=None, end_date=None):
+    """
+    Filter on whole days as a range over created_at so its index is used
+    (dates are 'YYYY-MM-DD' strings or date objects, compared in stored local time)
+    """
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    if start_date:
+        query = query.filter(created_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.filter(created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    return query
+
+def fetch_page(query, id_column, limit, before=None, after=None):
+    """
+    Keyset pagination over id, newest first. before returns the page of older rows,
+    after the page of newer rows. Returns (rows, older_cursor, newer_cursor) where a
+    cursor is None when there is nothing further in that direction.
+    """
+    if after is not None:
+        rows = query.filter(id_column > after).order_by(id_column.asc()).limit(limit + 1).all()
+        has_newer = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        has_older = bool(rows) and query.filter(id_column < rows[-1].id).first() is not None
+    else:
+        if before is not None:
+            query_page = query.filter(id_column < before)
+        else:
+            query_page = query
+        rows = query_page.order_by(id_column.desc()).limit(limit + 1).all()
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        has_newer = before is not None and bool(rows)
+
+    older_cursor = rows[-1].id if rows and has_older else None
+    newer_cursor = rows[0].id if rows and has_newer else None
+    return rows, older_cursor, newer_cursor
@@ -0,0 +1,65 @@
+# database/log_retention.py
+
+import os
+import threading
+import logging
+from datetime import timedelta
+from database.rollup import utc_now
+from database.traffic_db import prune_traffic_logs
+from database.latency_db import prune_latency_logs
+
+logger = logging.getLogger(__name__)
+
+# Days of raw rows kept; the rollups keep the totals after the rows are gone
+TRAFFIC_LOG_RETENTION_DAYS = int(os.getenv('TRAFFIC_LOG_RETENTION_DAYS', '7'))
+LATENCY_LOG_RETENTION_DAYS = int(os.getenv('LATENCY_LOG_RETENTION_DAYS', '30'))
+
+# Days each rollup resolution is kept; 0 keeps it forever
+ROLLUP_RETENTION_DAYS = {
+    'minute': int(os.getenv('MINUTE_ROLLUP_RETENTION_DAYS', '2')),
+    'hour': int(os.getenv('HOUR_ROLLUP_RETENTION_DAYS', '90')),
+    'day': int(os.getenv('DAY_ROLLUP_RETENTION_DAYS', '0'))
+}
+
+LOG_RETENTION_INTERVAL_MINUTES = int(os.getenv('LOG_RETENTION_INTERVAL_MINUTES', '60'))
+
+_retention_thread = None
+_retention_lock = threading.Lock()
+
+def prune_logs():
+    """Apply the traffic and latency retention once"""
+    now = utc_now()
+    try:
+        raw, rollups = prune_traffic_logs(now - timedelta(days=TRAFFIC_LOG_RETENTION_DAYS), ROLLUP_RETENTION_DAYS)
+        if raw or rollups:
+            logger.info(f"Pruned {raw} traffic logs and {rollups} traffic rollups")
+    except Exception as e:
+        logger.error(f"Error pruning traffic logs: {e}")
+
+    try:
+        raw, rollups = prune_latency_logs(now - timedelta(days=LATENCY_LOG_RETENTION_DAYS), ROLLUP_RETENTION_DAYS)
+        if raw or rollups:
+            logger.info(f"Pruned {raw} latency logs and {rollups} latency aggregates")
+    except Exception as e:
+        logger.error(f"Error pruning latency logs: {e}")
+
+def _run_retention(stop_event):
+    while not stop_event.is_set():
+        prune_logs()
+        stop_event.wait(LOG_RETENTION_INTERVAL_MINUTES * 60)
+
+def start_log_retention():
+    """Start the background retention job once per process"""
+    global _retention_thread
+
+    with _retention_lock:
+        if _retention_thread is not None and _retention_thread.is_alive():
+            return _retention_thread
+        _retention_thread = threading.Thread(
+            target=_run_retention,
+            args=(threading.Event(),),
+            name='log-retention',
+            daemon=True
+        )
+        _retention_thread.start()
+    return _retention_thread
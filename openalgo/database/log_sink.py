@@ -0,0 +1,43 @@
+# database/log_sink.py
+
+import os
+from itertools import groupby
+from utils.batch_writer import BatchWriter, OVERFLOW_POLICIES
+
+# Shared writer for the order and analyzer logs
+LOG_SINK_QUEUE_SIZE = int(os.getenv('LOG_SINK_QUEUE_SIZE', '10000'))
+LOG_SINK_BATCH_SIZE = int(os.getenv('LOG_SINK_BATCH_SIZE', '500'))
+LOG_SINK_FLUSH_INTERVAL_MS = int(os.getenv('LOG_SINK_FLUSH_INTERVAL_MS', '100'))
+# Order logs are an audit trail, so by default a full queue briefly holds back
+# the caller instead of discarding the record
+LOG_SINK_OVERFLOW_POLICY = os.getenv('LOG_SINK_OVERFLOW_POLICY', 'block')
+LOG_SINK_BLOCK_TIMEOUT_MS = int(os.getenv('LOG_SINK_BLOCK_TIMEOUT_MS', '250'))
+
+if LOG_SINK_OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+    print(f"Invalid LOG_SINK_OVERFLOW_POLICY '{LOG_SINK_OVERFLOW_POLICY}', using 'block'")
+    LOG_SINK_OVERFLOW_POLICY = 'block'
+
+def write_log_rows(records):
+    """
+    Group commit: every row buffered for the same engine goes in one transaction,
+    with one executemany per table.
+    """
+    records.sort(key=lambda record: (id(record[0]), record[1].name))
+    for engine, engine_records in groupby(records, key=lambda record: record[0]):
+        with engine.begin() as conn:
+            for table, table_records in groupby(engine_records, key=lambda record: record[1]):
+                conn.execute(table.insert(), [row for _, _, row in table_records])
+
+log_sink = BatchWriter(
+    'log_sink',
+    write_log_rows,
+    max_queue=LOG_SINK_QUEUE_SIZE,
+    batch_size=LOG_SINK_BATCH_SIZE,
+    flush_interval=LOG_SINK_FLUSH_INTERVAL_MS / 1000,
+    overflow_policy=LOG_SINK_OVERFLOW_POLICY,
+    block_timeout=LOG_SINK_BLOCK_TIMEOUT_MS / 1000
+)
+
+def submit_log_row(engine, table, row):
+    """Queue one row for table on engine; returns False if the sink dropped it"""
+    return log_sink.submit((engine, table, row))
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized helpers for building OpenAlgo symbols while processing master contracts.
+# Each helper takes and returns whole pandas Series instead of being applied row by row.
+
+def format_expiry(expiry, input_format=None, output_format='%d%b%y'):
+    """
+    Reformat expiry dates, e.g. '26-JUN-2025' -> '26JUN25' with input_format '%d-%b-%Y'.
+    Values that cannot be parsed become NaN.
+    """
+    parsed = pd.to_datetime(expiry, format=input_format, errors='coerce')
+    return parsed.dt.strftime(output_format).str.upper()
+
+def format_strike(strike, truncate=False):
+    """
+    Render strike prices for use inside a symbol: 22500.0 -> '22500', 82.25 -> '82.25'.
+    With truncate=True the decimals are dropped (82.25 -> '82'). Missing strikes become NaN.
+    """
+    numeric = pd.to_numeric(strike, errors='coerce')
+    # astype('int64') truncates towards zero, like int()
+    whole = numeric.fillna(0).astype('int64').astype(str)
+    if not truncate:
+        whole = whole.where(numeric == np.floor(numeric), numeric.astype(str))
+    return whole.where(numeric.notna())
+
+def strike_values(strike, missing=-1):
+    """Numeric strike prices, with missing or invalid values replaced by missing"""
+    return pd.to_numeric(strike, errors='coerce').fillna(missing)
+
+def futures_symbols(name, expiry):
+    """NAME + EXPIRY + 'FUT', e.g. NIFTY26JUN25FUT"""
+    return name.fillna('').astype(str) + expiry.fillna('').astype(str) + 'FUT'
+
+def options_symbols(name, expiry, strike_text, option_type):
+    """NAME + EXPIRY + STRIKE + CE/PE, e.g. NIFTY26JUN2522500CE; strike_text as built by format_strike"""
+    return (name.fillna('').astype(str) + expiry.fillna('').astype(str)
+            + strike_text.fillna('').astype(str) + option_type.fillna('').astype(str))
+
+def fo_symbols(name, expiry, instrumenttype, strike_text):
+    """Futures symbol where instrumenttype is 'FUT', options symbol (instrumenttype as CE/PE) elsewhere"""
+    return options_symbols(name, expiry, strike_text, instrumenttype).where(
+        instrumenttype != 'FUT', futures_symbols(name, expiry)
+    )
+
+def equity_symbols(brsymbol, suffixes=('-EQ', '-BE')):
+    """
+    Strip the series suffix from broker equity symbols, e.g. 'SBIN-EQ' -> 'SBIN'.
+    Only the first suffix (in the given order) found in a symbol is removed.
+    """
+    symbols = brsymbol.copy()
+    pending = pd.Series(True, index=brsymbol.index)
+    for suffix in suffixes:
+        found = pending & brsymbol.str.contains(suffix, regex=False, na=False)
+        symbols = symbols.where(~found, brsymbol.str.replace(suffix, '', regex=False))
+        pending &= ~found
+    return symbols
+
+def fo_instrument_types(brsymbol, default='UNKNOWN'):
+    """Instrument type from the FUT/CE/PE ending of broker F&O symbols"""
+    return pd.Series(
+        np.select(
+            [brsymbol.str.endswith(suffix, na=False) for suffix in ('FUT', 'CE', 'PE')],
+            ['FUT', 'CE', 'PE'],
+            default=default
+        ),
+        index=brsymbol.index
+    )
@@ -0,0 +1,79 @@
+import re
+import json
+import shutil
+import pandas as pd
+
+# Instruments parsed and formatted per chunk; bounds the working set of a contract download
+INGEST_CHUNK_SIZE = 50000
+
+# Bytes read per call while downloading or scanning a contract file
+READ_CHUNK_SIZE = 1 << 20
+
+# Whitespace and commas between the elements of a JSON array
+_JSON_ARRAY_SEPARATORS = re.compile(r'[\s,]*')
+
+def save_stream(source, output_path):
+    """
+    Copy a file-like response body (e.g. http.client.HTTPResponse) to output_path
+    in fixed size blocks instead of reading the whole body into memory.
+    """
+    with open(output_path, 'wb') as f:
+        shutil.copyfileobj(source, f, READ_CHUNK_SIZE)
+
+def save_chunks(chunks, output_path):
+    """Write an iterable of byte chunks (e.g. httpx response.iter_bytes()) to output_path"""
+    with open(output_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+def iter_csv_chunks(path, chunksize=INGEST_CHUNK_SIZE, **read_csv_kwargs):
+    """Yield a CSV file as DataFrames of at most chunksize rows"""
+    with pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+def iter_json_array(path):
+    """
+    Yield the objects of a top level JSON array one at a time.
+    Only READ_CHUNK_SIZE characters of the file are buffered beyond the current object.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(READ_CHUNK_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            pos = _JSON_ARRAY_SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The next object straddles the end of the buffer
+                if eof:
+                    raise
+                more = f.read(READ_CHUNK_SIZE)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            yield record
+
+def iter_json_array_chunks(path, chunksize=INGEST_CHUNK_SIZE):
+    """Yield the objects of a top level JSON array as DataFrames of at most chunksize rows"""
+    records = []
+    for record in iter_json_array(path):
+        records.append(record)
+        if len(records) >= chunksize:
+            yield pd.DataFrame.from_records(records)
+            records = []
+    if records:
+        yield pd.DataFrame.from_records(records)
+
+def transform_chunks(chunks, transform):
+    """Apply a vectorized per-chunk transform lazily, for use with SymTokenRefresh.stage_chunks"""
+    for chunk in chunks:
+        yield transform(chunk)
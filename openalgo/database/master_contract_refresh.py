@@ -0,0 +1,137 @@
+import logging
+import pandas as pd
+from sqlalchemy import Table, Column, Integer, MetaData, Index, select, exists, and_, or_, insert, update, delete
+from database.symbol import SymToken, engine
+
+logger = logging.getLogger(__name__)
+
+symtoken = SymToken.__table__
+
+# Every master contract column except the surrogate key
+SYMTOKEN_COLUMNS = [column.name for column in symtoken.columns if column.name != 'id']
+
+# A row is the same instrument when token, exchange and broker symbol all match
+KEY_COLUMNS = ('token', 'exchange', 'brsymbol')
+VALUE_COLUMNS = [name for name in SYMTOKEN_COLUMNS if name not in KEY_COLUMNS]
+
+# Rows written to the staging table per executemany call
+STAGE_CHUNK_SIZE = 10000
+
+staging_metadata = MetaData()
+symtoken_staging = Table(
+    'symtoken_staging',
+    staging_metadata,
+    Column('id', Integer, primary_key=True),
+    *[Column(column.name, column.type) for column in symtoken.columns if column.name != 'id'],
+    Index('idx_symtoken_staging_key', *KEY_COLUMNS)
+)
+
+def _same_instrument(staged, live):
+    return and_(*[staged.c[name] == live.c[name] for name in KEY_COLUMNS])
+
+class SymTokenRefresh:
+    """
+    Diff based refresh of the master contract table.
+
+    Broker frames are staged into symtoken_staging as they are downloaded and
+    apply() reconciles the live symtoken table against the staging table in a
+    single transaction, so symbol lookups never see an empty master contract.
+
+    Usage:
+        refresh = SymTokenRefresh()
+        refresh.stage(nse_df)
+        refresh.stage(nfo_df)
+        refresh.apply()
+    """
+
+    def __init__(self):
+        # Tokens already staged; later frames skip them like copy_from_dataframe did
+        self.staged_tokens = set()
+        self.staged_rows = 0
+        symtoken_staging.drop(bind=engine, checkfirst=True)
+        symtoken_staging.create(bind=engine)
+
+    def stage(self, df):
+        """Append a broker frame to the staging table, skipping tokens staged by earlier frames"""
+        return self.stage_chunks([df])
+
+    def stage_chunks(self, chunks):
+        """
+        Append one broker frame delivered as an iterable of chunks, so the whole
+        frame never has to be held in memory. Token de-duplication applies
+        against earlier frames only, exactly as if the chunks were one frame.
+        """
+        frame_tokens = set()
+        staged = 0
+
+        for df in chunks:
+            if df is None or df.empty:
+                continue
+
+            columns = [name for name in SYMTOKEN_COLUMNS if name in df.columns]
+            frame = df[columns]
+            frame = frame[~frame['token'].astype(str).isin(self.staged_tokens)]
+            if frame.empty:
+                continue
+            frame_tokens.update(frame['token'].astype(str))
+
+            with engine.begin() as conn:
+                for start in range(0, len(frame), STAGE_CHUNK_SIZE):
+                    chunk = frame.iloc[start:start + STAGE_CHUNK_SIZE]
+                    # NaN would otherwise be compared as a value against NULLs in the live table
+                    records = chunk.astype(object).where(pd.notna(chunk), None).to_dict(orient='records')
+                    conn.execute(insert(symtoken_staging), records)
+                    staged += len(records)
+
+        self.staged_tokens.update(frame_tokens)
+        self.staged_rows += staged
+        return staged
+
+    def apply(self):
+        """
+        Reconcile symtoken with the staged rows in one transaction.
+        Returns the number of inserted, updated and removed instruments.
+        """
+        staged = symtoken_staging.alias('staged')
+        live = symtoken
+
+        if not self.staged_rows:
+            # Never wipe the master contract because a download came back empty
+            logger.warning("No instruments staged, keeping the existing master contract")
+            symtoken_staging.drop(bind=engine, checkfirst=True)
+            return {'inserted': 0, 'updated': 0, 'removed': 0, 'total': 0}
+
+        with engine.begin() as conn:
+            removed = conn.execute(
+                delete(live).where(~exists().where(_same_instrument(staged, live)))
+            ).rowcount
+
+            changed = or_(*[staged.c[name].is_distinct_from(live.c[name]) for name in VALUE_COLUMNS])
+            updated = conn.execute(
+                update(live)
+                .where(exists().where(and_(_same_instrument(staged, live), changed)))
+                .values({
+                    name: select(staged.c[name])
+                    .where(_same_instrument(staged, live))
+                    .order_by(staged.c.id)
+                    .limit(1)
+                    .scalar_subquery()
+                    for name in VALUE_COLUMNS
+                })
+            ).rowcount
+
+            new_rows = (
+                select(*[staged.c[name] for name in SYMTOKEN_COLUMNS])
+                .where(~exists().where(_same_instrument(staged, live)))
+                .order_by(staged.c.id)
+            )
+            inserted = conn.execute(
+                insert(live).from_select(SYMTOKEN_COLUMNS, new_rows)
+            ).rowcount
+
+        symtoken_staging.drop(bind=engine, checkfirst=True)
+
+        counts = {'inserted': inserted, 'updated': updated, 'removed': removed, 'total': self.staged_rows}
+        print(f"Master contract refreshed: {inserted} inserted, {updated} updated, "
+              f"{removed} removed, {self.staged_rows} instruments staged")
+        return counts
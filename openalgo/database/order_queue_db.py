@@ -0,0 +1,165 @@
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, JSON, Text, update, delete
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import IntegrityError
+from database.auth_db import encrypt_token, decrypt_token
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Queued orders not placed within this time (e.g. across a long outage) are not replayed
+WEBHOOK_ORDER_REPLAY_MAX_AGE_SECONDS = int(os.getenv('WEBHOOK_ORDER_REPLAY_MAX_AGE_SECONDS', '300'))
+# Finished orders are kept this long for inspection
+WEBHOOK_ORDER_RETENTION_DAYS = int(os.getenv('WEBHOOK_ORDER_RETENTION_DAYS', '7'))
+
+# Use a separate database for the webhook order queue
+ORDER_QUEUE_DATABASE_URL = 'sqlite:///db/order_queue.db'
+
+order_queue_engine = create_engine(
+    ORDER_QUEUE_DATABASE_URL,
+    pool_size=50,
+    max_overflow=100,
+    pool_timeout=10
+)
+
+@event.listens_for(order_queue_engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Write-ahead log, synced on every commit so a queued order survives a crash"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=FULL')
+    cursor.close()
+
+order_queue_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=order_queue_engine))
+OrderQueueBase = declarative_base()
+OrderQueueBase.query = order_queue_session.query_property()
+
+# Order states
+PENDING = 'pending'          # Queued, not yet taken by a worker
+DISPATCHING = 'dispatching'  # Taken by a worker, outcome not yet recorded
+PLACED = 'placed'            # The order service accepted it
+PARTIAL = 'partial'          # Some legs of a basket were placed, others were rejected
+FAILED = 'failed'            # The order service rejected it
+EXPIRED = 'expired'          # Too old to replay after a restart
+
+class QueuedOrder(OrderQueueBase):
+    """Order queued by a webhook, kept until it is placed so a restart can replay it"""
+    __tablename__ = 'webhook_order_queue'
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String(255), unique=True, nullable=False)
+    source = Column(String(20), nullable=False)  # strategy, chartink
+    endpoint = Column(String(30), nullable=False)  # placeorder, placesmartorder
+    payload = Column(JSON, nullable=False)  # Order payload without the API key
+    apikey = Column(Text, nullable=False)  # Encrypted API key
+    status = Column(String(20), nullable=False, default=PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    response = Column(JSON)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def init_order_queue_db():
+    """Initialize the webhook order queue database"""
+    print("Initializing Order Queue DB")
+    os.makedirs('db', exist_ok=True)
+    OrderQueueBase.metadata.create_all(order_queue_engine)
+
+def enqueue_order(idempotency_key, source, endpoint, payload):
+    """
+    Record an order before it is queued in memory.
+    Returns the row id, or None if an order with this idempotency key was already queued.
+    """
+    now = _now()
+    order = QueuedOrder(
+        idempotency_key=idempotency_key,
+        source=source,
+        endpoint=endpoint,
+        payload={key: value for key, value in payload.items() if key != 'apikey'},
+        apikey=encrypt_token(payload.get('apikey') or ''),
+        status=PENDING,
+        created_at=now,
+        updated_at=now
+    )
+    try:
+        order_queue_session.add(order)
+        order_queue_session.commit()
+        return order.id
+    except IntegrityError:
+        order_queue_session.rollback()
+        return None
+    except Exception:
+        order_queue_session.rollback()
+        raise
+
+def claim_order(order_id):
+    """Mark a pending order as being dispatched; False if it was already taken"""
+    try:
+        result = order_queue_session.execute(
+            update(QueuedOrder)
+            .where(QueuedOrder.id == order_id, QueuedOrder.status == PENDING)
+            .values(status=DISPATCHING, attempts=QueuedOrder.attempts + 1, updated_at=_now())
+        )
+        order_queue_session.commit()
+        return result.rowcount == 1
+    except Exception:
+        order_queue_session.rollback()
+        raise
+
+def complete_order(order_id, status, response):
+    """Record the outcome of a dispatched order"""
+    try:
+        order_queue_session.execute(
+            update(QueuedOrder)
+            .where(QueuedOrder.id == order_id)
+            .values(status=status, response=response, updated_at=_now())
+        )
+        order_queue_session.commit()
+    except Exception as e:
+        order_queue_session.rollback()
+        logger.error(f"Error recording outcome of queued order {order_id}: {str(e)}")
+
+def load_undelivered_orders():
+    """
+    Orders a previous run queued but did not finish, oldest first, with their API key.
+    Orders that were being dispatched when it stopped are delivered again (at least
+    once); orders older than WEBHOOK_ORDER_REPLAY_MAX_AGE_SECONDS are expired instead.
+    """
+    now = _now()
+    try:
+        order_queue_session.execute(
+            update(QueuedOrder)
+            .where(QueuedOrder.status.in_((PENDING, DISPATCHING)),
+                   QueuedOrder.created_at < now - timedelta(seconds=WEBHOOK_ORDER_REPLAY_MAX_AGE_SECONDS))
+            .values(status=EXPIRED, updated_at=now)
+        )
+        order_queue_session.execute(
+            update(QueuedOrder)
+            .where(QueuedOrder.status == DISPATCHING)
+            .values(status=PENDING, updated_at=now)
+        )
+        order_queue_session.execute(
+            delete(QueuedOrder)
+            .where(QueuedOrder.status.in_((PLACED, PARTIAL, FAILED, EXPIRED)),
+                   QueuedOrder.updated_at < now - timedelta(days=WEBHOOK_ORDER_RETENTION_DAYS))
+        )
+        order_queue_session.commit()
+
+        orders = QueuedOrder.query.filter_by(status=PENDING).order_by(QueuedOrder.id).all()
+        return [{
+            'id': order.id,
+            'source': order.source,
+            'endpoint': order.endpoint,
+            'payload': dict(order.payload, apikey=decrypt_token(order.apikey)),
+            'queued_at': order.created_at.replace(tzinfo=timezone.utc).timestamp()
+        } for order in orders]
+    except Exception as e:
+        order_queue_session.rollback()
+        logger.error(f"Error loading queued orders: {str(e)}")
+        return []
+    finally:
+        order_queue_session.remove()
@@ -0,0 +1,82 @@
+# database/rollup.py
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_
+
+# Rollup resolutions, finest first
+RESOLUTIONS = ('minute', 'hour', 'day')
+
+def utc_now():
+    """Current UTC time as the naive datetime the log tables store"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def bucket_start(timestamp, resolution):
+    """Start of the minute, hour or day bucket a UTC timestamp falls in"""
+    timestamp = timestamp or utc_now()
+    if resolution == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def group_by_bucket(records, dimensions, summary_class):
+    """
+    Fold records into one summary per (resolution, bucket_start, *dimensions) key,
+    for every resolution. dimensions maps a record to its grouping values.
+    """
+    batch = {}
+    for record in records:
+        values = dimensions(record)
+        for resolution in RESOLUTIONS:
+            key = (resolution, bucket_start(record.get('timestamp'), resolution)) + values
+            summary = batch.get(key)
+            if summary is None:
+                summary = batch[key] = summary_class()
+            summary.add_record(record)
+    return batch
+
+def merge_rollups(conn, table, key_columns, batch):
+    """
+    Add the summaries in batch to their rollup rows in table, inserting rows that do
+    not exist yet. key_columns name the columns of each batch key, in key order.
+    """
+    if not batch:
+        return
+    existing = {}
+    # (resolution, bucket_start) leads the unique index of every rollup table; SQLite
+    # searches that index for an OR of these pairs but scans for a row-value IN
+    buckets = {key[:2] for key in batch}
+    rows = conn.execute(
+        table.select().where(or_(*(
+            and_(table.c.resolution == resolution, table.c.bucket_start == start)
+            for resolution, start in buckets
+        )))
+    ).mappings()
+    for row in rows:
+        existing[tuple(row[name] for name in key_columns)] = row
+
+    for key, summary in batch.items():
+        row = existing.get(key)
+        if row is not None:
+            summary.add(row)
+            conn.execute(table.update().where(table.c.id == row['id']).values(**summary.values()))
+        else:
+            conn.execute(table.insert().values(**dict(zip(key_columns, key)), **summary.values()))
+
+def prune_rollups(conn, table, retention_days):
+    """
+    Delete rollup rows older than the retention for their resolution, given as
+    {resolution: days}; resolutions without a retention are kept forever.
+    Returns the number of rows deleted.
+    """
+    removed = 0
+    now = utc_now()
+    for resolution, days in retention_days.items():
+        if not days:
+            continue
+        removed += conn.execute(
+            table.delete()
+            .where(table.c.resolution == resolution)
+            .where(table.c.bucket_start < now - timedelta(days=days))
+        ).rowcount
+    return removed
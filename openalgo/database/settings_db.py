@@ -3,6 +3,8 @@
 from sqlalchemy import create_engine, Column, Integer, String, Boolean, MetaData
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from cachetools import TTLCache
+import threading
 import os
 
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -18,6 +20,14 @@ db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind
 Base = declarative_base()
 Base.query = db_session.query_property()
 
+# Process-local copy of the analyze mode flag, read on every order service call.
+# set_analyze_mode updates it immediately in this process; the TTL bounds how long
+# any other worker process can keep serving the previous mode.
+analyze_mode_cache = TTLCache(maxsize=1, ttl=30)
+# Held across a cache miss's read and a write's commit, so a read of the old
+# mode never lands in the cache after set_analyze_mode has stored the new one
+analyze_mode_cache_lock = threading.Lock()
+
 class Settings(Base):
     __tablename__ = 'settings'
     id = Column(Integer, primary_key=True)
@@ -39,19 +49,27 @@ def init_db():
 
 def get_analyze_mode():
     """Get current analyze mode setting"""
-    settings = Settings.query.first()
-    if not settings:
-        settings = Settings(analyze_mode=False)  # Default to Live Mode
-        db_session.add(settings)
-        db_session.commit()
-    return settings.analyze_mode
+    with analyze_mode_cache_lock:
+        analyze_mode = analyze_mode_cache.get('analyze_mode')
+        if analyze_mode is not None:
+            return analyze_mode
+
+        settings = Settings.query.first()
+        if not settings:
+            settings = Settings(analyze_mode=False)  # Default to Live Mode
+            db_session.add(settings)
+            db_session.commit()
+        analyze_mode_cache['analyze_mode'] = settings.analyze_mode
+        return settings.analyze_mode
 
 def set_analyze_mode(mode: bool):
     """Set analyze mode setting"""
-    settings = Settings.query.first()
-    if not settings:
-        settings = Settings(analyze_mode=mode)
-        db_session.add(settings)
-    else:
-        settings.analyze_mode = mode
-    db_session.commit()
+    with analyze_mode_cache_lock:
+        settings = Settings.query.first()
+        if not settings:
+            settings = Settings(analyze_mode=mode)
+            db_session.add(settings)
+        else:
+            settings.analyze_mode = mode
+        db_session.commit()
+        analyze_mode_cache['analyze_mode'] = mode
@@ -47,6 +47,16 @@ def enhanced_search_symbols(query: str, exchange: str = None) -> List[SymToken]:
     try:
         # Split the query into terms and clean them
         terms = [term.strip().upper() for term in query.split() if term.strip()]
+
+        # Serve from the in-memory trigram index when it is available
+        from database.symbol_search import get_symbol_search_index
+        search_index = get_symbol_search_index()
+        if search_index is not None and len(search_index):
+            ids = search_index.search(terms, exchange, limit=50)
+            if not ids:
+                return []
+            rows = {row.id: row for row in SymToken.query.filter(SymToken.id.in_(ids)).all()}
+            return [rows[row_id] for row_id in ids if row_id in rows]
         
         # Base query
         base_query = SymToken.query
@@ -0,0 +1,117 @@
+import threading
+import logging
+from database.symbol import SymToken, db_session
+
+logger = logging.getLogger(__name__)
+
+class SymbolIndex:
+    """
+    Immutable in-memory snapshot of the master contract.
+
+    Columns are kept as tuples and each lookup key maps to a row position,
+    so every lookup is a single dict probe plus a tuple index.
+    """
+
+    __slots__ = ('generation', 'symbols', 'brsymbols', 'brexchanges', 'tokens',
+                 'by_symbol', 'by_brsymbol', 'by_token')
+
+    def __init__(self, rows, generation):
+        symbols, brsymbols, brexchanges, tokens = [], [], [], []
+        by_symbol, by_brsymbol, by_token = {}, {}, {}
+
+        for position, (symbol, brsymbol, exchange, brexchange, token) in enumerate(rows):
+            symbols.append(symbol)
+            brsymbols.append(brsymbol)
+            brexchanges.append(brexchange)
+            tokens.append(token)
+            # Keep the first row per key, matching the previous query(...).first() behaviour
+            by_symbol.setdefault((symbol, exchange), position)
+            by_brsymbol.setdefault((brsymbol, exchange), position)
+            by_token.setdefault((str(token), exchange), position)
+
+        self.generation = generation
+        self.symbols = tuple(symbols)
+        self.brsymbols = tuple(brsymbols)
+        self.brexchanges = tuple(brexchanges)
+        self.tokens = tuple(tokens)
+        self.by_symbol = by_symbol
+        self.by_brsymbol = by_brsymbol
+        self.by_token = by_token
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def get_token(self, symbol, exchange):
+        position = self.by_symbol.get((symbol, exchange))
+        return None if position is None else self.tokens[position]
+
+    def get_br_symbol(self, symbol, exchange):
+        position = self.by_symbol.get((symbol, exchange))
+        return None if position is None else self.brsymbols[position]
+
+    def get_brexchange(self, symbol, exchange):
+        position = self.by_symbol.get((symbol, exchange))
+        return None if position is None else self.brexchanges[position]
+
+    def get_oa_symbol(self, brsymbol, exchange):
+        position = self.by_brsymbol.get((brsymbol, exchange))
+        return None if position is None else self.symbols[position]
+
+    def get_symbol(self, token, exchange):
+        position = self.by_token.get((str(token), exchange))
+        return None if position is None else self.symbols[position]
+
+# Current snapshot; replaced as a whole, never mutated
+_symbol_index = None
+_generation = 0
+_build_lock = threading.Lock()
+
+def _load_rows():
+    """Read the lookup columns of the master contract in insertion order"""
+    return db_session.query(
+        SymToken.symbol,
+        SymToken.brsymbol,
+        SymToken.exchange,
+        SymToken.brexchange,
+        SymToken.token
+    ).order_by(SymToken.id).all()
+
+def reload_symbol_index(only_if_missing=False):
+    """
+    Rebuild the symbol index from the master contract table and swap it in atomically.
+    Should be called once the master contract download has completed.
+    """
+    global _symbol_index, _generation
+
+    with _build_lock:
+        if only_if_missing and _symbol_index is not None:
+            return _symbol_index
+
+        try:
+            rows = _load_rows()
+        except Exception as e:
+            logger.error(f"Error loading master contract into symbol index: {e}")
+            return _symbol_index
+
+        if not rows and _symbol_index is not None and len(_symbol_index):
+            # Keep serving the previous snapshot rather than going blind on an empty table
+            logger.warning("Master contract table is empty, keeping the previous symbol index")
+            return _symbol_index
+
+        index = SymbolIndex(rows, _generation + 1)
+        _generation = index.generation
+        _symbol_index = index
+
+    logger.info(f"Symbol index generation {index.generation} loaded with {len(index)} instruments")
+    return index
+
+def get_symbol_index():
+    """Return the current symbol index, building it on first use"""
+    index = _symbol_index
+    if index is None:
+        index = reload_symbol_index(only_if_missing=True)
+    return index
+
+def get_symbol_index_generation():
+    """Generation of the current symbol index; changes every time the index is swapped"""
+    return _generation
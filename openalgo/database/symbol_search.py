@@ -0,0 +1,247 @@
+import heapq
+import threading
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from database.symbol import SymToken, db_session
+from database.symbol_index import get_symbol_index_generation, reload_symbol_index
+
+logger = logging.getLogger(__name__)
+
+# Expiry formats written by the broker master contract loaders
+EXPIRY_FORMATS = ('%d-%b-%y', '%d-%b-%Y', '%d%b%y', '%Y-%m-%d', '%d-%m-%Y')
+
+# Separates the searchable fields of a row so no trigram spans two fields
+FIELD_SEPARATOR = '\x00'
+
+def _parse_expiry(expiry):
+    """Convert an expiry string to a date ordinal, 0 when the instrument does not expire"""
+    if not expiry:
+        return 0
+    for fmt in EXPIRY_FORMATS:
+        try:
+            return datetime.strptime(expiry, fmt).toordinal()
+        except ValueError:
+            continue
+    return 0
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2) if FIELD_SEPARATOR not in text[i:i + 3]}
+
+class SymbolSearchIndex:
+    """
+    Trigram inverted index over the searchable master contract fields.
+
+    Each row is reduced to one upper-cased haystack of symbol, brsymbol, name
+    and token; postings map every trigram to the positions of the rows containing it.
+    Row positions are also kept sorted by symbol, so the rows whose symbol starts
+    with a term of any length are one contiguous range found by bisection.
+    """
+
+    def __init__(self, rows, generation):
+        ids, haystacks, symbols, exchanges, strikes, expiries = [], [], [], [], [], []
+        postings = {}
+        strike_rows = {}
+        expiry_cache = {}
+
+        for position, (row_id, symbol, brsymbol, name, exchange, token, expiry, strike) in enumerate(rows):
+            symbol = (symbol or '').upper()
+            haystack = FIELD_SEPARATOR.join(
+                (symbol, (brsymbol or '').upper(), (name or '').upper(), str(token or '').upper())
+            )
+
+            ids.append(row_id)
+            haystacks.append(haystack)
+            symbols.append(symbol)
+            exchanges.append(exchange)
+            strikes.append(strike)
+
+            if expiry not in expiry_cache:
+                expiry_cache[expiry] = _parse_expiry(expiry)
+            expiries.append(expiry_cache[expiry])
+
+            for gram in _trigrams(haystack):
+                gram_rows = postings.get(gram)
+                if gram_rows is None:
+                    gram_rows = postings[gram] = array('I')
+                gram_rows.append(position)
+
+            if strike is not None:
+                strike_rows.setdefault(strike, array('I')).append(position)
+
+        self.generation = generation
+        self.ids = tuple(ids)
+        self.haystacks = tuple(haystacks)
+        self.symbols = tuple(symbols)
+        self.exchanges = tuple(exchanges)
+        self.strikes = tuple(strikes)
+        self.expiries = tuple(expiries)
+        self.postings = postings
+        self.strike_rows = strike_rows
+        self.symbol_order = array('I', sorted(range(len(symbols)), key=symbols.__getitem__))
+        self.sorted_symbols = tuple(symbols[position] for position in self.symbol_order)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _term_candidates(self, term, num_term):
+        """Rows that can contain the term, or None when the term is too short to narrow down"""
+        if len(term) < 3:
+            return None
+
+        gram_rows = []
+        for gram in _trigrams(term):
+            rows = self.postings.get(gram)
+            if rows is None:
+                gram_rows = []
+                break
+            gram_rows.append(rows)
+
+        candidates = set()
+        if gram_rows:
+            gram_rows.sort(key=len)
+            candidates = set(gram_rows[0])
+            for rows in gram_rows[1:]:
+                candidates.intersection_update(rows)
+                if not candidates:
+                    break
+
+        if num_term is not None:
+            candidates.update(self.strike_rows.get(num_term, ()))
+        return candidates
+
+    def _prefix_range(self, term):
+        """Bounds in symbol_order of the rows whose symbol starts with the term"""
+        low = bisect_left(self.sorted_symbols, term)
+        high = bisect_left(self.sorted_symbols, term[:-1] + chr(ord(term[-1]) + 1), low)
+        return low, high
+
+    def _matches(self, position, parsed_terms, exchange):
+        """Every term is in the row's fields, or a numeric term equals its strike"""
+        if exchange and self.exchanges[position] != exchange:
+            return False
+        haystack = self.haystacks[position]
+        return all(term in haystack or (num_term is not None and self.strikes[position] == num_term)
+                   for term, num_term in parsed_terms)
+
+    def _rank_key(self, position, terms):
+        """
+        Exact symbol > symbol prefix > symbol substring > other fields, then nearest
+        expiry; ties keep master contract order
+        """
+        symbol = self.symbols[position]
+        match_class = 3
+        for term in terms:
+            if symbol == term:
+                match_class = 0
+                break
+            if symbol.startswith(term):
+                match_class = min(match_class, 1)
+            elif term in symbol:
+                match_class = min(match_class, 2)
+        return (match_class, self.expiries[position], len(symbol), symbol, position)
+
+    def search(self, terms, exchange=None, limit=50):
+        """Return the ids of the best matching rows, best first"""
+        parsed_terms = []
+        for term in terms:
+            try:
+                parsed_terms.append((term, float(term)))
+            except ValueError:
+                parsed_terms.append((term, None))
+
+        candidates = None
+        for term, num_term in parsed_terms:
+            term_candidates = self._term_candidates(term, num_term)
+            if term_candidates is None:
+                continue
+            if candidates is None:
+                candidates = term_candidates
+            else:
+                candidates &= term_candidates
+            if not candidates:
+                return []
+
+        if terms:
+            # Exact and prefix symbol matches rank above every other match, so when
+            # they alone fill the limit the substring scan is skipped. Worth trying
+            # unless the trigram candidates are already the smaller set.
+            ranges = [self._prefix_range(term) for term in terms]
+            if candidates is None or sum(high - low for low, high in ranges) < len(candidates):
+                prefixed = set()
+                for low, high in ranges:
+                    prefixed.update(self.symbol_order[low:high])
+                matches = [position for position in prefixed if self._matches(position, parsed_terms, exchange)]
+                if len(matches) >= limit:
+                    best = heapq.nsmallest(limit, matches, key=lambda position: self._rank_key(position, terms))
+                    return [self.ids[position] for position in best]
+
+        positions = range(len(self.ids)) if candidates is None else candidates
+        matches = [position for position in positions if self._matches(position, parsed_terms, exchange)]
+
+        if not terms:
+            # No terms to rank by, keep master contract order
+            best = sorted(matches)[:limit]
+        else:
+            best = heapq.nsmallest(limit, matches, key=lambda position: self._rank_key(position, terms))
+        return [self.ids[position] for position in best]
+
+# Current search index; replaced as a whole, never mutated
+_search_index = None
+_build_lock = threading.Lock()
+
+def _load_rows():
+    """Read the searchable columns of the master contract in insertion order"""
+    return db_session.query(
+        SymToken.id,
+        SymToken.symbol,
+        SymToken.brsymbol,
+        SymToken.name,
+        SymToken.exchange,
+        SymToken.token,
+        SymToken.expiry,
+        SymToken.strike
+    ).order_by(SymToken.id).all()
+
+def reload_symbol_search_index():
+    """
+    Rebuild the search index from the master contract table and swap it in atomically.
+    Tagged with the symbol index generation it was built against.
+    """
+    global _search_index
+
+    with _build_lock:
+        generation = get_symbol_index_generation()
+        if _search_index is not None and _search_index.generation == generation:
+            return _search_index
+
+        try:
+            rows = _load_rows()
+        except Exception as e:
+            logger.error(f"Error loading master contract into search index: {e}")
+            return _search_index
+
+        index = SymbolSearchIndex(rows, generation)
+        _search_index = index
+
+    logger.info(f"Symbol search index built with {len(index)} instruments and {len(index.postings)} trigrams")
+    return index
+
+def load_symbol_indexes():
+    """
+    Build the symbol index and search index from the stored master contract, so the
+    first lookup or search after a restart does not pay for the build
+    """
+    try:
+        reload_symbol_index(only_if_missing=True)
+        reload_symbol_search_index()
+    finally:
+        db_session.remove()
+
+def get_symbol_search_index():
+    """Return the search index, rebuilding it when the symbol index has moved on"""
+    index = _search_index
+    if index is None or index.generation != get_symbol_index_generation():
+        index = reload_symbol_search_index()
+    return index
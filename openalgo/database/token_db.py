@@ -1,24 +1,17 @@
 from database.symbol import SymToken  # Import here to avoid circular imports
-from cachetools import TTLCache
-
-# Define a cache for the tokens, symbols with a max size and a 3600-second TTL
-token_cache = TTLCache(maxsize=1024, ttl=3600)
+from database.symbol_index import get_symbol_index
+from utils.spans import traced, SYMBOL_MAP
 
+@traced(SYMBOL_MAP)
 def get_token(symbol, exchange):
     """
-    Retrieves a token for a given symbol and exchange, utilizing a cache to improve performance.
+    Retrieves a token for a given symbol and exchange from the in-memory symbol index.
     """
-    cache_key = f"{symbol}-{exchange}"
-    # Attempt to retrieve from cache
-    if cache_key in token_cache:
-        return token_cache[cache_key]
-    else:
-        # Query database if not in cache
-        token = get_token_dbquery(symbol, exchange)
-        # Cache the result for future requests
-        if token is not None:
-            token_cache[cache_key] = token
-        return token
+    index = get_symbol_index()
+    if index is not None:
+        return index.get_token(symbol, exchange)
+    # Fall back to the database if the index could not be loaded
+    return get_token_dbquery(symbol, exchange)
 
 def get_token_dbquery(symbol, exchange):
     """
@@ -37,21 +30,16 @@ def get_token_dbquery(symbol, exchange):
     
 
 
+@traced(SYMBOL_MAP)
 def get_symbol(token, exchange):
     """
-    Retrieves a symbol for a given token and exchange, utilizing a cache to improve performance.
+    Retrieves a symbol for a given token and exchange from the in-memory symbol index.
     """
-    cache_key = f"{token}-{exchange}"
-    # Attempt to retrieve from cache
-    if cache_key in token_cache:
-        return token_cache[cache_key]
-    else:
-        # Query database if not in cache
-        symbol = get_symbol_dbquery(token, exchange)
-        # Cache the result for future requests
-        if symbol is not None:
-            token_cache[cache_key] = symbol
-        return symbol
+    index = get_symbol_index()
+    if index is not None:
+        return index.get_symbol(token, exchange)
+    # Fall back to the database if the index could not be loaded
+    return get_symbol_dbquery(token, exchange)
 
 def get_symbol_dbquery(token, exchange):
     """
@@ -68,21 +56,16 @@ def get_symbol_dbquery(token, exchange):
         return None
 
 
+@traced(SYMBOL_MAP)
 def get_oa_symbol(symbol, exchange):
     """
-    Retrieves a symbol for a given token and exchange, utilizing a cache to improve performance.
+    Retrieves the OpenAlgo symbol for a given broker symbol and exchange from the in-memory symbol index.
     """
-    cache_key = f"oa{symbol}-{exchange}"
-    # Attempt to retrieve from cache
-    if cache_key in token_cache:
-        return token_cache[cache_key]
-    else:
-        # Query database if not in cache
-        oasymbol = get_oa_symbol_dbquery(symbol, exchange)
-        # Cache the result for future requests
-        if oasymbol is not None:
-            token_cache[cache_key] = oasymbol
-        return oasymbol
+    index = get_symbol_index()
+    if index is not None:
+        return index.get_oa_symbol(symbol, exchange)
+    # Fall back to the database if the index could not be loaded
+    return get_oa_symbol_dbquery(symbol, exchange)
 
 def get_oa_symbol_dbquery(symbol, exchange):
     """
@@ -99,21 +82,16 @@ def get_oa_symbol_dbquery(symbol, exchange):
         return None
 
 
+@traced(SYMBOL_MAP)
 def get_br_symbol(symbol, exchange):
     """
-    Retrieves a symbol for a given token and exchange, utilizing a cache to improve performance.
+    Retrieves the broker symbol for a given symbol and exchange from the in-memory symbol index.
     """
-    cache_key = f"br{symbol}-{exchange}"
-    # Attempt to retrieve from cache
-    if cache_key in token_cache:
-        return token_cache[cache_key]
-    else:
-        # Query database if not in cache
-        brsymbol = get_br_symbol_dbquery(symbol, exchange)
-        # Cache the result for future requests
-        if brsymbol is not None:
-            token_cache[cache_key] = brsymbol
-        return brsymbol
+    index = get_symbol_index()
+    if index is not None:
+        return index.get_br_symbol(symbol, exchange)
+    # Fall back to the database if the index could not be loaded
+    return get_br_symbol_dbquery(symbol, exchange)
 
 def get_br_symbol_dbquery(symbol, exchange):
     """
@@ -129,21 +107,16 @@ def get_br_symbol_dbquery(symbol, exchange):
         print(f"Error while querying the database: {e}")
         return None
 
+@traced(SYMBOL_MAP)
 def get_brexchange(symbol, exchange):
     """
-    Retrieves the broker exchange for a given symbol and exchange, utilizing a cache to improve performance.
+    Retrieves the broker exchange for a given symbol and exchange from the in-memory symbol index.
     """
-    cache_key = f"brex-{symbol}-{exchange}"
-    # Attempt to retrieve from cache
-    if cache_key in token_cache:
-        return token_cache[cache_key]
-    else:
-        # Query database if not in cache
-        brexchange = get_brexchange_dbquery(symbol, exchange)
-        # Cache the result for future requests
-        if brexchange is not None:
-            token_cache[cache_key] = brexchange
-        return brexchange
+    index = get_symbol_index()
+    if index is not None:
+        return index.get_brexchange(symbol, exchange)
+    # Fall back to the database if the index could not be loaded
+    return get_brexchange_dbquery(symbol, exchange)
 
 def get_brexchange_dbquery(symbol, exchange):
     """
@@ -157,4 +130,79 @@ def get_brexchange_dbquery(symbol, exchange):
             return None
     except Exception as e:
         print(f"Error while querying the database: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _bulk_dbquery(key_column, value_column, pairs):
+    """
+    Resolves many (key, exchange) pairs with a single IN query.
+    Used only when the symbol index is unavailable.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return {}
+    try:
+        rows = SymToken.query.with_entities(key_column, SymToken.exchange, value_column).filter(
+            key_column.in_({str(key) for key, _ in pairs}),
+            SymToken.exchange.in_({exchange for _, exchange in pairs})
+        ).order_by(SymToken.id).all()
+    except Exception as e:
+        print(f"Error while querying the database: {e}")
+        return {}
+
+    found = {}
+    for key, exchange, value in rows:
+        found.setdefault((str(key), exchange), value)
+
+    results = {}
+    for key, exchange in pairs:
+        value = found.get((str(key), exchange))
+        if value is not None:
+            results[(key, exchange)] = value
+    return results
+
+def _bulk_lookup(pairs, index_lookup, key_column, value_column):
+    """Resolves unique pairs through the symbol index, falling back to one bulk query"""
+    pairs = {(key, exchange) for key, exchange in pairs if key}
+    index = get_symbol_index()
+    if index is None:
+        return _bulk_dbquery(key_column, value_column, pairs)
+
+    lookup = getattr(index, index_lookup)
+    results = {}
+    for key, exchange in pairs:
+        value = lookup(key, exchange)
+        if value is not None:
+            results[(key, exchange)] = value
+    return results
+
+@traced(SYMBOL_MAP)
+def get_tokens(pairs):
+    """
+    Retrieves tokens for many (symbol, exchange) pairs in one call.
+    Returns a dict keyed by (symbol, exchange); unresolved pairs are left out.
+    """
+    return _bulk_lookup(pairs, 'get_token', SymToken.symbol, SymToken.token)
+
+@traced(SYMBOL_MAP)
+def get_symbols(pairs):
+    """
+    Retrieves symbols for many (token, exchange) pairs in one call.
+    Returns a dict keyed by (token, exchange); unresolved pairs are left out.
+    """
+    return _bulk_lookup(pairs, 'get_symbol', SymToken.token, SymToken.symbol)
+
+@traced(SYMBOL_MAP)
+def get_oa_symbols(pairs):
+    """
+    Retrieves OpenAlgo symbols for many (broker symbol, exchange) pairs in one call.
+    Returns a dict keyed by (broker symbol, exchange); unresolved pairs are left out.
+    """
+    return _bulk_lookup(pairs, 'get_oa_symbol', SymToken.brsymbol, SymToken.symbol)
+
+@traced(SYMBOL_MAP)
+def get_br_symbols(pairs):
+    """
+    Retrieves broker symbols for many (symbol, exchange) pairs in one call.
+    Returns a dict keyed by (symbol, exchange); unresolved pairs are left out.
+    """
+    return _bulk_lookup(pairs, 'get_br_symbol', SymToken.symbol, SymToken.brsymbol)
@@ -1,13 +1,21 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text, UniqueConstraint, select
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from utils.batch_writer import BatchWriter
+from utils.quantile_sketch import QuantileSketch
+from database.rollup import group_by_bucket, merge_rollups, prune_rollups
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Background writer settings for request logging
+TRAFFIC_LOG_QUEUE_SIZE = int(os.getenv('TRAFFIC_LOG_QUEUE_SIZE', '10000'))
+TRAFFIC_LOG_BATCH_SIZE = int(os.getenv('TRAFFIC_LOG_BATCH_SIZE', '500'))
+TRAFFIC_LOG_FLUSH_INTERVAL_MS = int(os.getenv('TRAFFIC_LOG_FLUSH_INTERVAL_MS', '500'))
+
 # Use a separate database for logs
 LOGS_DATABASE_URL = 'sqlite:///db/logs.db'
 
@@ -59,6 +67,32 @@ class TrafficLog(LogBase):
             logs_session.rollback()
             return False
 
+    @staticmethod
+    def log_requests(records):
+        """Insert a batch of request records and fold them into the rollups in one transaction"""
+        with logs_engine.begin() as conn:
+            conn.execute(TrafficLog.__table__.insert(), records)
+            TrafficRollup.merge_records(conn, records)
+
+    @staticmethod
+    def queue_request(client_ip, method, path, status_code, duration_ms, host=None, error=None, user_id=None):
+        """
+        Hand a request to the background writer instead of committing it inline.
+        Returns False if the record was dropped because the buffer is full.
+        """
+        return traffic_log_writer.submit({
+            # Stamped now, like the server default would have been at insert time
+            'timestamp': datetime.now(timezone.utc).replace(tzinfo=None),
+            'client_ip': client_ip,
+            'method': method,
+            'path': path,
+            'status_code': status_code,
+            'duration_ms': duration_ms,
+            'host': host,
+            'error': error,
+            'user_id': user_id
+        })
+
     @staticmethod
     def get_recent_logs(limit=100):
         """Get recent traffic logs ordered by timestamp"""
@@ -70,18 +104,13 @@ class TrafficLog(LogBase):
 
     @staticmethod
     def get_stats():
-        """Get basic traffic statistics"""
+        """Get basic traffic statistics, answered from the daily rollups"""
         try:
-            from sqlalchemy import func
-            
-            total_requests = TrafficLog.query.count()
-            error_requests = TrafficLog.query.filter(TrafficLog.status_code >= 400).count()
-            avg_duration = logs_session.query(func.avg(TrafficLog.duration_ms)).scalar() or 0
-            
+            totals = TrafficRollup.summarize(TrafficRollup.get_path_totals())
             return {
-                'total_requests': total_requests,
-                'error_requests': error_requests,
-                'avg_duration': round(float(avg_duration), 2)
+                'total_requests': totals['total_requests'],
+                'error_requests': totals['error_requests'],
+                'avg_duration': totals['avg_duration']
             }
         except Exception as e:
             logger.error(f"Error getting traffic stats: {str(e)}")
@@ -91,6 +120,154 @@ class TrafficLog(LogBase):
                 'avg_duration': 0
             }
 
+class TrafficRollup(LogBase):
+    """
+    Per minute, hour and day request totals for each path, maintained as requests
+    are written and kept after the raw traffic_logs rows are pruned
+    """
+    __tablename__ = 'traffic_rollups'
+
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String(10), nullable=False)  # minute, hour or day
+    bucket_start = Column(DateTime, nullable=False)  # UTC start of the bucket
+    path = Column(String(500), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0)
+    duration_min = Column(Float)
+    duration_max = Column(Float)
+    duration_sketch = Column(Text)  # QuantileSketch of duration_ms as JSON
+
+    __table_args__ = (
+        UniqueConstraint('resolution', 'bucket_start', 'path', name='uq_traffic_rollup_bucket'),
+    )
+
+    KEY_COLUMNS = ('resolution', 'bucket_start', 'path')
+
+    @staticmethod
+    def merge_records(conn, records):
+        """Fold request records into their rollup rows using conn's transaction"""
+        batch = group_by_bucket(records, lambda record: (record.get('path') or '',), TrafficSummary)
+        merge_rollups(conn, TrafficRollup.__table__, TrafficRollup.KEY_COLUMNS, batch)
+
+    @staticmethod
+    def rebuild():
+        """Recompute every rollup from traffic_logs; run by upgrade/build_log_rollups.py"""
+        columns = [TrafficLog.timestamp, TrafficLog.path, TrafficLog.status_code, TrafficLog.duration_ms]
+        with logs_engine.begin() as conn:
+            conn.execute(TrafficRollup.__table__.delete())
+            result = conn.execute(select(*columns).execution_options(yield_per=10000))
+            for rows in result.mappings().partitions():
+                TrafficRollup.merge_records(conn, [dict(row) for row in rows])
+
+    @staticmethod
+    def get_path_totals(resolution='day', since=None):
+        """Request count, error count and duration sum per path, one row per path"""
+        query = logs_session.query(
+            TrafficRollup.path,
+            func.sum(TrafficRollup.count),
+            func.sum(TrafficRollup.error_count),
+            func.sum(TrafficRollup.duration_sum)
+        ).filter(TrafficRollup.resolution == resolution)
+        if since is not None:
+            query = query.filter(TrafficRollup.bucket_start >= since)
+        return query.group_by(TrafficRollup.path).all()
+
+    @staticmethod
+    def summarize(path_totals, prefix=None):
+        """Totals over the paths from get_path_totals that start with prefix"""
+        total = errors = duration = 0
+        for path, count, error_count, duration_sum in path_totals:
+            if prefix is None or path.startswith(prefix):
+                total += count or 0
+                errors += error_count or 0
+                duration += duration_sum or 0
+        return {
+            'total_requests': total,
+            'error_requests': errors,
+            'avg_duration': round(float(duration / total), 2) if total else 0
+        }
+
+    @staticmethod
+    def get_duration_percentiles(path_prefix=None, resolution='day', since=None):
+        """p50/p90/p99 request duration merged from the rollup sketches"""
+        query = TrafficRollup.query.filter_by(resolution=resolution)
+        if path_prefix:
+            query = query.filter(TrafficRollup.path.startswith(path_prefix))
+        if since is not None:
+            query = query.filter(TrafficRollup.bucket_start >= since)
+        sketch = QuantileSketch()
+        for (data,) in query.with_entities(TrafficRollup.duration_sketch):
+            sketch.merge(QuantileSketch.from_json(data))
+        return {
+            'p50_duration': round(sketch.quantile(0.5), 2),
+            'p90_duration': round(sketch.quantile(0.9), 2),
+            'p99_duration': round(sketch.quantile(0.99), 2)
+        }
+
+class TrafficSummary:
+    """Running totals and duration sketch for a set of requests or rollup rows"""
+
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.duration_sum = 0.0
+        self.duration_min = None
+        self.duration_max = None
+        self.sketch = QuantileSketch()
+
+    def _extend_range(self, low, high):
+        if low is not None:
+            self.duration_min = low if self.duration_min is None else min(self.duration_min, low)
+        if high is not None:
+            self.duration_max = high if self.duration_max is None else max(self.duration_max, high)
+
+    def add_record(self, record):
+        duration = record.get('duration_ms') or 0
+        self.count += 1
+        self.error_count += 1 if (record.get('status_code') or 0) >= 400 else 0
+        self.duration_sum += duration
+        self._extend_range(duration, duration)
+        self.sketch.add(duration)
+
+    def add(self, row):
+        """Merge a rollup row"""
+        self.count += row['count']
+        self.error_count += row['error_count']
+        self.duration_sum += row['duration_sum']
+        self._extend_range(row['duration_min'], row['duration_max'])
+        self.sketch.merge(QuantileSketch.from_json(row['duration_sketch']))
+
+    def values(self):
+        return {
+            'count': self.count,
+            'error_count': self.error_count,
+            'duration_sum': self.duration_sum,
+            'duration_min': self.duration_min,
+            'duration_max': self.duration_max,
+            'duration_sketch': self.sketch.to_json()
+        }
+
+def prune_traffic_logs(before, rollup_retention_days):
+    """
+    Delete raw request rows logged before the given UTC time and rollups past
+    their retention. Returns the number of raw and rollup rows removed.
+    """
+    with logs_engine.begin() as conn:
+        raw = conn.execute(
+            TrafficLog.__table__.delete().where(TrafficLog.timestamp < before)
+        ).rowcount
+        rollups = prune_rollups(conn, TrafficRollup.__table__, rollup_retention_days)
+    return raw, rollups
+
+traffic_log_writer = BatchWriter(
+    'traffic_log',
+    TrafficLog.log_requests,
+    max_queue=TRAFFIC_LOG_QUEUE_SIZE,
+    batch_size=TRAFFIC_LOG_BATCH_SIZE,
+    flush_interval=TRAFFIC_LOG_FLUSH_INTERVAL_MS / 1000
+)
+
 def init_logs_db():
     """Initialize the logs database"""
     # Create db directory if it doesn't exist
@@ -98,3 +275,9 @@ def init_logs_db():
     
     print("Initializing Traffic Logs DB")
     LogBase.metadata.create_all(bind=logs_engine)
+
+    # Requests logged before the rollups table existed are rolled up by an upgrade
+    # script, not here: rebuilding holds the write lock for the whole table
+    if TrafficRollup.query.first() is None and TrafficLog.query.first() is not None:
+        logger.warning("Traffic rollups missing for existing logs, run upgrade/build_log_rollups.py")
+    logs_session.remove()
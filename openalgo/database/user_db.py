@@ -9,6 +9,7 @@ from cachetools import TTLCache
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 import pyotp
+from utils.metrics import password_hash_verify_duration
 
 # Initialize Argon2 hasher
 ph = PasswordHasher()
@@ -44,7 +45,8 @@ class User(Base):
         """Verify password using Argon2 with pepper"""
         peppered_password = password + PASSWORD_PEPPER
         try:
-            ph.verify(self.password_hash, peppered_password)
+            with password_hash_verify_duration.time(kind='password'):
+                ph.verify(self.password_hash, peppered_password)
             # Check if the hash needs to be updated
             if ph.check_needs_rehash(self.password_hash):
                 self.set_password(password)
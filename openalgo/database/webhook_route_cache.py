@@ -0,0 +1,46 @@
+from cachetools import TTLCache
+from types import SimpleNamespace
+import threading
+
+def snapshot(row):
+    """Plain copy of a model row's columns, safe to keep after the session is gone"""
+    return SimpleNamespace(**{column.name: getattr(row, column.name) for column in row.__table__.columns})
+
+class WebhookRoute:
+    """A strategy and its symbol mappings, as needed to route a webhook alert"""
+
+    def __init__(self, strategy, mappings):
+        self.strategy = strategy  # snapshot of the strategy row
+        self.mappings = mappings  # symbol -> snapshot of its mapping row
+
+class WebhookRouteCache:
+    """
+    webhook_id -> WebhookRoute, filled on first use by load(webhook_id) and cleared
+    by invalidate() on every strategy or mapping write. A route loaded while a
+    write happened is not kept, so a webhook never sees configuration older than
+    the last write. The TTL only bounds edits made outside the application.
+    """
+
+    def __init__(self, load, maxsize=1024, ttl=3600):
+        self.load = load
+        self.routes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, webhook_id):
+        with self.lock:
+            route = self.routes.get(webhook_id)
+            generation = self.generation
+        if route is not None:
+            return route
+        route = self.load(webhook_id)
+        if route is not None:
+            with self.lock:
+                if generation == self.generation:
+                    self.routes[webhook_id] = route
+        return route
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+            self.routes.clear()
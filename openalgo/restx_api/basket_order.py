@@ -8,8 +8,9 @@ import traceback
 import copy
 
 from restx_api.schemas import BasketOrderSchema
+from utils.spans import span, SCHEMA_VALIDATE
 from services.basket_order_service import place_basket_order
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from services.basket_order_service import emit_analyzer_error
 
@@ -33,13 +34,14 @@ class BasketOrder(Resource):
             
             # Validate and deserialize input
             try:
-                basket_data = basket_schema.load(data)
+                with span(SCHEMA_VALIDATE):
+                    basket_data = basket_schema.load(data)
             except ValidationError as err:
                 error_message = str(err.messages)
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                log_executor.submit(async_log_order, 'basketorder', data, error_response)
+                async_log_order('basketorder', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -60,5 +62,5 @@ class BasketOrder(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            log_executor.submit(async_log_order, 'basketorder', data, error_response)
+            async_log_order('basketorder', data, error_response)
             return make_response(jsonify(error_response), 500)
@@ -7,8 +7,9 @@ import logging
 import traceback
 
 from restx_api.schemas import CancelAllOrderSchema
+from utils.spans import span, SCHEMA_VALIDATE
 from services.cancel_all_order_service import cancel_all_orders, emit_analyzer_error
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -31,13 +32,14 @@ class CancelAllOrder(Resource):
             
             # Validate and deserialize input
             try:
-                order_data = cancel_all_order_schema.load(data)
+                with span(SCHEMA_VALIDATE):
+                    order_data = cancel_all_order_schema.load(data)
             except ValidationError as err:
                 error_message = str(err.messages)
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                executor.submit(async_log_order, 'cancelallorder', data, error_response)
+                async_log_order('cancelallorder', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -58,7 +60,7 @@ class CancelAllOrder(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
             error_response = {'status': 'error', 'message': error_message}
-            executor.submit(async_log_order, 'cancelallorder', data, error_response)
+            async_log_order('cancelallorder', data, error_response)
             return make_response(jsonify(error_response), 400)
             
         except Exception as e:
@@ -68,5 +70,5 @@ class CancelAllOrder(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            executor.submit(async_log_order, 'cancelallorder', data, error_response)
+            async_log_order('cancelallorder', data, error_response)
             return make_response(jsonify(error_response), 500)
@@ -7,8 +7,9 @@ import logging
 import traceback
 
 from restx_api.schemas import ClosePositionSchema
+from utils.spans import span, SCHEMA_VALIDATE
 from services.close_position_service import close_position, emit_analyzer_error
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -31,13 +32,14 @@ class ClosePosition(Resource):
             
             # Validate and deserialize input
             try:
-                position_data = close_position_schema.load(data)
+                with span(SCHEMA_VALIDATE):
+                    position_data = close_position_schema.load(data)
             except ValidationError as err:
                 error_message = str(err.messages)
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                executor.submit(async_log_order, 'closeposition', data, error_response)
+                async_log_order('closeposition', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -58,7 +60,7 @@ class ClosePosition(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
             error_response = {'status': 'error', 'message': error_message}
-            executor.submit(async_log_order, 'closeposition', data, error_response)
+            async_log_order('closeposition', data, error_response)
             return make_response(jsonify(error_response), 400)
             
         except Exception as e:
@@ -68,5 +70,5 @@ class ClosePosition(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            executor.submit(async_log_order, 'closeposition', data, error_response)
+            async_log_order('closeposition', data, error_response)
             return make_response(jsonify(error_response), 500)
@@ -8,7 +8,7 @@ import traceback
 
 from restx_api.account_schema import OpenPositionSchema
 from services.openposition_service import get_open_position, emit_analyzer_error
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -37,7 +37,7 @@ class OpenPosition(Resource):
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                log_executor.submit(async_log_order, 'openposition', data, error_response)
+                async_log_order('openposition', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -58,5 +58,5 @@ class OpenPosition(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            log_executor.submit(async_log_order, 'openposition', data, error_response)
+            async_log_order('openposition', data, error_response)
             return make_response(jsonify(error_response), 500)
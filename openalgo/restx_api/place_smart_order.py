@@ -7,8 +7,9 @@ import logging
 import traceback
 
 from restx_api.schemas import SmartOrderSchema
+from utils.spans import span, SCHEMA_VALIDATE
 from services.place_smart_order_service import place_smart_order, emit_analyzer_error
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -32,13 +33,14 @@ class SmartOrder(Resource):
 
             # Validate and deserialize input
             try:
-                order_data = smart_order_schema.load(data)
+                with span(SCHEMA_VALIDATE):
+                    order_data = smart_order_schema.load(data)
             except ValidationError as err:
                 error_message = str(err.messages)
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                executor.submit(async_log_order, 'placesmartorder', data, error_response)
+                async_log_order('placesmartorder', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -60,5 +62,5 @@ class SmartOrder(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            executor.submit(async_log_order, 'placesmartorder', data, error_response)
+            async_log_order('placesmartorder', data, error_response)
             return make_response(jsonify(error_response), 500)
@@ -7,8 +7,9 @@ import logging
 import traceback
 
 from restx_api.schemas import SplitOrderSchema
+from utils.spans import span, SCHEMA_VALIDATE
 from services.split_order_service import split_order, emit_analyzer_error
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -31,13 +32,14 @@ class SplitOrder(Resource):
 
             # Validate and deserialize input
             try:
-                split_data = split_schema.load(data)
+                with span(SCHEMA_VALIDATE):
+                    split_data = split_schema.load(data)
             except ValidationError as err:
                 error_message = str(err.messages)
                 if get_analyze_mode():
                     return make_response(jsonify(emit_analyzer_error(data, error_message)), 400)
                 error_response = {'status': 'error', 'message': error_message}
-                log_executor.submit(async_log_order, 'splitorder', data, error_response)
+                async_log_order('splitorder', data, error_response)
                 return make_response(jsonify(error_response), 400)
 
             # Extract API key
@@ -58,5 +60,5 @@ class SplitOrder(Resource):
             if get_analyze_mode():
                 return make_response(jsonify(emit_analyzer_error(data, error_message)), 500)
             error_response = {'status': 'error', 'message': error_message}
-            log_executor.submit(async_log_order, 'splitorder', data, error_response)
+            async_log_order('splitorder', data, error_response)
             return make_response(jsonify(error_response), 500)
@@ -3,8 +3,8 @@ from flask import request, jsonify, make_response, Response
 from marshmallow import ValidationError
 from database.auth_db import get_auth_token_broker
 from limiter import limiter
+from utils.broker_registry import get_broker_module
 import os
-import importlib
 import traceback
 import logging
 import pandas as pd
@@ -24,13 +24,10 @@ logger = logging.getLogger(__name__)
 ticker_schema = TickerSchema()
 
 def import_broker_module(broker_name):
-    try:
-        module_path = f'broker.{broker_name}.api.data'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'data')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.data' is not available")
+    return broker_module
 
 class TextResponse(Response):
     """Custom Response class that supports both text and JSON properties"""
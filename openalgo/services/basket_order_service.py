@@ -1,10 +1,9 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
@@ -17,6 +16,8 @@ from utils.constants import (
     REQUIRED_ORDER_FIELDS
 )
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.broker_registry import get_broker_module
+from utils.spans import span, traced, SCHEMA_VALIDATE, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -46,7 +47,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'basketorder'
     
     # Log to analyzer database
-    log_executor.submit(async_log_analyzer, analyzer_request, error_response, 'basketorder')
+    async_log_analyzer(analyzer_request, error_response, 'basketorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -58,22 +59,20 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
+@traced(SCHEMA_VALIDATE)
 def validate_order(order_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
     """
     Validate individual order data
@@ -131,7 +130,8 @@ def place_single_order(
     """
     try:
         # Place the order
-        res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
 
         if res.status == 200:
             # Emit order event for toast notification
@@ -244,7 +244,7 @@ def process_basket_order_with_auth(
         analyzer_request['api_type'] = 'basketorder'
         
         # Log to analyzer database
-        log_executor.submit(async_log_analyzer, analyzer_request, response_data, 'basketorder')
+        async_log_analyzer(analyzer_request, response_data, 'basketorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -261,7 +261,7 @@ def process_basket_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        log_executor.submit(async_log_order, 'basketorder', original_data, error_response)
+        async_log_order('basketorder', original_data, error_response)
         return False, error_response, 404
 
     # Sort orders to prioritize BUY orders before SELL orders
@@ -324,7 +324,7 @@ def process_basket_order_with_auth(
         'status': 'success',
         'results': results
     }
-    log_executor.submit(async_log_order, 'basketorder', basket_request_data, response_data)
+    async_log_order('basketorder', basket_request_data, response_data)
 
     return True, response_data, 200
 
@@ -364,7 +364,7 @@ def place_basket_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                log_executor.submit(async_log_order, 'basketorder', original_data, error_response)
+                async_log_order('basketorder', original_data, error_response)
             return False, error_response, 403
         
         return process_basket_order_with_auth(basket_data, AUTH_TOKEN, broker_name, original_data)
@@ -1,15 +1,16 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional, List
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request
+from utils.broker_registry import get_broker_module
+from utils.spans import span, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,7 +40,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'cancelallorder'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'cancelallorder')
+    async_log_analyzer(analyzer_request, error_response, 'cancelallorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -51,21 +52,18 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def cancel_all_orders_with_auth(
     order_data: Dict[str, Any],
@@ -116,7 +114,7 @@ def cancel_all_orders_with_auth(
             }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'cancelallorder')
+        async_log_analyzer(analyzer_request, response_data, 'cancelallorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -132,12 +130,13 @@ def cancel_all_orders_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'cancelallorder', original_data, error_response)
+        async_log_order('cancelallorder', original_data, error_response)
         return False, error_response, 404
 
     try:
         # Use the dynamically imported module's function to cancel all orders
-        canceled_orders, failed_cancellations = broker_module.cancel_all_orders_api(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            canceled_orders, failed_cancellations = broker_module.cancel_all_orders_api(order_data, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.cancel_all_orders_api: {e}")
         traceback.print_exc()
@@ -145,7 +144,7 @@ def cancel_all_orders_with_auth(
             'status': 'error',
             'message': 'Failed to cancel all orders due to internal error'
         }
-        executor.submit(async_log_order, 'cancelallorder', original_data, error_response)
+        async_log_order('cancelallorder', original_data, error_response)
         return False, error_response, 500
 
     # Emit events for each canceled order
@@ -165,7 +164,7 @@ def cancel_all_orders_with_auth(
     }
 
     # Log the action asynchronously
-    executor.submit(async_log_order, 'cancelallorder', order_request_data, response_data)
+    async_log_order('cancelallorder', order_request_data, response_data)
 
     return True, response_data, 200
 
@@ -210,7 +209,7 @@ def cancel_all_orders(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'cancelallorder', original_data, error_response)
+                async_log_order('cancelallorder', original_data, error_response)
             return False, error_response, 403
         
         return cancel_all_orders_with_auth(order_data, AUTH_TOKEN, broker_name, original_data)
@@ -1,14 +1,15 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
+from utils.broker_registry import get_broker_module
+from utils.spans import span, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,7 +39,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'cancelorder'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'cancelorder')
+    async_log_analyzer(analyzer_request, error_response, 'cancelorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -50,21 +51,18 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def cancel_order_with_auth(
     orderid: str,
@@ -104,7 +102,7 @@ def cancel_order_with_auth(
         }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'cancelorder')
+        async_log_analyzer(analyzer_request, response_data, 'cancelorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -120,12 +118,13 @@ def cancel_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'cancelorder', original_data, error_response)
+        async_log_order('cancelorder', original_data, error_response)
         return False, error_response, 404
 
     try:
         # Use the dynamically imported module's function to cancel the order
-        response_message, status_code = broker_module.cancel_order(orderid, auth_token)
+        with span(BROKER_ADAPTER):
+            response_message, status_code = broker_module.cancel_order(orderid, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.cancel_order: {e}")
         traceback.print_exc()
@@ -133,7 +132,7 @@ def cancel_order_with_auth(
             'status': 'error',
             'message': 'Failed to cancel order due to internal error'
         }
-        executor.submit(async_log_order, 'cancelorder', original_data, error_response)
+        async_log_order('cancelorder', original_data, error_response)
         return False, error_response, 500
 
     if status_code == 200:
@@ -146,7 +145,7 @@ def cancel_order_with_auth(
             'status': 'success',
             'orderid': orderid
         }
-        executor.submit(async_log_order, 'cancelorder', order_request_data, order_response_data)
+        async_log_order('cancelorder', order_request_data, order_response_data)
         return True, order_response_data, 200
     else:
         message = response_message.get('message', 'Failed to cancel order') if isinstance(response_message, dict) else 'Failed to cancel order'
@@ -154,7 +153,7 @@ def cancel_order_with_auth(
             'status': 'error',
             'message': message
         }
-        executor.submit(async_log_order, 'cancelorder', original_data, error_response)
+        async_log_order('cancelorder', original_data, error_response)
         return False, error_response, status_code
 
 def cancel_order(
@@ -187,7 +186,7 @@ def cancel_order(
     if not orderid:
         error_message = 'Order ID is missing'
         error_response = {'status': 'error', 'message': error_message}
-        executor.submit(async_log_order, 'cancelorder', original_data, error_response)
+        async_log_order('cancelorder', original_data, error_response)
         return False, error_response, 400
     
     # Case 1: API-based authentication
@@ -199,7 +198,7 @@ def cancel_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'cancelorder', original_data, error_response)
+                async_log_order('cancelorder', original_data, error_response)
             return False, error_response, 403
         
         return cancel_order_with_auth(orderid, AUTH_TOKEN, broker_name, original_data)
@@ -1,15 +1,16 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request
+from utils.broker_registry import get_broker_module
+from utils.spans import span, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,7 +40,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'closeposition'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'closeposition')
+    async_log_analyzer(analyzer_request, error_response, 'closeposition')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -51,21 +52,18 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def close_position_with_auth(
     position_data: Dict[str, Any],
@@ -114,7 +112,7 @@ def close_position_with_auth(
             }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'closeposition')
+        async_log_analyzer(analyzer_request, response_data, 'closeposition')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -130,13 +128,14 @@ def close_position_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'closeposition', original_data, error_response)
+        async_log_order('closeposition', original_data, error_response)
         return False, error_response, 404
 
     try:
         # Use the dynamically imported module's function to close all positions
         api_key = position_data.get('apikey', '')
-        response_code, status_code = broker_module.close_all_positions(api_key, auth_token)
+        with span(BROKER_ADAPTER):
+            response_code, status_code = broker_module.close_all_positions(api_key, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.close_all_positions: {e}")
         traceback.print_exc()
@@ -144,7 +143,7 @@ def close_position_with_auth(
             'status': 'error',
             'message': 'Failed to close positions due to internal error'
         }
-        executor.submit(async_log_order, 'closeposition', original_data, error_response)
+        async_log_order('closeposition', original_data, error_response)
         return False, error_response, 500
 
     if status_code == 200:
@@ -157,7 +156,7 @@ def close_position_with_auth(
             'message': 'All Open Positions Squared Off',
             'mode': 'live'
         })
-        executor.submit(async_log_order, 'closeposition', position_request_data, response_data)
+        async_log_order('closeposition', position_request_data, response_data)
         return True, response_data, 200
     else:
         message = response_code.get('message', 'Failed to close positions') if isinstance(response_code, dict) else 'Failed to close positions'
@@ -165,7 +164,7 @@ def close_position_with_auth(
             'status': 'error',
             'message': message
         }
-        executor.submit(async_log_order, 'closeposition', original_data, error_response)
+        async_log_order('closeposition', original_data, error_response)
         return False, error_response, status_code
 
 def close_position(
@@ -209,7 +208,7 @@ def close_position(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'closeposition', original_data, error_response)
+                async_log_order('closeposition', original_data, error_response)
             return False, error_response, 403
         
         return close_position_with_auth(position_data, AUTH_TOKEN, broker_name, original_data)
@@ -1,9 +1,9 @@
-import importlib
 import logging
 import traceback
 import pandas as pd
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from utils.broker_registry import get_broker_module, get_broker_capabilities
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,21 +11,18 @@ logger = logging.getLogger(__name__)
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific data module.
+    Look up the broker-specific data module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.data'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'data')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.data' is not available")
+    return broker_module
 
 def get_history_with_auth(
     auth_token: str, 
@@ -64,17 +61,9 @@ def get_history_with_auth(
         }, 404
 
     try:
-        # Initialize broker's data handler based on broker's requirements
-        if hasattr(broker_module.BrokerData.__init__, '__code__'):
-            # Check number of parameters the broker's __init__ accepts
-            param_count = broker_module.BrokerData.__init__.__code__.co_argcount
-            if param_count > 2:  # More than self and auth_token
-                data_handler = broker_module.BrokerData(auth_token, feed_token)
-            else:
-                data_handler = broker_module.BrokerData(auth_token)
-        else:
-            # Fallback to just auth token if we can't inspect
-            data_handler = broker_module.BrokerData(auth_token)
+        # Initialize broker's data handler with the arguments its constructor accepts,
+        # as resolved once by the broker registry
+        data_handler = get_broker_capabilities(broker).create_data_handler(auth_token, feed_token)
 
         df = data_handler.get_history(
             symbol,
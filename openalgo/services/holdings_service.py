@@ -1,8 +1,8 @@
-import importlib
 import logging
 import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from utils.broker_registry import get_function_table
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,28 +37,18 @@ def format_statistics(stats):
 
 def import_broker_module(broker_name: str) -> Optional[Dict[str, Any]]:
     """
-    Dynamically import the broker-specific holdings modules.
+    Look up the broker-specific holdings modules.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        Dictionary of broker functions or None if import fails
+        Dictionary of broker functions from the broker registry or None if unavailable
     """
-    try:
-        # Import API module
-        api_module = importlib.import_module(f'broker.{broker_name}.api.order_api')
-        # Import mapping module
-        mapping_module = importlib.import_module(f'broker.{broker_name}.mapping.order_data')
-        return {
-            'get_holdings': getattr(api_module, 'get_holdings'),
-            'map_portfolio_data': getattr(mapping_module, 'map_portfolio_data'),
-            'calculate_portfolio_statistics': getattr(mapping_module, 'calculate_portfolio_statistics'),
-            'transform_holdings_data': getattr(mapping_module, 'transform_holdings_data')
-        }
-    except (ImportError, AttributeError) as error:
-        logger.error(f"Error importing broker modules: {error}")
-        return None
+    broker_funcs = get_function_table(broker_name, 'holdings')
+    if broker_funcs is None:
+        logger.error(f"Broker {broker_name} does not provide the holdings functions")
+    return broker_funcs
 
 def get_holdings_with_auth(auth_token: str, broker: str) -> Tuple[bool, Dict[str, Any], int]:
     """
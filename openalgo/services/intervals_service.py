@@ -1,8 +1,8 @@
-import importlib
 import logging
 import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from utils.broker_registry import get_broker_module
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,21 +10,18 @@ logger = logging.getLogger(__name__)
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific data module.
+    Look up the broker-specific data module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.data'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'data')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.data' is not available")
+    return broker_module
 
 def get_intervals_with_auth(auth_token: str, broker: str) -> Tuple[bool, Dict[str, Any], int]:
     """
@@ -1,15 +1,16 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request
+from utils.broker_registry import get_broker_module
+from utils.spans import span, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,7 +40,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'modifyorder'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'modifyorder')
+    async_log_analyzer(analyzer_request, error_response, 'modifyorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -51,21 +52,18 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def modify_order_with_auth(
     order_data: Dict[str, Any],
@@ -114,7 +112,7 @@ def modify_order_with_auth(
             }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'modifyorder')
+        async_log_analyzer(analyzer_request, response_data, 'modifyorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -130,12 +128,13 @@ def modify_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'modifyorder', original_data, error_response)
+        async_log_order('modifyorder', original_data, error_response)
         return False, error_response, 404
 
     try:
         # Use the dynamically imported module's function to modify the order
-        response_message, status_code = broker_module.modify_order(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            response_message, status_code = broker_module.modify_order(order_data, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.modify_order: {e}")
         traceback.print_exc()
@@ -143,7 +142,7 @@ def modify_order_with_auth(
             'status': 'error',
             'message': 'Failed to modify order due to internal error'
         }
-        executor.submit(async_log_order, 'modifyorder', original_data, error_response)
+        async_log_order('modifyorder', original_data, error_response)
         return False, error_response, 500
 
     if status_code == 200:
@@ -156,7 +155,7 @@ def modify_order_with_auth(
             'orderid': order_data['orderid'],
             'mode': 'live'
         })
-        executor.submit(async_log_order, 'modifyorder', order_request_data, response_data)
+        async_log_order('modifyorder', order_request_data, response_data)
         return True, response_data, 200
     else:
         message = response_message.get('message', 'Failed to modify order') if isinstance(response_message, dict) else 'Failed to modify order'
@@ -164,7 +163,7 @@ def modify_order_with_auth(
             'status': 'error',
             'message': message
         }
-        executor.submit(async_log_order, 'modifyorder', original_data, error_response)
+        async_log_order('modifyorder', original_data, error_response)
         return False, error_response, status_code
 
 def modify_order(
@@ -205,7 +204,7 @@ def modify_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'modifyorder', original_data, error_response)
+                async_log_order('modifyorder', original_data, error_response)
             return False, error_response, 403
         
         return modify_order_with_auth(order_data, AUTH_TOKEN, broker_name, original_data)
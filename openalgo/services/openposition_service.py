@@ -5,7 +5,7 @@ import requests
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
@@ -38,7 +38,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'openposition'
     
     # Log to analyzer database
-    log_executor.submit(async_log_analyzer, analyzer_request, error_response, 'openposition')
+    async_log_analyzer(analyzer_request, error_response, 'openposition')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -85,7 +85,7 @@ def get_open_position_with_auth(
         analyzer_request['api_type'] = 'openposition'
         
         # Log to analyzer database
-        log_executor.submit(async_log_analyzer, analyzer_request, response_data, 'openposition')
+        async_log_analyzer(analyzer_request, response_data, 'openposition')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -111,7 +111,7 @@ def get_open_position_with_auth(
                 'status': 'error',
                 'message': 'Failed to fetch positionbook'
             }
-            log_executor.submit(async_log_order, 'openposition', original_data, error_response)
+            async_log_order('openposition', original_data, error_response)
             return False, error_response, positionbook_response.status_code
 
         positionbook_data = positionbook_response.json()
@@ -120,7 +120,7 @@ def get_open_position_with_auth(
                 'status': 'error',
                 'message': positionbook_data.get('message', 'Error fetching positionbook')
             }
-            log_executor.submit(async_log_order, 'openposition', original_data, error_response)
+            async_log_order('openposition', original_data, error_response)
             return False, error_response, 500
 
         # Find the specific position
@@ -138,7 +138,7 @@ def get_open_position_with_auth(
                 'quantity': 0,
                 'status': 'success'
             }
-            log_executor.submit(async_log_order, 'openposition', request_data, response_data)
+            async_log_order('openposition', request_data, response_data)
             return True, response_data, 200
 
         # Return the position quantity
@@ -146,7 +146,7 @@ def get_open_position_with_auth(
             'quantity': position_found['quantity'],
             'status': 'success'
         }
-        log_executor.submit(async_log_order, 'openposition', request_data, response_data)
+        async_log_order('openposition', request_data, response_data)
 
         return True, response_data, 200
 
@@ -157,7 +157,7 @@ def get_open_position_with_auth(
             'status': 'error',
             'message': str(e)
         }
-        log_executor.submit(async_log_order, 'openposition', original_data, error_response)
+        async_log_order('openposition', original_data, error_response)
         return False, error_response, 500
 
 def get_open_position(
@@ -198,7 +198,7 @@ def get_open_position(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                log_executor.submit(async_log_order, 'openposition', original_data, error_response)
+                async_log_order('openposition', original_data, error_response)
             return False, error_response, 403
         
         return get_open_position_with_auth(position_data, AUTH_TOKEN, broker_name, original_data)
@@ -0,0 +1,187 @@
+import os
+import copy
+import logging
+import traceback
+from typing import Tuple, Dict, Any
+
+from marshmallow import ValidationError
+
+from database.auth_db import get_api_key_credentials
+from database.apilog_db import async_log_order
+from database.latency_db import OrderLatency
+from restx_api.schemas import SmartOrderSchema, BasketOrderSchema
+from services.place_order_service import place_order
+from services.place_smart_order_service import place_smart_order
+from services.basket_order_service import place_basket_order
+from utils.latency_monitor import LatencyTracker, record_order_metrics
+from utils.spans import span, tracking, AUTH_RESOLVE, SCHEMA_VALIDATE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SMART_ORDER_DELAY = os.getenv("SMART_ORDER_DELAY", "0.5")
+
+# Endpoints that can be dispatched in-process and their latency order type
+DISPATCH_ENDPOINTS = {
+    'placeorder': 'PLACE',
+    'placesmartorder': 'SMART',
+    'basketorder': 'BASKET'
+}
+
+# Initialize schemas
+smart_order_schema = SmartOrderSchema()
+basket_schema = BasketOrderSchema()
+
+def _place(endpoint: str, payload: Dict[str, Any], credentials: Dict[str, Any]) -> Tuple[bool, Dict[str, Any], int]:
+    """Call the order service the endpoint would have called, with resolved credentials"""
+    api_key = payload.get('apikey')
+    if endpoint == 'basketorder':
+        try:
+            with span(SCHEMA_VALIDATE):
+                basket_data = basket_schema.load(payload)
+        except ValidationError as err:
+            error_response = {'status': 'error', 'message': str(err.messages)}
+            async_log_order('basketorder', payload, error_response)
+            return False, error_response, 400
+        return place_basket_order(
+            basket_data=basket_data,
+            auth_token=credentials['auth_token'],
+            broker=credentials['broker']
+        )
+    if endpoint == 'placesmartorder':
+        # Same schema load the REST endpoint runs before the service
+        try:
+            with span(SCHEMA_VALIDATE):
+                order_data = smart_order_schema.load(payload)
+        except ValidationError as err:
+            error_response = {'status': 'error', 'message': str(err.messages)}
+            async_log_order('placesmartorder', payload, error_response)
+            return False, error_response, 400
+        order_data.pop('apikey', None)
+        return place_smart_order(
+            order_data=order_data,
+            api_key=api_key,
+            auth_token=credentials['auth_token'],
+            broker=credentials['broker'],
+            smart_order_delay=SMART_ORDER_DELAY
+        )
+    return place_order(
+        order_data=copy.deepcopy(payload),
+        api_key=api_key,
+        auth_token=credentials['auth_token'],
+        broker=credentials['broker']
+    )
+
+def order_status(api_type: str, response_data: Dict[str, Any], status_code: int) -> str:
+    """
+    SUCCESS, PARTIAL or FAILED for a dispatched order. The basket service succeeds
+    even when legs fail, so a basket is only SUCCESS when every leg was placed.
+    """
+    if status_code >= 400:
+        return 'FAILED'
+    if api_type == 'BASKET':
+        results = response_data.get('results') or []
+        placed = sum(1 for result in results if result.get('status') == 'success')
+        if not placed:
+            return 'FAILED'
+        return 'SUCCESS' if placed == len(results) else 'PARTIAL'
+    return 'SUCCESS'
+
+def dispatch_order(endpoint: str, payload: Dict[str, Any]) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Place a queued webhook order in-process instead of posting it back to
+    /api/v1/<endpoint>. The API key in the payload is resolved through the
+    credential cache, so the Argon2 verify runs once per key rather than once
+    per order. Latency is recorded the same way the REST endpoints record it.
+
+    Args:
+        endpoint: 'placeorder', 'placesmartorder' or 'basketorder'
+        payload: Order payload as it would be posted to the endpoint, including apikey
+
+    Returns:
+        Tuple containing:
+        - Success status (bool)
+        - Response data (dict)
+        - HTTP status code (int)
+    """
+    if endpoint not in DISPATCH_ENDPOINTS:
+        return False, {'status': 'error', 'message': f'Unsupported endpoint: {endpoint}'}, 400
+    api_type = DISPATCH_ENDPOINTS[endpoint]
+
+    tracker = LatencyTracker()
+    credentials = None
+    try:
+        with tracking(tracker):
+            tracker.start_stage('validation')
+            with span(AUTH_RESOLVE):
+                credentials = get_api_key_credentials(payload.get('apikey', ''))
+            tracker.end_stage()
+
+            if credentials is None:
+                success, response_data, status_code = False, {
+                    'status': 'error',
+                    'message': 'Invalid openalgo apikey'
+                }, 403
+                async_log_order(endpoint, payload, response_data)
+            else:
+                tracker.start_stage('broker_request')
+                success, response_data, status_code = _place(endpoint, payload, credentials)
+                tracker.end_stage()
+    except Exception as e:
+        logger.error(f"Error dispatching {endpoint}: {e}")
+        traceback.print_exc()
+        success, response_data, status_code = False, {
+            'status': 'error',
+            'message': 'An unexpected error occurred'
+        }, 500
+        tracker.end_stage()
+
+    record_dispatch_latency(api_type, tracker, credentials, payload, response_data, status_code)
+    return success, response_data, status_code
+
+def record_dispatch_latency(api_type, tracker, credentials, payload, response_data, status_code):
+    """Record a dispatched order on the latency monitor and metrics endpoint"""
+    try:
+        rtt = tracker.get_rtt()
+        validation = tracker.stage_times.get('validation', 0)
+        latencies = {
+            'rtt': rtt,
+            'validation': validation,
+            'broker_response': 0,
+            'overhead': validation,
+            'total': rtt + validation
+        }
+        broker = credentials['broker'] if credentials else None
+        status = order_status(api_type, response_data, status_code)
+        if status_code >= 400:
+            error = response_data.get('message')
+        elif status != 'SUCCESS':
+            results = response_data.get('results') or []
+            failed = [result for result in results if result.get('status') != 'success']
+            error = f"{len(failed)} of {len(results)} basket orders failed: " + '; '.join(
+                f"{result.get('symbol')}: {result.get('message')}" for result in failed
+            )
+        else:
+            error = None
+        record_order_metrics(api_type, broker, status, latencies, tracker.spans)
+
+        order_id = response_data.get('orderid')
+        if order_id is None:
+            order_id = response_data.get('request_id', 'unknown')
+        request_body = {key: value for key, value in payload.items() if key != 'apikey'}
+        OrderLatency.queue_latency(
+            order_id=order_id,
+            user_id=credentials['user_id'] if credentials else None,
+            broker=broker,
+            symbol=payload.get('symbol'),
+            order_type=api_type,
+            latencies=latencies,
+            request_body=request_body,
+            response_body=response_data,
+            status=status,
+            error=error[:500] if error else None,
+            spans=tracker.spans or None
+        )
+    except Exception as e:
+        logger.error(f"Error recording dispatch latency: {e}")
@@ -0,0 +1,106 @@
+import time
+import uuid
+import logging
+from typing import Dict, Any, Optional
+
+from database.order_queue_db import (
+    enqueue_order, claim_order, complete_order, load_undelivered_orders, PLACED, PARTIAL, FAILED
+)
+from services.order_dispatch_service import dispatch_order, order_status, DISPATCH_ENDPOINTS
+from utils.order_scheduler import OrderScheduler
+from utils.metrics import order_queue_depth, order_queue_oldest_age, order_queue_wait, order_queue_replayed
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Webhook blueprints that queue orders
+ORDER_SOURCES = ('strategy', 'chartink')
+
+# Queue state of each dispatch outcome
+QUEUE_STATES = {'SUCCESS': PLACED, 'PARTIAL': PARTIAL, 'FAILED': FAILED}
+
+def describe_order(payload: Dict[str, Any]) -> str:
+    """Symbol of an order, or the symbols of a basket, for log lines"""
+    if 'orders' in payload:
+        return ', '.join(str(order.get('symbol')) for order in payload['orders'])
+    return str(payload.get('symbol'))
+
+def _dispatch(order: Dict[str, Any]) -> None:
+    """Place one queued order and record its outcome"""
+    if order['id'] is not None and not claim_order(order['id']):
+        # Already taken, e.g. by a replay racing a live submit
+        return
+
+    lane = order_scheduler.lane(order['endpoint']).name
+    order_queue_wait.observe(time.time() - order['queued_at'], source=order['source'], queue=lane)
+
+    payload = order['payload']
+    success, response_data, status_code = dispatch_order(order['endpoint'], payload)
+    status = order_status(DISPATCH_ENDPOINTS.get(order['endpoint'], ''), response_data, status_code)
+    if order['endpoint'] == 'basketorder' and success:
+        for result in response_data.get('results', []):
+            if result.get('status') == 'success':
+                logger.info(f'Basket order placed for {result.get("symbol")} in strategy {payload.get("strategy")}: {result.get("orderid")}')
+            else:
+                logger.error(f'Error placing basket order for {result.get("symbol")}: {result.get("message")}')
+    elif success:
+        logger.info(f'{lane.capitalize()} order placed for {payload.get("symbol")} in strategy {payload.get("strategy")}')
+    else:
+        logger.error(f'Error placing {order["endpoint"]} for {describe_order(payload)}: {response_data.get("message")}')
+
+    if order['id'] is not None:
+        complete_order(order['id'], QUEUE_STATES[status], response_data)
+
+order_scheduler = OrderScheduler(_dispatch)
+
+for source in ORDER_SOURCES:
+    for lane in order_scheduler.lanes.values():
+        order_queue_depth.set_function(lambda lane=lane, source=source: lane.waiting(source)[0], source=source, queue=lane.name)
+        order_queue_oldest_age.set_function(lambda lane=lane, source=source: lane.waiting(source)[1], source=source, queue=lane.name)
+
+def queue_order(source: str, endpoint: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> bool:
+    """
+    Queue a webhook order for /api/v1/<endpoint>.
+
+    The order is written to the queue database before it is queued in memory,
+    so it is replayed if the process stops before it is placed. An order whose
+    idempotency key was already queued (e.g. a retried webhook) is ignored.
+
+    Args:
+        source: Webhook the order came from ('strategy' or 'chartink')
+        endpoint: 'placeorder', 'placesmartorder' or 'basketorder'
+        payload: Order payload including apikey
+        idempotency_key: Key identifying the order; a random one if not given
+
+    Returns:
+        False if the order was a duplicate, True otherwise
+    """
+    idempotency_key = idempotency_key or f'{source}:{uuid.uuid4()}'
+    try:
+        order_id = enqueue_order(idempotency_key, source, endpoint, payload)
+        if order_id is None:
+            logger.info(f'Ignoring duplicate {endpoint} for {describe_order(payload)} ({idempotency_key})')
+            return False
+    except Exception as e:
+        # Still place the order, it just will not survive a restart
+        logger.error(f'Error writing {endpoint} for {describe_order(payload)} to the queue database: {str(e)}')
+        order_id = None
+
+    order_scheduler.submit({
+        'id': order_id,
+        'source': source,
+        'endpoint': endpoint,
+        'payload': payload,
+        'queued_at': time.time()
+    })
+    return True
+
+def replay_queued_orders() -> int:
+    """Queue the orders a previous run accepted but did not place; returns how many"""
+    orders = load_undelivered_orders()
+    for order in orders:
+        logger.warning(f'Replaying queued {order["endpoint"]} for {describe_order(order["payload"])} from {order["source"]}')
+        order_queue_replayed.inc(source=order['source'])
+        order_scheduler.submit(order)
+    return len(orders)
@@ -5,7 +5,7 @@ import requests
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
@@ -38,7 +38,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'orderstatus'
     
     # Log to analyzer database
-    log_executor.submit(async_log_analyzer, analyzer_request, error_response, 'orderstatus')
+    async_log_analyzer(analyzer_request, error_response, 'orderstatus')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -98,7 +98,7 @@ def get_order_status_with_auth(
         analyzer_request['api_type'] = 'orderstatus'
         
         # Log to analyzer database
-        log_executor.submit(async_log_analyzer, analyzer_request, response_data, 'orderstatus')
+        async_log_analyzer(analyzer_request, response_data, 'orderstatus')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -124,7 +124,7 @@ def get_order_status_with_auth(
                 'status': 'error',
                 'message': 'Failed to fetch orderbook'
             }
-            log_executor.submit(async_log_order, 'orderstatus', original_data, error_response)
+            async_log_order('orderstatus', original_data, error_response)
             return False, error_response, orderbook_response.status_code
 
         orderbook_data = orderbook_response.json()
@@ -133,7 +133,7 @@ def get_order_status_with_auth(
                 'status': 'error',
                 'message': orderbook_data.get('message', 'Error fetching orderbook')
             }
-            log_executor.submit(async_log_order, 'orderstatus', original_data, error_response)
+            async_log_order('orderstatus', original_data, error_response)
             return False, error_response, 500
 
         # Find the specific order in the orderbook
@@ -148,7 +148,7 @@ def get_order_status_with_auth(
                 'status': 'error',
                 'message': f'Order {status_data["orderid"]} not found'
             }
-            log_executor.submit(async_log_order, 'orderstatus', original_data, error_response)
+            async_log_order('orderstatus', original_data, error_response)
             return False, error_response, 404
 
         # Return the found order
@@ -156,7 +156,7 @@ def get_order_status_with_auth(
             'status': 'success',
             'data': order_found
         }
-        log_executor.submit(async_log_order, 'orderstatus', request_data, response_data)
+        async_log_order('orderstatus', request_data, response_data)
 
         return True, response_data, 200
 
@@ -167,7 +167,7 @@ def get_order_status_with_auth(
             'status': 'error',
             'message': str(e)
         }
-        log_executor.submit(async_log_order, 'orderstatus', original_data, error_response)
+        async_log_order('orderstatus', original_data, error_response)
         return False, error_response, 500
 
 def get_order_status(
@@ -208,7 +208,7 @@ def get_order_status(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                log_executor.submit(async_log_order, 'orderstatus', original_data, error_response)
+                async_log_order('orderstatus', original_data, error_response)
             return False, error_response, 403
         
         return get_order_status_with_auth(status_data, AUTH_TOKEN, broker_name, original_data)
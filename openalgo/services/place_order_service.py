@@ -1,10 +1,9 @@
-import importlib
 import logging
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
@@ -17,6 +16,8 @@ from utils.constants import (
     REQUIRED_ORDER_FIELDS
 )
 from restx_api.schemas import OrderSchema
+from utils.broker_registry import get_broker_module
+from utils.spans import span, traced, SCHEMA_VALIDATE, BROKER_ADAPTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,21 +28,18 @@ order_schema = OrderSchema()
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dict[str, Any]:
     """
@@ -67,7 +65,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'placeorder'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'placeorder')
+    async_log_analyzer(analyzer_request, error_response, 'placeorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -77,6 +75,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     
     return error_response
 
+@traced(SCHEMA_VALIDATE)
 def validate_order_data(data: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
     """
     Validate order data against required fields and valid values
@@ -167,7 +166,7 @@ def place_order_with_auth(
             }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'placeorder')
+        async_log_analyzer(analyzer_request, response_data, 'placeorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -184,12 +183,13 @@ def place_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'placeorder', original_data, error_response)
+        async_log_order('placeorder', original_data, error_response)
         return False, error_response, 404
 
     try:
         # Call the broker's place_order_api function
-        res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.place_order_api: {e}")
         traceback.print_exc()
@@ -197,7 +197,7 @@ def place_order_with_auth(
             'status': 'error',
             'message': 'Failed to place order due to internal error'
         }
-        executor.submit(async_log_order, 'placeorder', original_data, error_response)
+        async_log_order('placeorder', original_data, error_response)
         return False, error_response, 500
 
     if res.status == 200:
@@ -211,7 +211,7 @@ def place_order_with_auth(
             'mode': 'live'
         })
         order_response_data = {'status': 'success', 'orderid': order_id}
-        executor.submit(async_log_order, 'placeorder', order_request_data, order_response_data)
+        async_log_order('placeorder', order_request_data, order_response_data)
         return True, order_response_data, 200
     else:
         message = response_data.get('message', 'Failed to place order') if isinstance(response_data, dict) else 'Failed to place order'
@@ -219,7 +219,7 @@ def place_order_with_auth(
             'status': 'error',
             'message': message
         }
-        executor.submit(async_log_order, 'placeorder', original_data, error_response)
+        async_log_order('placeorder', original_data, error_response)
         return False, error_response, res.status if res.status != 200 else 500
 
 def place_order(
@@ -256,7 +256,7 @@ def place_order(
         if get_analyze_mode():
             return False, emit_analyzer_error(original_data, error_message), 400
         error_response = {'status': 'error', 'message': error_message}
-        executor.submit(async_log_order, 'placeorder', original_data, error_response)
+        async_log_order('placeorder', original_data, error_response)
         return False, error_response, 400
     
     # Case 1: API-based authentication
@@ -268,7 +268,7 @@ def place_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'placeorder', original_data, error_response)
+                async_log_order('placeorder', original_data, error_response)
             return False, error_response, 403
         
         return place_order_with_auth(order_data, AUTH_TOKEN, broker_name, original_data)
@@ -1,4 +1,3 @@
-import importlib
 import logging
 import traceback
 import copy
@@ -6,11 +5,13 @@ import time
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_registry import get_broker_module
+from utils.spans import span, traced, SCHEMA_VALIDATE, BROKER_ADAPTER
 from utils.constants import (
     VALID_EXCHANGES,
     VALID_ACTIONS,
@@ -50,7 +51,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'placesmartorder'
     
     # Log to analyzer database
-    executor.submit(async_log_analyzer, analyzer_request, error_response, 'placesmartorder')
+    async_log_analyzer(analyzer_request, error_response, 'placesmartorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -62,22 +63,20 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
+@traced(SCHEMA_VALIDATE)
 def validate_smart_order(order_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
     """
     Validate smart order data
@@ -148,7 +147,7 @@ def place_smart_order_with_auth(
         if get_analyze_mode():
             return False, emit_analyzer_error(original_data, error_message), 400
         error_response = {'status': 'error', 'message': error_message}
-        executor.submit(async_log_order, 'placesmartorder', original_data, error_response)
+        async_log_order('placesmartorder', original_data, error_response)
         return False, error_response, 400
     
     # If in analyze mode, analyze the request and return
@@ -173,7 +172,7 @@ def place_smart_order_with_auth(
             }
         
         # Log to analyzer database with complete request and response
-        executor.submit(async_log_analyzer, analyzer_request, response_data, 'placesmartorder')
+        async_log_analyzer(analyzer_request, response_data, 'placesmartorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -190,11 +189,12 @@ def place_smart_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        executor.submit(async_log_order, 'placesmartorder', original_data, error_response)
+        async_log_order('placesmartorder', original_data, error_response)
         return False, error_response, 404
 
     try:
-        res, response_data, order_id = broker_module.place_smartorder_api(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            res, response_data, order_id = broker_module.place_smartorder_api(order_data, auth_token)
         
         # Handle case where position size matches current position
         if res is None and response_data.get('status') == 'success' and 'No action needed' in response_data.get('message', ''):
@@ -203,7 +203,7 @@ def place_smart_order_with_auth(
                 'status': 'success',
                 'message': 'Positions Already Matched. No Action needed.'
             }
-            executor.submit(async_log_order, 'placesmartorder', order_request_data, order_response_data)
+            async_log_order('placesmartorder', order_request_data, order_response_data)
             
             # Emit notification for matched positions
             socketio.emit('order_notification', {
@@ -216,7 +216,7 @@ def place_smart_order_with_auth(
         # Log successful order immediately after placement
         if res and res.status == 200:
             order_response_data = {'status': 'success', 'orderid': order_id}
-            executor.submit(async_log_order, 'placesmartorder', order_request_data, order_response_data)
+            async_log_order('placesmartorder', order_request_data, order_response_data)
             socketio.emit('order_event', {
                 'symbol': order_data.get('symbol'),
                 'action': order_data.get('action'),
@@ -231,7 +231,7 @@ def place_smart_order_with_auth(
             'status': 'error',
             'message': 'Failed to place smart order due to internal error'
         }
-        executor.submit(async_log_order, 'placesmartorder', original_data, error_response)
+        async_log_order('placesmartorder', original_data, error_response)
         return False, error_response, 500
 
     # Add delay if needed
@@ -249,7 +249,7 @@ def place_smart_order_with_auth(
             'status': 'error',
             'message': message
         }
-        executor.submit(async_log_order, 'placesmartorder', original_data, error_response)
+        async_log_order('placesmartorder', original_data, error_response)
         status_code = res.status if res and hasattr(res, 'status') else 500
         return False, error_response, status_code
 
@@ -297,7 +297,7 @@ def place_smart_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                executor.submit(async_log_order, 'placesmartorder', original_data, error_response)
+                async_log_order('placesmartorder', original_data, error_response)
             return False, error_response, 403
         
         return place_smart_order_with_auth(order_data, AUTH_TOKEN, broker_name, original_data, smart_order_delay)
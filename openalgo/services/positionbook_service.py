@@ -1,8 +1,8 @@
-import importlib
 import logging
 import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from utils.broker_registry import get_function_table
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,27 +28,18 @@ def format_position_data(position_data):
 
 def import_broker_module(broker_name: str) -> Optional[Dict[str, Any]]:
     """
-    Dynamically import the broker-specific positionbook modules.
+    Look up the broker-specific positionbook modules.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        Dictionary of broker functions or None if import fails
+        Dictionary of broker functions from the broker registry or None if unavailable
     """
-    try:
-        # Import API module
-        api_module = importlib.import_module(f'broker.{broker_name}.api.order_api')
-        # Import mapping module
-        mapping_module = importlib.import_module(f'broker.{broker_name}.mapping.order_data')
-        return {
-            'get_positions': getattr(api_module, 'get_positions'),
-            'map_position_data': getattr(mapping_module, 'map_position_data'),
-            'transform_positions_data': getattr(mapping_module, 'transform_positions_data')
-        }
-    except (ImportError, AttributeError) as error:
-        logger.error(f"Error importing broker modules: {error}")
-        return None
+    broker_funcs = get_function_table(broker_name, 'positionbook')
+    if broker_funcs is None:
+        logger.error(f"Broker {broker_name} does not provide the positionbook functions")
+    return broker_funcs
 
 def get_positionbook_with_auth(auth_token: str, broker: str) -> Tuple[bool, Dict[str, Any], int]:
     """
@@ -1,4 +1,3 @@
-import importlib
 import logging
 import traceback
 import copy
@@ -6,11 +5,13 @@ from typing import Tuple, Dict, Any, Optional, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from database.auth_db import get_auth_token_broker
-from database.apilog_db import async_log_order, executor as log_executor
+from database.apilog_db import async_log_order
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_registry import get_broker_module
+from utils.spans import span, BROKER_ADAPTER
 from utils.constants import (
     VALID_EXCHANGES,
     VALID_ACTIONS,
@@ -50,7 +51,7 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     analyzer_request['api_type'] = 'splitorder'
     
     # Log to analyzer database
-    log_executor.submit(async_log_analyzer, analyzer_request, error_response, 'splitorder')
+    async_log_analyzer(analyzer_request, error_response, 'splitorder')
     
     # Emit socket event
     socketio.emit('analyzer_update', {
@@ -62,21 +63,18 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
 
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
-    Dynamically import the broker-specific order API module.
+    Look up the broker-specific order API module.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The module resolved by the broker registry or None if unavailable
     """
-    try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
-    except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
-        return None
+    broker_module = get_broker_module(broker_name, 'order_api')
+    if broker_module is None:
+        logger.error(f"Broker module 'broker.{broker_name}.api.order_api' is not available")
+    return broker_module
 
 def place_single_order(
     order_data: Dict[str, Any], 
@@ -100,7 +98,8 @@ def place_single_order(
     """
     try:
         # Place the order using place_order_api
-        res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
+        with span(BROKER_ADAPTER):
+            res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
 
         if res.status == 200:
             # Emit order event for toast notification with batch info
@@ -177,7 +176,7 @@ def split_order_with_auth(
             if get_analyze_mode():
                 return False, emit_analyzer_error(original_data, error_message), 400
             error_response = {'status': 'error', 'message': error_message}
-            log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
+            async_log_order('splitorder', original_data, error_response)
             return False, error_response, 400
 
         # Calculate number of full-size orders and remaining quantity
@@ -191,7 +190,7 @@ def split_order_with_auth(
             if get_analyze_mode():
                 return False, emit_analyzer_error(original_data, error_message), 400
             error_response = {'status': 'error', 'message': error_message}
-            log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
+            async_log_order('splitorder', original_data, error_response)
             return False, error_response, 400
 
     except ValueError:
@@ -199,7 +198,7 @@ def split_order_with_auth(
         if get_analyze_mode():
             return False, emit_analyzer_error(original_data, error_message), 400
         error_response = {'status': 'error', 'message': error_message}
-        log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
+        async_log_order('splitorder', original_data, error_response)
         return False, error_response, 400
     
     # If in analyze mode, analyze each order
@@ -264,7 +263,7 @@ def split_order_with_auth(
         analyzer_request['api_type'] = 'splitorder'
         
         # Log to analyzer database
-        log_executor.submit(async_log_analyzer, analyzer_request, response_data, 'splitorder')
+        async_log_analyzer(analyzer_request, response_data, 'splitorder')
         
         # Emit socket event for toast notification
         socketio.emit('analyzer_update', {
@@ -281,7 +280,7 @@ def split_order_with_auth(
             'status': 'error',
             'message': 'Broker-specific module not found'
         }
-        log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
+        async_log_order('splitorder', original_data, error_response)
         return False, error_response, 404
 
     # Process orders concurrently
@@ -337,7 +336,7 @@ def split_order_with_auth(
             'split_size': split_size,
             'results': results
         }
-        log_executor.submit(async_log_order, 'splitorder', split_request_data, response_data)
+        async_log_order('splitorder', split_request_data, response_data)
 
         return True, response_data, 200
 
@@ -379,7 +378,7 @@ def split_order(
                 'message': 'Invalid openalgo apikey'
             }
             if not get_analyze_mode():
-                log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
+                async_log_order('splitorder', original_data, error_response)
             return False, error_response, 403
         
         return split_order_with_auth(split_data, AUTH_TOKEN, broker_name, original_data)
@@ -1,8 +1,8 @@
-import importlib
 import logging
 import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from utils.broker_registry import get_function_table
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,27 +28,18 @@ def format_trade_data(trade_data):
 
 def import_broker_module(broker_name: str) -> Optional[Dict[str, Any]]:
     """
-    Dynamically import the broker-specific tradebook modules.
+    Look up the broker-specific tradebook modules.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        Dictionary of broker functions or None if import fails
+        Dictionary of broker functions from the broker registry or None if unavailable
     """
-    try:
-        # Import API module
-        api_module = importlib.import_module(f'broker.{broker_name}.api.order_api')
-        # Import mapping module
-        mapping_module = importlib.import_module(f'broker.{broker_name}.mapping.order_data')
-        return {
-            'get_trade_book': getattr(api_module, 'get_trade_book'),
-            'map_trade_data': getattr(mapping_module, 'map_trade_data'),
-            'transform_tradebook_data': getattr(mapping_module, 'transform_tradebook_data')
-        }
-    except (ImportError, AttributeError) as error:
-        logger.error(f"Error importing broker modules: {error}")
-        return None
+    broker_funcs = get_function_table(broker_name, 'tradebook')
+    if broker_funcs is None:
+        logger.error(f"Broker {broker_name} does not provide the tradebook functions")
+    return broker_funcs
 
 def get_tradebook_with_auth(auth_token: str, broker: str) -> Tuple[bool, Dict[str, Any], int]:
     """
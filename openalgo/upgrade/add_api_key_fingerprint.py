@@ -0,0 +1,92 @@
+import sys
+import os
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from the project
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+# Load environment variables from .env file
+dotenv_path = os.path.join(parent_dir, '.env')
+load_dotenv(dotenv_path)
+
+from sqlalchemy import inspect
+from sqlalchemy import create_engine
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def add_api_key_fingerprint_column():
+    """
+    Script to add the indexed api_key_fingerprint column to the api_keys table if it doesn't exist.
+    Existing keys are backfilled by verify_api_key the next time each one is used.
+    """
+    # Get the database URL from environment
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        logger.error("DATABASE_URL environment variable not set")
+        return False
+
+    # If the database is SQLite, ensure we use the absolute path
+    if database_url.startswith('sqlite:///'):
+        # Extract the relative path part after sqlite:///
+        db_path = database_url.replace('sqlite:///', '')
+        # Convert to absolute path if not already
+        if not os.path.isabs(db_path):
+            abs_db_path = os.path.abspath(os.path.join(parent_dir, db_path))
+            database_url = f'sqlite:///{abs_db_path}'
+
+    logger.info(f"Using database: {database_url}")
+
+    # Ensure the directory exists for SQLite
+    if database_url.startswith('sqlite:///'):
+        db_path = database_url.replace('sqlite:///', '')
+        db_dir = os.path.dirname(db_path)
+        if not os.path.exists(db_dir):
+            logger.error(f"Database directory does not exist: {db_dir}")
+            return False
+
+    engine = create_engine(database_url)
+
+    try:
+        # Connect to the database
+        conn = engine.connect()
+
+        # Check if the api_key_fingerprint column already exists
+        inspector = inspect(engine)
+        columns = [col['name'] for col in inspector.get_columns('api_keys')]
+
+        if 'api_key_fingerprint' not in columns:
+            logger.info("Adding api_key_fingerprint column to api_keys table...")
+            conn.execute(text('ALTER TABLE api_keys ADD COLUMN api_key_fingerprint VARCHAR(64)'))
+            conn.commit()
+            logger.info("api_key_fingerprint column added successfully.")
+        else:
+            logger.info("api_key_fingerprint column already exists in api_keys table. No action needed.")
+
+        # Create the lookup index (name matches the one SQLAlchemy generates for new databases)
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_api_keys_api_key_fingerprint '
+            'ON api_keys (api_key_fingerprint)'
+        ))
+        conn.commit()
+        logger.info("api_key_fingerprint index is in place.")
+
+        conn.close()
+        return True
+
+    except Exception as e:
+        logger.error(f"Error adding api_key_fingerprint column: {e}")
+        logger.error(f"Database URL being used: {database_url}")
+        return False
+
+if __name__ == "__main__":
+    success = add_api_key_fingerprint_column()
+    if success:
+        logger.info("Migration completed successfully!")
+    else:
+        logger.error("Migration failed!")
+        sys.exit(1)
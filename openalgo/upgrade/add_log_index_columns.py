@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+from dotenv import load_dotenv
+
+# Add parent directory to path so we can import from the project
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+# Load environment variables from .env file
+dotenv_path = os.path.join(parent_dir, '.env')
+load_dotenv(dotenv_path)
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 1000
+
+def _load(data):
+    try:
+        return json.loads(data) if data else {}
+    except (TypeError, ValueError):
+        return {}
+
+def backfill_log_fields(engine, table):
+    """
+    Fill symbol, strategy, action, orderid and status for rows logged before the
+    columns existed, in chunks of BACKFILL_CHUNK_SIZE rows ordered by id.
+    """
+    from database.log_index import extract_log_fields
+
+    updated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                table.select()
+                .with_only_columns(table.c.id, table.c.request_data, table.c.response_data)
+                .where(table.c.id > last_id)
+                .where(table.c.symbol.is_(None))
+                .where(table.c.status.is_(None))
+                .order_by(table.c.id)
+                .limit(BACKFILL_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                fields = extract_log_fields(_load(row.request_data), _load(row.response_data))
+                if any(fields.values()):
+                    conn.execute(table.update().where(table.c.id == row.id).values(**fields))
+                    updated += 1
+            last_id = rows[-1].id
+        logger.info(f"{table.name}: backfilled up to id {last_id}")
+    return updated
+
+def add_log_index_columns():
+    """
+    Script to add the indexed symbol, strategy, action, orderid and status columns to
+    the order_logs and analyzer_logs tables, build their indexes and full-text index,
+    and backfill the columns from the logged JSON of existing rows.
+    """
+    if not os.getenv('DATABASE_URL'):
+        logger.error("DATABASE_URL environment variable not set")
+        return False
+
+    try:
+        from database.apilog_db import OrderLog, engine as apilog_engine
+        from database.analyzer_db import AnalyzerLog, engine as analyzer_engine
+        from database.log_index import add_log_columns, build_log_indexes
+
+        for model, engine in ((OrderLog, apilog_engine), (AnalyzerLog, analyzer_engine)):
+            table = model.__table__
+            logger.info(f"Updating {table.name} table...")
+            table.create(bind=engine, checkfirst=True)
+            add_log_columns(engine, table)
+            updated = backfill_log_fields(engine, table)
+            logger.info(f"{table.name}: {updated} existing rows backfilled.")
+            # After the backfill, so its updates don't go through the full-text triggers
+            build_log_indexes(engine, table)
+            logger.info(f"{table.name}: indexes built.")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error adding log index columns: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = add_log_index_columns()
+    if success:
+        logger.info("Migration completed successfully!")
+    else:
+        logger.error("Migration failed!")
+        sys.exit(1)
@@ -0,0 +1,53 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+# Add parent directory to path so we can import from the project
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+# Load environment variables from .env file
+dotenv_path = os.path.join(parent_dir, '.env')
+load_dotenv(dotenv_path)
+
+# The log databases live under db/ relative to the application directory
+os.chdir(parent_dir)
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def build_log_rollups():
+    """
+    Script to build the traffic rollups and latency aggregates from the requests and
+    orders logged before they existed. The app keeps them up to date from then on; run
+    it with the app stopped, as each rebuild holds its database's write lock.
+    """
+    try:
+        from database.traffic_db import TrafficRollup, init_logs_db
+        from database.latency_db import LatencyAggregate, init_latency_db
+
+        init_logs_db()
+        logger.info("Building traffic rollups from traffic_logs...")
+        TrafficRollup.rebuild()
+        logger.info("Traffic rollups built.")
+
+        init_latency_db()
+        logger.info("Building latency aggregates from order_latency...")
+        LatencyAggregate.rebuild()
+        logger.info("Latency aggregates built.")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error building log rollups: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = build_log_rollups()
+    if success:
+        logger.info("Migration completed successfully!")
+    else:
+        logger.error("Migration failed!")
+        sys.exit(1)
@@ -3,6 +3,8 @@ from flask import current_app as app
 from threading import Thread
 from utils.session import get_session_expiry_time, set_session_login_time
 from database.auth_db import upsert_auth, get_feed_token as db_get_feed_token
+from database.symbol_index import reload_symbol_index
+from database.symbol_search import reload_symbol_search_index
 import importlib
 import logging
 from datetime import datetime
@@ -29,6 +31,10 @@ def async_master_contract_download(broker):
     master_contract_status = master_contract_module.master_contract_download()
     
     logger.info("Master Contract Database Processing Completed")
+
+    # Swap in a fresh symbol index and search index built from the new master contract
+    reload_symbol_index()
+    reload_symbol_search_index()
     
     return master_contract_status
 
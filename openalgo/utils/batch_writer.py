@@ -0,0 +1,158 @@
+# utils/batch_writer.py
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from utils.metrics import log_writer_queued, log_writer_dropped
+
+logger = logging.getLogger(__name__)
+
+# What submit() does when the buffer is full
+DROP_OLDEST = 'drop_oldest'   # evict the oldest buffered record (ring buffer)
+DROP_NEWEST = 'drop_newest'   # discard the record being submitted
+BLOCK = 'block'               # wait up to block_timeout for the writer, then discard it
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class BatchWriter:
+    """
+    Bounded in-memory buffer drained by a background writer thread.
+
+    Producers call submit(record) and return immediately. The writer hands the
+    buffered records to write_batch(records) every flush_interval seconds, or as
+    soon as batch_size records are waiting, so many records share one transaction.
+    The thread is started on first use, which keeps it inside the worker process
+    when the app is forked by gunicorn.
+    """
+
+    def __init__(self, name, write_batch, max_queue=10000, batch_size=500,
+                 flush_interval=0.5, overflow_policy=DROP_OLDEST, block_timeout=0.05):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy}, expected one of {OVERFLOW_POLICIES}")
+
+        self.name = name
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        log_writer_queued.set_function(lambda: len(self._buffer), writer=name)
+        log_writer_dropped.set_function(lambda: self.dropped, writer=name)
+
+        atexit.register(self.stop)
+
+    def submit(self, record):
+        """Buffer a record for the writer. Returns False if it was dropped."""
+        with self._condition:
+            self._ensure_started()
+            self.submitted += 1
+
+            if len(self._buffer) >= self.max_queue:
+                if self.overflow_policy == DROP_OLDEST:
+                    self._buffer.popleft()
+                    self.dropped += 1
+                elif self.overflow_policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    self._condition.notify_all()
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._buffer) >= self.max_queue:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._condition.wait(remaining)
+
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify_all()
+            return True
+
+    def flush(self):
+        """Write everything buffered so far in the calling thread"""
+        while self._write_next_batch():
+            pass
+
+    def stop(self):
+        """Stop the writer thread and flush the remaining records; registered with atexit"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=max(self.flush_interval * 4, 1))
+        self.flush()
+
+    def stats(self):
+        """Counters for monitoring the writer"""
+        return {
+            'queued': len(self._buffer),
+            'submitted': self.submitted,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches
+        }
+
+    def _ensure_started(self):
+        # Called with the condition held
+        if self._stopping:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._buffer) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+
+            while self._write_next_batch():
+                pass
+
+            if stopping:
+                return
+
+    def _write_next_batch(self):
+        """Take up to batch_size records and write them; returns False when nothing was buffered"""
+        with self._write_lock:
+            with self._condition:
+                count = min(len(self._buffer), self.batch_size)
+                records = [self._buffer.popleft() for _ in range(count)]
+                if records:
+                    # Wake producers blocked on a full buffer
+                    self._condition.notify_all()
+            if not records:
+                return False
+
+            try:
+                self.write_batch(records)
+                self.flushed += len(records)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(records)
+                logger.error(f"Error writing {len(records)} {self.name} records: {e}")
+            return True
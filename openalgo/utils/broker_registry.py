@@ -0,0 +1,177 @@
+# utils/broker_registry.py
+
+import os
+import time
+import importlib
+import logging
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# A broker whose modules failed to import is retried after this long, not on every request
+BROKER_IMPORT_RETRY_SECONDS = int(os.getenv('BROKER_IMPORT_RETRY_SECONDS', '300'))
+
+# Broker plugin modules resolved once per broker, relative to broker.<name>
+BROKER_MODULES = {
+    'order_api': 'api.order_api',
+    'data': 'api.data',
+    'funds': 'api.funds',
+    'order_data': 'mapping.order_data',
+}
+
+# Module path relative to broker.<name> -> kind
+BROKER_MODULE_KINDS = {path: kind for kind, path in BROKER_MODULES.items()}
+
+# Callables the book services need, as (module kind, function name)
+FUNCTION_TABLES = {
+    'orderbook': {
+        'get_order_book': ('order_api', 'get_order_book'),
+        'map_order_data': ('order_data', 'map_order_data'),
+        'calculate_order_statistics': ('order_data', 'calculate_order_statistics'),
+        'transform_order_data': ('order_data', 'transform_order_data'),
+    },
+    'tradebook': {
+        'get_trade_book': ('order_api', 'get_trade_book'),
+        'map_trade_data': ('order_data', 'map_trade_data'),
+        'transform_tradebook_data': ('order_data', 'transform_tradebook_data'),
+    },
+    'positionbook': {
+        'get_positions': ('order_api', 'get_positions'),
+        'map_position_data': ('order_data', 'map_position_data'),
+        'transform_positions_data': ('order_data', 'transform_positions_data'),
+    },
+    'holdings': {
+        'get_holdings': ('order_api', 'get_holdings'),
+        'map_portfolio_data': ('order_data', 'map_portfolio_data'),
+        'calculate_portfolio_statistics': ('order_data', 'calculate_portfolio_statistics'),
+        'transform_holdings_data': ('order_data', 'transform_holdings_data'),
+    },
+}
+
+class BrokerCapabilities:
+    """
+    Everything the services dispatch to for one broker, resolved at registration.
+
+    modules maps each BROKER_MODULES kind to the imported module (None when the
+    broker does not ship it) and function_tables maps each FUNCTION_TABLES entry
+    to its callables (None when any of them is missing). retry_at is set when a
+    module failed to import, to the monotonic time registration may be tried again.
+    """
+
+    __slots__ = ('name', 'modules', 'function_tables', 'data_init_args', 'retry_at')
+
+    def __init__(self, name: str, modules: Dict[str, Optional[ModuleType]],
+                 function_tables: Dict[str, Optional[Dict[str, Callable]]], data_init_args: int,
+                 retry_at: Optional[float] = None):
+        self.name = name
+        self.modules = modules
+        self.function_tables = function_tables
+        # Positional arguments BrokerData.__init__ takes after self
+        self.data_init_args = data_init_args
+        self.retry_at = retry_at
+
+    def module(self, kind: str) -> Optional[ModuleType]:
+        return self.modules.get(kind)
+
+    def create_data_handler(self, auth_token: str, *extra_args: Any) -> Any:
+        """
+        Instantiate the broker's BrokerData with auth_token followed by as many of
+        extra_args (feed_token, user_id) as its constructor accepts.
+        """
+        args = (auth_token,) + extra_args
+        return self.modules['data'].BrokerData(*args[:max(self.data_init_args, 1)])
+
+# Broker name -> BrokerCapabilities
+_registry: Dict[str, BrokerCapabilities] = {}
+_registry_lock = threading.Lock()
+
+class BrokerImportError(Exception):
+    """A broker module exists but failed while being imported"""
+
+def _import_module(broker_name: str, kind: str) -> Optional[ModuleType]:
+    """
+    The broker module, or None if it is missing. Raises BrokerImportError when
+    importing it fails for another reason (e.g. module-level code that only works
+    with that broker's credentials configured).
+    """
+    module_path = f'broker.{broker_name}.{BROKER_MODULES[kind]}'
+    try:
+        return importlib.import_module(module_path)
+    except ImportError as error:
+        logger.error(f"Error importing broker module '{module_path}': {error}")
+        return None
+    except Exception as error:
+        raise BrokerImportError(f"Error importing broker module '{module_path}': {error}") from error
+
+def _resolve_function_table(broker_name: str, modules: Dict[str, Optional[ModuleType]],
+                            table: Dict[str, tuple]) -> Optional[Dict[str, Callable]]:
+    functions = {}
+    for key, (kind, function_name) in table.items():
+        function = getattr(modules.get(kind), function_name, None)
+        if function is None:
+            logger.debug(f"Broker {broker_name} has no {kind}.{function_name}")
+            return None
+        functions[key] = function
+    return functions
+
+def _data_init_args(data_module: Optional[ModuleType]) -> int:
+    broker_data = getattr(data_module, 'BrokerData', None)
+    init_code = getattr(getattr(broker_data, '__init__', None), '__code__', None)
+    if init_code is None:
+        # Fall back to just the auth token if the constructor cannot be inspected
+        return 1
+    return init_code.co_argcount - 1
+
+def register_broker(broker_name: str) -> BrokerCapabilities:
+    """
+    Import a broker's plugin modules, resolve its function tables and store the result.
+    A broker whose modules failed to import is stored without those modules until
+    BROKER_IMPORT_RETRY_SECONDS have passed, then imported again on next use.
+    """
+    modules = {}
+    failed = False
+    for kind in BROKER_MODULES:
+        try:
+            modules[kind] = _import_module(broker_name, kind)
+        except BrokerImportError as error:
+            logger.error(str(error))
+            modules[kind] = None
+            failed = True
+    capabilities = BrokerCapabilities(
+        broker_name,
+        modules,
+        {name: _resolve_function_table(broker_name, modules, table) for name, table in FUNCTION_TABLES.items()},
+        _data_init_args(modules['data']),
+        time.monotonic() + BROKER_IMPORT_RETRY_SECONDS if failed else None
+    )
+    with _registry_lock:
+        _registry[broker_name] = capabilities
+    return capabilities
+
+def build_broker_registry(broker_names) -> Dict[str, BrokerCapabilities]:
+    """Register the brokers in broker_names ahead of their first use; called once at startup"""
+    for broker_name in broker_names:
+        try:
+            register_broker(broker_name)
+        except Exception as error:
+            # One broken plugin must not stop the application from starting
+            logger.error(f"Error registering broker {broker_name}: {error}")
+    logger.info(f"Broker registry built for {len(_registry)} brokers")
+    return dict(_registry)
+
+def get_broker_capabilities(broker_name: str) -> BrokerCapabilities:
+    """Registered capabilities of a broker, registering it on first use if startup did not"""
+    capabilities = _registry.get(broker_name)
+    if capabilities is None or (capabilities.retry_at is not None and time.monotonic() >= capabilities.retry_at):
+        capabilities = register_broker(broker_name)
+    return capabilities
+
+def get_broker_module(broker_name: str, kind: str) -> Optional[ModuleType]:
+    """The broker's order_api, data, funds or order_data module, or None if it has none"""
+    return get_broker_capabilities(broker_name).module(kind)
+
+def get_function_table(broker_name: str, table: str) -> Optional[Dict[str, Callable]]:
+    """The resolved callables of one FUNCTION_TABLES entry, or None if the broker lacks any"""
+    return get_broker_capabilities(broker_name).function_tables.get(table)
@@ -0,0 +1,58 @@
+# utils/csv_export.py
+
+import os
+import io
+import csv
+import logging
+from flask import Response, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+# Rows written per chunk sent to the client
+CSV_EXPORT_CHUNK_ROWS = int(os.getenv('CSV_EXPORT_CHUNK_ROWS', '500'))
+# Rows fetched per round trip when streaming a query
+CSV_EXPORT_FETCH_SIZE = int(os.getenv('CSV_EXPORT_FETCH_SIZE', '1000'))
+
+def stream_query(query, fetch_size=None):
+    """Iterate a query in batches through a server-side cursor instead of loading every row"""
+    return query.yield_per(fetch_size or CSV_EXPORT_FETCH_SIZE)
+
+def iter_csv(headers, rows, chunk_rows=None):
+    """
+    Yield the CSV text for headers and rows (any iterable of row lists), one chunk
+    of chunk_rows rows at a time, so memory stays flat however many rows there are.
+    """
+    chunk_rows = chunk_rows or CSV_EXPORT_CHUNK_ROWS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+
+    pending = 0
+    try:
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_rows:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+    except Exception as e:
+        # Headers are already sent; failing the stream keeps a partial file from
+        # looking like a complete export
+        logger.error(f"Error streaming CSV export: {e}")
+        raise
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def csv_response(chunks, filename):
+    """
+    Streamed CSV download. The request context stays open while the chunks are
+    generated so the scoped database sessions are only removed afterwards.
+    """
+    return Response(
+        stream_with_context(chunks),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -1,11 +1,63 @@
 """
 Shared httpx client module with connection pooling support for all broker APIs
 """
+import time
 import httpx
+from utils.metrics import broker_http_duration, broker_http_errors
+from utils.spans import span, record_span, HTTP_SEND, HTTP_RECEIVE
 
 # Global httpx client for connection pooling
 _httpx_client = None
 
+class TimedByteStream(httpx.SyncByteStream):
+    """Response body stream that records the time spent reading it as the http_receive span"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __iter__(self):
+        elapsed = 0.0
+        try:
+            iterator = iter(self._stream)
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield chunk
+        finally:
+            record_span(HTTP_RECEIVE, elapsed * 1000)
+
+    def close(self):
+        self._stream.close()
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    """
+    HTTP transport that records broker call durations on the metrics endpoint and
+    the http_send/http_receive spans of the order request being tracked
+    """
+
+    def handle_request(self, request):
+        start = time.perf_counter()
+        try:
+            with span(HTTP_SEND):
+                response = super().handle_request(request)
+        except Exception:
+            broker_http_errors.inc(host=request.url.host, method=request.method)
+            raise
+        response.stream = TimedByteStream(response.stream)
+        # Measured to the response headers; the body is read by the caller
+        broker_http_duration.observe(
+            time.perf_counter() - start,
+            host=request.url.host,
+            method=request.method,
+            status=response.status_code
+        )
+        return response
+
 def get_httpx_client():
     """
     Returns a global httpx client instance with connection pooling.
@@ -19,12 +71,14 @@ def get_httpx_client():
         # Create a client with connection pooling
         # Setting limits to allow connection reuse but prevent resource exhaustion
         _httpx_client = httpx.Client(
-            http2=True,
             timeout=30.0,
-            limits=httpx.Limits(
-                max_keepalive_connections=10,
-                max_connections=20,
-                keepalive_expiry=60.0
+            transport=InstrumentedTransport(
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=10,
+                    max_connections=20,
+                    keepalive_expiry=60.0
+                )
             )
         )
     return _httpx_client
@@ -1,8 +1,9 @@
 import time
 from functools import wraps
 from flask import g, request
-from database.latency_db import OrderLatency, latency_session, init_latency_db
-from database.auth_db import get_broker_name
+from database.latency_db import OrderLatency, init_latency_db
+from database.auth_db import get_cached_api_key_credentials
+from utils.metrics import order_requests, order_stage_duration, order_span_duration
 import logging
 from flask_restx import Resource
 
@@ -18,6 +19,23 @@ class LatencyTracker:
         self.stage_start = None
         self.request_start = None
         self.request_end = None
+        self.spans = {}  # Self time in ms per span name, see utils/spans.py
+        self._open_spans = []  # Time spent in child spans, per open span
+
+    def enter_span(self):
+        self._open_spans.append(0.0)
+
+    def exit_span(self, name, duration_ms):
+        child_ms = self._open_spans.pop()
+        if self._open_spans:
+            self._open_spans[-1] += duration_ms
+        self.spans[name] = self.spans.get(name, 0) + duration_ms - child_ms
+
+    def add_span(self, name, duration_ms):
+        """Add a measured duration to a span; repeated spans add up"""
+        if self._open_spans:
+            self._open_spans[-1] += duration_ms
+        self.spans[name] = self.spans.get(name, 0) + duration_ms
     
     def start_stage(self, stage_name):
         """Start timing a new stage"""
@@ -52,6 +70,31 @@ class LatencyTracker:
         return (self.stage_times.get('validation', 0) + 
                 self.stage_times.get('broker_response', 0))
 
+def get_request_broker(request_data):
+    """
+    Broker of the API key in the request, taken from the credentials the endpoint
+    already resolved so no key verification happens while recording latency
+    """
+    api_key = request_data.get('apikey') if isinstance(request_data, dict) else None
+    if not api_key:
+        return None
+    credentials = get_cached_api_key_credentials(api_key)
+    return credentials['broker'] if credentials else None
+
+def record_order_metrics(api_type, broker, status, latencies, spans):
+    """Count the request and record its stage and span times (given in ms) on the metrics endpoint"""
+    broker = broker or 'unknown'
+    order_requests.inc(order_type=api_type, broker=broker, status=status)
+    for stage in ('validation', 'rtt', 'broker_response', 'total'):
+        order_stage_duration.observe(
+            latencies.get(stage, 0) / 1000,
+            order_type=api_type,
+            broker=broker,
+            stage='broker_request' if stage == 'rtt' else stage
+        )
+    for name, duration_ms in spans.items():
+        order_span_duration.observe(duration_ms / 1000, order_type=api_type, span=name)
+
 def track_latency(api_type):
     """Decorator to track latency for API endpoints"""
     def decorator(f):
@@ -111,28 +154,30 @@ def track_latency(api_type):
                 if order_id is None:
                     order_id = response_data.get('request_id', 'unknown')
                 
-                # Get broker name from auth_db using API key
-                broker_name = None
-                if 'apikey' in request_data:
-                    broker_name = get_broker_name(request_data['apikey'])
-                
-                OrderLatency.log_latency(
+                broker = get_request_broker(request_data)
+                latencies = {
+                    'rtt': rtt,  # Round-trip time (comparable to Postman/Bruno)
+                    'validation': tracker.stage_times.get('validation', 0),
+                    'broker_response': tracker.stage_times.get('broker_response', 0),
+                    'overhead': overhead,
+                    'total': total
+                }
+                status = 'SUCCESS' if status_code < 400 else 'FAILED'
+                record_order_metrics(api_type, broker, status, latencies, tracker.spans)
+
+                # Queued for the background writer so the measurement does not wait on disk
+                OrderLatency.queue_latency(
                     order_id=order_id,
                     user_id=g.get('user_id'),
-                    broker=broker_name,
+                    broker=broker,
                     symbol=request_data.get('symbol'),
                     order_type=api_type,
-                    latencies={
-                        'rtt': rtt,  # Round-trip time (comparable to Postman/Bruno)
-                        'validation': tracker.stage_times.get('validation', 0),
-                        'broker_response': tracker.stage_times.get('broker_response', 0),
-                        'overhead': overhead,
-                        'total': total
-                    },
+                    latencies=latencies,
                     request_body=request_data,
                     response_body=response_data,
-                    status='SUCCESS' if status_code < 400 else 'FAILED',
-                    error=response_data.get('message') if status_code >= 400 else None
+                    status=status,
+                    error=response_data.get('message') if status_code >= 400 else None,
+                    spans=tracker.spans or None
                 )
                 
                 return response
@@ -142,35 +187,31 @@ def track_latency(api_type):
                 total_time = tracker.get_total_time()
                 rtt = tracker.get_rtt()
                 overhead = tracker.get_overhead()
+                broker = get_request_broker(request_data) if 'request_data' in locals() else None
+                latencies = {
+                    'rtt': rtt,
+                    'validation': tracker.stage_times.get('validation', 0),
+                    'broker_response': 0,
+                    'overhead': overhead,
+                    'total': total_time
+                }
+                record_order_metrics(api_type, broker, 'FAILED', latencies, tracker.spans)
                 
-                # Get broker name from auth_db using API key if available
-                broker_name = None
-                if 'request_data' in locals() and 'apikey' in request_data:
-                    broker_name = get_broker_name(request_data['apikey'])
-                
-                OrderLatency.log_latency(
+                OrderLatency.queue_latency(
                     order_id='error',
                     user_id=g.get('user_id'),
-                    broker=broker_name,
+                    broker=broker,
                     symbol=request_data.get('symbol') if 'request_data' in locals() else None,
                     order_type=api_type,
-                    latencies={
-                        'rtt': rtt,
-                        'validation': tracker.stage_times.get('validation', 0),
-                        'broker_response': 0,
-                        'overhead': overhead,
-                        'total': total_time
-                    },
+                    latencies=latencies,
                     request_body=request_data if 'request_data' in locals() else None,
                     response_body=None,
                     status='FAILED',
-                    error=str(e)
+                    error=str(e),
+                    spans=tracker.spans or None
                 )
                 raise
                 
-            finally:
-                latency_session.remove()
-                
         return wrapped
     return decorator
 
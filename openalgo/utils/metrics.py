@@ -0,0 +1,272 @@
+# utils/metrics.py
+
+"""
+In-process metrics registry rendered in the Prometheus text exposition format.
+
+Metrics are created once at import time with counter(), gauge() or histogram()
+and updated from the hot paths; recording is a dict lookup and an addition under
+a per-metric lock, so it is cheap enough for every request. Durations are
+recorded in seconds, as Prometheus expects.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Default buckets for network round trips, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets for in-process work such as validation and database statements
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_metrics = {}
+_registry_lock = threading.Lock()
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class Metric:
+    kind = None
+    # Appended to the name on the HELP and TYPE lines, as for counters' _total samples
+    type_suffix = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function, **labels):
+        """Report function() for these labels on every scrape, e.g. a queue size"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = function
+
+    def _current_values(self):
+        """(labelvalues, value) pairs with callbacks read; failing callbacks are skipped"""
+        with self._lock:
+            values = sorted(self._values.items(), key=lambda item: item[0])
+        for key, value in values:
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    continue
+            yield key, value
+
+    def samples(self):
+        """(suffix, labelvalues, extra_label, value) for every series"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name}{self.type_suffix} {self.documentation}",
+            f"# TYPE {self.name}{self.type_suffix} {self.kind}"
+        ]
+        for suffix, labelvalues, extra, value in self.samples():
+            labels = _format_labels(self.labelnames, labelvalues, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    kind = 'counter'
+    type_suffix = '_total'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._current_values():
+            yield '_total', key, None, value
+
+class Gauge(Metric):
+    """Gauge set directly or read from a callback at scrape time"""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        for key, value in self._current_values():
+            yield '', key, None, value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(series[0]), series[1], series[2]) for key, series in self._values.items()]
+        for key, counts, total, count in sorted(values, key=lambda item: item[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield '_bucket', key, ('le', _format_value(float(bound))), cumulative
+            yield '_sum', key, None, total
+            yield '_count', key, None, count
+
+def _register(metric_class, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = metric_class(name, *args, **kwargs)
+        elif not isinstance(metric, metric_class):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter, name, documentation, labelnames)
+
+def gauge(name, documentation, labelnames=()):
+    return _register(Gauge, name, documentation, labelnames)
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+def render_metrics():
+    """Every registered metric in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = sorted(_metrics.values(), key=lambda metric: metric.name)
+    return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+# Series recorded across the application
+http_requests = counter(
+    'openalgo_http_requests', 'HTTP requests handled', ('method', 'endpoint', 'status')
+)
+http_request_duration = histogram(
+    'openalgo_http_request_duration_seconds', 'Time to produce HTTP responses', ('method', 'endpoint')
+)
+order_requests = counter(
+    'openalgo_order_requests', 'Order API requests by outcome', ('order_type', 'broker', 'status')
+)
+order_stage_duration = histogram(
+    'openalgo_order_stage_duration_seconds',
+    'Order API time by stage (validation, broker_request, broker_response, total)',
+    ('order_type', 'broker', 'stage')
+)
+order_span_duration = histogram(
+    'openalgo_order_span_duration_seconds',
+    'Order API self time by span (auth_resolve, schema_validate, symbol_map, http_send, ...)',
+    ('order_type', 'span'),
+    buckets=FAST_BUCKETS + (2.5, 5.0)
+)
+broker_http_duration = histogram(
+    'openalgo_broker_http_duration_seconds',
+    'Time to response headers for broker HTTP calls on the shared client',
+    ('host', 'method', 'status')
+)
+broker_http_errors = counter(
+    'openalgo_broker_http_errors', 'Broker HTTP calls that failed without a response', ('host', 'method')
+)
+db_statement_duration = histogram(
+    'openalgo_db_statement_duration_seconds', 'Database statement execution time', ('database',),
+    buckets=FAST_BUCKETS
+)
+password_hash_verify_duration = histogram(
+    'openalgo_argon2_verify_duration_seconds', 'Argon2 verification time for API keys and passwords', ('kind',)
+)
+order_queue_depth = gauge(
+    'openalgo_order_queue_depth', 'Orders waiting in the webhook order queues', ('source', 'queue')
+)
+order_queue_oldest_age = gauge(
+    'openalgo_order_queue_oldest_age_seconds', 'Age of the oldest order waiting in the webhook order queues',
+    ('source', 'queue')
+)
+order_queue_wait = histogram(
+    'openalgo_order_queue_wait_seconds', 'Time webhook orders waited in the queue before dispatch',
+    ('source', 'queue')
+)
+order_queue_replayed = counter(
+    'openalgo_order_queue_replayed', 'Webhook orders replayed from the queue database at startup', ('source',)
+)
+log_writer_queued = gauge(
+    'openalgo_log_writer_queued', 'Records waiting in the background log writers', ('writer',)
+)
+log_writer_dropped = counter(
+    'openalgo_log_writer_dropped', 'Records the background log writers dropped on overflow', ('writer',)
+)
+
+_database_instrumented = False
+
+def instrument_database_metrics():
+    """
+    Time every statement on every SQLAlchemy engine, labelled by database file
+    (or database name), through class-level engine events. Safe to call twice.
+    """
+    global _database_instrumented
+    if _database_instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    def database_label(conn):
+        database = conn.engine.url.database or conn.engine.url.get_backend_name()
+        return database.replace('\\', '/').rsplit('/', 1)[-1]
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_statement_start', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_statement_start')
+        if starts:
+            db_statement_duration.observe(time.perf_counter() - starts.pop(), database=database_label(conn))
+
+    @event.listens_for(Engine, 'handle_error')
+    def handle_error(context):
+        # Failed statements never reach after_cursor_execute
+        starts = context.connection.info.get('metrics_statement_start') if context.connection else None
+        if starts:
+            starts.pop()
+
+    _database_instrumented = True
@@ -0,0 +1,155 @@
+# utils/order_scheduler.py
+
+"""
+In-memory scheduler behind the webhook order queue (services/order_queue_service.py).
+
+Regular and smart orders go to separate lanes, each with its own worker
+threads, so a smart order waiting on its rate limit never holds up regular
+orders. Within a lane every account (API key) has a token bucket; workers
+block on a condition until an order arrives or the next token is due, so an
+order leaves as soon as its bucket allows instead of on the next poll.
+Accounts are served round robin. An account has at most one order in flight
+per symbol, so orders for a symbol reach the broker in the order they were
+queued; extra workers run orders for other symbols, or other accounts, at the
+same time. A basket holds every symbol it trades.
+
+Orders are dicts with at least 'endpoint', 'payload', 'source' and 'queued_at'
+(epoch seconds); the dispatch callable given to the scheduler places them.
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict, deque
+from database.auth_db import get_api_key_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Orders per second per account, and worker threads, of each lane
+WEBHOOK_REGULAR_ORDER_RATE = float(os.getenv('WEBHOOK_REGULAR_ORDER_RATE', '10'))
+WEBHOOK_REGULAR_ORDER_WORKERS = int(os.getenv('WEBHOOK_REGULAR_ORDER_WORKERS', '2'))
+WEBHOOK_SMART_ORDER_RATE = float(os.getenv('WEBHOOK_SMART_ORDER_RATE', '1'))
+# Smart orders size the position from the current one, so they run one at a time by default
+WEBHOOK_SMART_ORDER_WORKERS = int(os.getenv('WEBHOOK_SMART_ORDER_WORKERS', '1'))
+
+def order_symbols(order):
+    """Exchange and symbol pairs an order trades, every leg's for a basket"""
+    payload = order['payload']
+    legs = payload['orders'] if 'orders' in payload else [payload]
+    return {(leg.get('exchange'), leg.get('symbol')) for leg in legs}
+
+class TokenBucket:
+    """Refills rate tokens per second, holding at most one second's worth"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """Take a token; returns 0 if one was taken, else the seconds until one is due"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class OrderLane:
+    """Pending orders of one kind, rate limited per account and run by its own workers"""
+
+    def __init__(self, name, rate, workers, dispatch):
+        self.name = name
+        self.rate = rate
+        self.workers = workers
+        self.dispatch = dispatch
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()  # account key -> deque of orders
+        self.buckets = {}
+        self.in_flight = set()  # (account, exchange, symbol) of orders being dispatched
+        self.started = False
+
+    def submit(self, account, order):
+        with self.condition:
+            self.pending.setdefault(account, deque()).append(order)
+            if not self.started:
+                self.started = True
+                for i in range(self.workers):
+                    threading.Thread(
+                        target=self._work, name=f'webhook-{self.name}-orders-{i}', daemon=True
+                    ).start()
+            self.condition.notify()
+
+    def waiting(self, source):
+        """Number of orders from source waiting, and the age in seconds of the oldest"""
+        with self.condition:
+            queued_at = [order['queued_at'] for orders in self.pending.values()
+                         for order in orders if order['source'] == source]
+        return len(queued_at), (time.time() - min(queued_at) if queued_at else 0)
+
+    def _next(self):
+        """
+        Block until an account has both a token and a pending order whose symbols
+        are neither in flight nor held by an earlier order of the account, and take
+        that order. Returns the in-flight keys to release and the order.
+        """
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                wait = None
+                for account, orders in self.pending.items():
+                    held = set()
+                    for position, order in enumerate(orders):
+                        keys = {(account,) + symbol for symbol in order_symbols(order)}
+                        if keys.isdisjoint(self.in_flight) and keys.isdisjoint(held):
+                            break
+                        held |= keys
+                    else:
+                        # Woken again when an order in flight finishes
+                        continue
+                    bucket = self.buckets.get(account)
+                    if bucket is None:
+                        bucket = self.buckets[account] = TokenBucket(self.rate)
+                    delay = bucket.take(now)
+                    if delay == 0:
+                        del orders[position]
+                        if orders:
+                            self.pending.move_to_end(account)
+                        else:
+                            del self.pending[account]
+                        self.in_flight |= keys
+                        return keys, order
+                    wait = delay if wait is None else min(wait, delay)
+                self.condition.wait(wait)
+
+    def _work(self):
+        while True:
+            keys, order = self._next()
+            try:
+                self.dispatch(order)
+            except Exception as e:
+                logger.error(f'Error placing {self.name} order: {str(e)}')
+            finally:
+                with self.condition:
+                    self.in_flight -= keys
+                    self.condition.notify_all()
+
+class OrderScheduler:
+    """Regular and smart order lanes shared by the webhook sources"""
+
+    def __init__(self, dispatch):
+        self.lanes = {
+            'placeorder': OrderLane('regular', WEBHOOK_REGULAR_ORDER_RATE, WEBHOOK_REGULAR_ORDER_WORKERS, dispatch),
+            'placesmartorder': OrderLane('smart', WEBHOOK_SMART_ORDER_RATE, WEBHOOK_SMART_ORDER_WORKERS, dispatch)
+        }
+
+    def lane(self, endpoint):
+        """Lane of an endpoint; baskets take one regular order token"""
+        return self.lanes.get(endpoint, self.lanes['placeorder'])
+
+    def submit(self, order):
+        """Queue an order for /api/v1/<endpoint>; workers start with the first order"""
+        account = get_api_key_fingerprint(order['payload'].get('apikey') or '')
+        self.lane(order['endpoint']).submit(account, order)
@@ -1,8 +1,10 @@
 # utils/plugin_loader.py
 
 import os
+import re
 import importlib
 from flask import current_app
+from utils.broker_registry import build_broker_registry
 
 def load_broker_auth_functions(broker_directory='broker'):
     auth_functions = {}
@@ -26,3 +28,24 @@ def load_broker_auth_functions(broker_directory='broker'):
             current_app.logger.error(f"Authentication function not found in broker plugin {broker_name}: {e}")
 
     return auth_functions
+
+def configured_brokers(broker_directory='broker'):
+    """
+    Brokers this installation is set up for: the broker of REDIRECT_URL, which
+    BROKER_API_KEY and BROKER_API_SECRET belong to, if it is in VALID_BROKERS
+    """
+    match = re.search(r'/([^/]+)/callback$', os.getenv('REDIRECT_URL', ''))
+    if not match:
+        return []
+    broker_name = match.group(1).lower()
+    valid_brokers = {broker.strip().lower() for broker in os.getenv('VALID_BROKERS', '').split(',')}
+    broker_path = os.path.join(current_app.root_path, broker_directory, broker_name)
+    if broker_name not in valid_brokers or not os.path.isdir(broker_path):
+        return []
+    return [broker_name]
+
+def load_broker_registry(broker_directory='broker'):
+    # Resolve the configured broker's order, data, funds and mapping modules once.
+    # Other brokers are registered on first use: their modules can run code at import
+    # that only works with their own credentials configured.
+    return build_broker_registry(configured_brokers(broker_directory))
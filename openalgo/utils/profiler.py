@@ -0,0 +1,254 @@
+# utils/profiler.py
+
+"""
+Opt-in sampling profiler for live API endpoints.
+
+An admin arms the profiler for the next N requests to one /api/v1/ endpoint.
+While one of those requests runs, a sampler thread reads the request's stack
+every few milliseconds through sys._current_frames() and counts each distinct
+stack. When the last request finishes the counts are written under db/profiles
+in the collapsed format ('frame;frame;frame count') that flamegraph.pl and
+speedscope read. Requests that are not being profiled only pay one attribute
+check.
+
+Under eventlet every green thread shares the OS thread, so requests are tracked
+by a token of their own rather than the thread ident, and a sample is kept
+only when the request's own frames are on the stack; samples taken while the
+request is switched out (waiting on the broker) are counted as off-CPU.
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import logging
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join('db', 'profiles')
+PROFILER_DEFAULT_INTERVAL_MS = int(os.getenv('PROFILER_DEFAULT_INTERVAL_MS', '5'))
+PROFILER_MAX_REQUESTS = int(os.getenv('PROFILER_MAX_REQUESTS', '100'))
+# Profiles not finished within this time are written with what was sampled
+PROFILER_TIMEOUT_SECONDS = int(os.getenv('PROFILER_TIMEOUT_SECONDS', '600'))
+# Only the API endpoints can be profiled
+PROFILED_PATH_PREFIX = '/api/v1/'
+
+def _native_modules():
+    """
+    threading and time as the OS provides them. When eventlet has monkey patched
+    the process a green sampler could never interrupt a busy request.
+    """
+    try:
+        from eventlet import patcher
+        return patcher.original('threading'), patcher.original('time')
+    except ImportError:
+        return threading, time
+
+_native_threading, _native_time = _native_modules()
+
+def _normalize_path(path):
+    return '/' + path.strip('/') + '/'
+
+def _frame_label(code):
+    filename = code.co_filename
+    cwd = os.getcwd()
+    if filename.startswith(cwd):
+        filename = os.path.relpath(filename, cwd)
+    # Collapsed stacks use ';' between frames and ' ' before the count
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+class ProfileSession:
+    """One armed profile: the endpoint, how many requests are left and the samples so far"""
+
+    def __init__(self, path, requests, interval_ms):
+        self.path = _normalize_path(path)
+        self.requests = requests
+        self.remaining = requests
+        self.interval = interval_ms / 1000
+        self.started_at = datetime.now()
+        self.deadline = time.time() + PROFILER_TIMEOUT_SECONDS
+        self.stacks = Counter()
+        self.samples = 0
+        self.off_cpu_samples = 0
+        self.profiled_requests = 0
+        # Token of each request being profiled -> (OS thread ident, entry frame)
+        self.active = {}
+        self.filename = None
+
+    def matches(self, path):
+        return _normalize_path(path) == self.path
+
+    def status(self):
+        return {
+            'endpoint': self.path.rstrip('/'),
+            'requests': self.requests,
+            'remaining': self.remaining,
+            'profiled_requests': self.profiled_requests,
+            'in_progress': len(self.active),
+            'interval_ms': round(self.interval * 1000, 2),
+            'samples': self.samples,
+            'off_cpu_samples': self.off_cpu_samples,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'file': self.filename
+        }
+
+class SamplingProfiler:
+    """Process-wide profiler state; at most one profile is armed at a time"""
+
+    def __init__(self):
+        # A native lock, as the sampler is a native thread even under eventlet
+        self._lock = _native_threading.Lock()
+        self.session = None
+        self.last_session = None
+        self._sampler = None
+
+    def start(self, path, requests, interval_ms=None):
+        if not path.startswith(PROFILED_PATH_PREFIX):
+            raise ValueError(f"Only endpoints under {PROFILED_PATH_PREFIX} can be profiled")
+        if not 1 <= requests <= PROFILER_MAX_REQUESTS:
+            raise ValueError(f"Requests must be between 1 and {PROFILER_MAX_REQUESTS}")
+        interval_ms = interval_ms or PROFILER_DEFAULT_INTERVAL_MS
+        if not 1 <= interval_ms <= 1000:
+            raise ValueError("Interval must be between 1 and 1000 ms")
+
+        with self._lock:
+            if self.session is not None:
+                raise ValueError(f"A profile of {self.session.path.rstrip('/')} is already running")
+            self.session = ProfileSession(path, requests, interval_ms)
+            self._sampler = _native_threading.Thread(
+                target=self._sample, args=(self.session,), name='profiler-sampler', daemon=True
+            )
+            self._sampler.start()
+            logger.info(f"Profiling the next {requests} requests to {path}")
+            return self.session
+
+    def stop(self):
+        """Finish the running profile early, keeping what was sampled"""
+        with self._lock:
+            session = self.session
+            if session is not None:
+                session.remaining = 0
+                if not session.active:
+                    self._finish(session)
+        return session
+
+    def status(self):
+        session = self.session or self.last_session
+        return session.status() if session else None
+
+    def claim(self, path):
+        """The armed session if this request should be profiled, taking one of its requests"""
+        session = self.session
+        if session is None or not session.matches(path):
+            return None
+        with self._lock:
+            if self.session is not session or session.remaining <= 0:
+                return None
+            session.remaining -= 1
+            return session
+
+    def begin(self, session, frame):
+        """Start sampling a request entered at frame; returns the token to pass to end()"""
+        token = object()
+        with self._lock:
+            session.active[token] = (_native_threading.get_ident(), frame)
+        return token
+
+    def end(self, session, token):
+        with self._lock:
+            session.active.pop(token, None)
+            session.profiled_requests += 1
+            if session.remaining <= 0 and not session.active and self.session is session:
+                self._finish(session)
+
+    def _finish(self, session):
+        """Write the collapsed stacks and disarm; called with the lock held"""
+        self.session = None
+        self.last_session = session
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = re.sub(r'[^a-z0-9]+', '_', session.path.lower()).strip('_')
+            session.filename = f"{session.started_at.strftime('%Y%m%d_%H%M%S')}_{slug}.folded"
+            with open(os.path.join(PROFILE_DIR, session.filename), 'w') as f:
+                for stack, count in session.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(
+                f"Wrote profile {session.filename}: {session.profiled_requests} requests, "
+                f"{session.samples} samples, {session.off_cpu_samples} off-CPU"
+            )
+        except Exception as e:
+            logger.error(f"Error writing profile: {e}")
+
+    def _sample(self, session):
+        while True:
+            # Sampled under the lock so the stacks are never written while being counted
+            with self._lock:
+                if self.session is not session:
+                    break
+                if time.time() > session.deadline:
+                    logger.warning(f"Profile of {session.path} timed out, writing the samples taken so far")
+                    session.remaining = 0
+                    self._finish(session)
+                    break
+                if session.active:
+                    frames = sys._current_frames()
+                    for ident, root in session.active.values():
+                        self._record(session, frames.get(ident), root)
+            _native_time.sleep(session.interval)
+
+    def _record(self, session, frame, root):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            if frame is root:
+                break
+            frame = frame.f_back
+        if frame is None:
+            # The request's frames are not running: it is waiting, switched out
+            session.off_cpu_samples += 1
+            return
+        session.stacks[';'.join(reversed(stack))] += 1
+        session.samples += 1
+
+profiler = SamplingProfiler()
+
+def list_profiles():
+    """Profiles written under db/profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith('.folded'):
+            path = os.path.join(PROFILE_DIR, name)
+            profiles.append({
+                'name': name,
+                'size': os.path.getsize(path),
+                'created': datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+            })
+    return sorted(profiles, key=lambda profile: profile['name'], reverse=True)
+
+class ProfilerMiddleware:
+    """WSGI middleware that hands armed requests to the profiler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        if profiler.session is None:
+            return self.app(environ, start_response)
+        session = profiler.claim(environ.get('PATH_INFO', ''))
+        if session is None:
+            return self.app(environ, start_response)
+
+        token = profiler.begin(session, sys._getframe())
+        try:
+            return self.app(environ, start_response)
+        finally:
+            profiler.end(session, token)
+
+def init_profiler(app):
+    """Install the profiling middleware"""
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app)
@@ -0,0 +1,87 @@
+# utils/quantile_sketch.py
+
+import json
+import math
+
+# Quantiles are reported within 1% of the true value
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+class QuantileSketch:
+    """
+    Mergeable log-bucketed histogram for non-negative measurements such as latencies.
+
+    Every value falls in the bucket ceil(log(value) / log(gamma)), so any quantile
+    read back is within relative_accuracy of the recorded value. Sketches with the
+    same accuracy merge by adding bucket counts, which lets per-hour, per-broker
+    sketches be combined into any larger view without the raw values.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        if value is None:
+            return
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def bin_value(self, index):
+        """Representative value of a bucket, within relative_accuracy of everything in it"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def buckets(self):
+        """(value, count) pairs in ascending order of value"""
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for index in sorted(self.bins):
+            yield self.bin_value(index), self.bins[index]
+
+    def quantile(self, q):
+        """
+        Value at rank int(count * q) of the sorted measurements, the same rank
+        the dashboards used when they sorted every raw value
+        """
+        if not self.count:
+            return 0.0
+        rank = min(int(self.count * q), self.count - 1)
+        seen = 0
+        for value, count in self.buckets():
+            seen += count
+            if seen > rank:
+                return value
+        return 0.0
+
+    def to_json(self):
+        return json.dumps({
+            'accuracy': self.relative_accuracy,
+            'zero': self.zero_count,
+            'bins': {str(index): count for index, count in self.bins.items()}
+        })
+
+    @classmethod
+    def from_json(cls, data):
+        sketch = cls()
+        if not data:
+            return sketch
+        state = json.loads(data)
+        sketch = cls(state.get('accuracy', DEFAULT_RELATIVE_ACCURACY))
+        sketch.zero_count = state.get('zero', 0)
+        sketch.bins = {int(index): count for index, count in state.get('bins', {}).items()}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
@@ -0,0 +1,79 @@
+# utils/spans.py
+
+"""
+Lightweight spans for breaking an order request down by stage.
+
+Services and broker adapters wrap their stages in span(name); the time is added
+to the latency tracker of the current API request and stored with its latency
+row. Spans record self time: a span nested in another is subtracted from its
+parent, so the breakdown of a request adds up instead of double counting.
+Work dispatched outside a request (queued webhook orders) installs its tracker
+with tracking(tracker); anywhere else (background jobs, the UI) spans do nothing.
+"""
+
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from flask import g, has_app_context
+
+# Stage names used across services and broker adapters
+AUTH_RESOLVE = 'auth_resolve'          # API key to broker and auth token
+SCHEMA_VALIDATE = 'schema_validate'    # Field checks and schema load
+SYMBOL_MAP = 'symbol_map'              # OpenAlgo symbol to broker symbol/token
+PAYLOAD_TRANSFORM = 'payload_transform'  # OpenAlgo order to broker payload
+HTTP_SEND = 'http_send'                # Request sent until response headers
+HTTP_RECEIVE = 'http_receive'          # Response body read
+RESPONSE_MAP = 'response_map'          # Broker response to OpenAlgo response
+BROKER_ADAPTER = 'broker_adapter'      # Broker adapter time not covered by a finer span
+
+# Tracker of in-process work that does not run inside a request
+_local = threading.local()
+
+def current_tracker():
+    """Latency tracker of the API request or dispatched order being handled, if any"""
+    if has_app_context():
+        tracker = g.get('latency_tracker')
+        if tracker is not None:
+            return tracker
+    return getattr(_local, 'tracker', None)
+
+@contextmanager
+def tracking(tracker):
+    """Make tracker the current tracker of this thread for the with block"""
+    previous = getattr(_local, 'tracker', None)
+    _local.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _local.tracker = previous
+
+@contextmanager
+def span(name):
+    """Time the with block as stage name of the current request"""
+    tracker = current_tracker()
+    if tracker is None:
+        yield
+        return
+    tracker.enter_span()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracker.exit_span(name, (time.perf_counter() - start) * 1000)
+
+def record_span(name, duration_ms):
+    """Add an already measured duration (ms) as stage name of the current request"""
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.add_span(name, duration_ms)
+
+def traced(name):
+    """Decorator form of span(name)"""
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return wrapped
+    return decorator
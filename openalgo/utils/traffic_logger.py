@@ -1,5 +1,6 @@
 from flask import request, g, has_request_context
-from database.traffic_db import TrafficLog, logs_session
+from database.traffic_db import TrafficLog
+from utils.metrics import http_requests, http_request_duration
 import time
 import logging
 
@@ -14,9 +15,11 @@ class TrafficLoggerMiddleware:
         
         # Skip logging for:
         # 1. Static files and favicon
-        # 2. Traffic monitoring endpoints themselves
+        # 2. Traffic monitoring, metrics and profiler endpoints themselves
         if (path_info.startswith('/static/') or 
             path_info == '/favicon.ico' or 
+            path_info == '/metrics' or
+            path_info.startswith('/profiler/api/') or
             path_info.startswith('/api/v1/latency/logs') or
             path_info.startswith('/traffic/') or
             path_info.startswith('/traffic/api/')):
@@ -31,7 +34,14 @@ class TrafficLoggerMiddleware:
                 
             try:
                 duration_ms = (time.time() - start_time) * 1000
-                TrafficLog.log_request(
+
+                # Route patterns rather than raw paths keep the metric series bounded
+                endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+                http_requests.inc(method=request.method, endpoint=endpoint, status=status_code)
+                http_request_duration.observe(duration_ms / 1000, method=request.method, endpoint=endpoint)
+
+                # Only buffered here; the background writer commits in batches
+                TrafficLog.queue_request(
                     client_ip=request.remote_addr,
                     method=request.method,
                     path=request.path,
@@ -43,8 +53,6 @@ class TrafficLoggerMiddleware:
                 )
             except Exception as e:
                 logger.error(f"Error logging traffic: {e}")
-            finally:
-                logs_session.remove()
         
         # Store the original start_response to intercept the status code
         def custom_start_response(status, headers, exc_info=None):